@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Vectorized score analytics over evaluation records.
+
+- Eval records are loaded into NumPy columns (competency/session codes, round,
+  score, band, timestamp)
+- Closed eval-log segments never change, so their columns are cached as .npy
+  files under data/cache/analytics/ and memory-mapped on later loads; only the
+  active segment is parsed per refresh
+- Bands come from np.searchsorted over new_llm_inter.BAND_EDGES, grouped stats
+  from bincount / lexsort instead of per-record Python loops
+
+Views: score distributions per competency, band histograms, per-round drift.
+
+Usage:
+  python analytics.py scores --competency GenAI
+  python analytics.py drift --since 2025-10-01
+  python analytics.py bands --bench 1000000     # synthetic timing run
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from eval_log import DEFAULT_LOG_DIR, SegmentedEvalLog
+from new_llm_inter import BAND_EDGES, BANDS
+
+DEFAULT_CACHE_DIR = "data/cache/analytics"
+COLUMNS = ("session", "competency", "round", "score", "ts")
+_NAT = np.iinfo(np.int64).min
+
+
+def bands_from_scores(scores: np.ndarray) -> np.ndarray:
+    """Vectorized band_from_score: band codes 0..3 (L1..L4)"""
+    return np.searchsorted(np.asarray(BAND_EDGES), scores, side="right").astype(np.int8)
+
+
+def to_epoch(ts: Optional[str], end: bool = False) -> Optional[int]:
+    """ISO timestamp/date -> epoch seconds (None passes through)
+
+    With end=True the value is an inclusive upper bound, like session_summaries'
+    until: "2025-10-01" means the last second of that day, "2025-10-01T12" of that hour.
+    """
+    if not ts:
+        return None
+    if not end:
+        return int(np.datetime64(ts, "us").astype("datetime64[s]").astype(np.int64))
+    after_us = int((np.datetime64(ts) + 1).astype("datetime64[us]").astype(np.int64))
+    return -(-after_us // 1_000_000) - 1
+
+
+def _number(value: Any, kind: type) -> Any:
+    """round/score of a stored record; malformed values count as 0"""
+    try:
+        return kind(value or 0)
+    except (TypeError, ValueError):
+        return kind(0)
+
+
+def parse_stamps(stamps: List[str]) -> np.ndarray:
+    """Timestamps as datetime64[us]; unparseable ones become NaT (and are reported) instead of failing the batch"""
+    try:
+        return np.array(stamps, dtype="datetime64[us]")
+    except ValueError:
+        pass
+    parsed = np.empty(len(stamps), dtype="datetime64[us]")
+    bad = 0
+    for i, stamp in enumerate(stamps):
+        try:
+            parsed[i] = np.datetime64(stamp, "us")
+        except (TypeError, ValueError):
+            parsed[i] = np.datetime64("NaT")
+            bad += 1
+    print(f"⚠️ {bad} eval record(s) with an unparseable timestamp (left out of since/until filters)")
+    return parsed
+
+
+# ============================================================================
+# Columnar Records
+# ============================================================================
+
+class EvalColumns:
+    """Eval records as parallel NumPy arrays plus the competency/session vocabularies"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], competencies: List[str], sessions: List[str]):
+        self.session = arrays["session"]
+        self.competency = arrays["competency"]
+        self.round = arrays["round"]
+        self.score = arrays["score"]
+        self.ts = arrays["ts"]
+        self.band = bands_from_scores(self.score)
+        self.competencies = competencies
+        self.sessions = sessions
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "EvalColumns":
+        comp_codes: Dict[str, int] = {}
+        session_codes: Dict[str, int] = {}
+        session, competency, rounds, scores, stamps = [], [], [], [], []
+        for r in records:
+            session.append(session_codes.setdefault(str(r.get("session_id", "unknown")), len(session_codes)))
+            competency.append(comp_codes.setdefault(str(r.get("competency", "")), len(comp_codes)))
+            rounds.append(_number(r.get("round"), int))
+            scores.append(_number(r.get("score"), float))
+            stamps.append(r.get("timestamp") or "NaT")
+
+        # Missing timestamps become NaT, i.e. _NAT once cast to int64
+        ts = parse_stamps(stamps).astype("datetime64[s]").astype(np.int64)
+        arrays = {
+            "session": np.array(session, dtype=np.int32),
+            "competency": np.array(competency, dtype=np.int32),
+            "round": np.array(rounds, dtype=np.int16),
+            "score": np.clip(np.array(scores, dtype=np.float64), 0.0, 1.0),
+            "ts": ts,
+        }
+        return cls(arrays, list(comp_codes), list(session_codes))
+
+    @classmethod
+    def concat(cls, parts: List["EvalColumns"]) -> "EvalColumns":
+        """Merge parts, remapping each part's local codes onto one vocabulary"""
+        comp_codes: Dict[str, int] = {}
+        session_codes: Dict[str, int] = {}
+        merged: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        for part in parts:
+            comp_map = np.array([comp_codes.setdefault(c, len(comp_codes)) for c in part.competencies], dtype=np.int32)
+            sess_map = np.array([session_codes.setdefault(s, len(session_codes)) for s in part.sessions], dtype=np.int32)
+            merged["competency"].append(comp_map[part.competency] if len(part) else part.competency)
+            merged["session"].append(sess_map[part.session] if len(part) else part.session)
+            merged["round"].append(part.round)
+            merged["score"].append(part.score)
+            merged["ts"].append(part.ts)
+        dtypes = {"session": np.int32, "competency": np.int32, "round": np.int16, "score": np.float64, "ts": np.int64}
+        arrays = {
+            name: np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtypes[name])
+            for name, chunks in merged.items()
+        }
+        return cls(arrays, list(comp_codes), list(session_codes))
+
+    def save(self, directory: pathlib.Path) -> None:
+        """Write one .npy per column (+ vocab) atomically via a temp directory"""
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in COLUMNS:
+            np.save(tmp / f"{name}.npy", getattr(self, name))
+        meta = {"records": len(self), "competencies": self.competencies, "sessions": self.sessions}
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+
+    @classmethod
+    def load(cls, directory: pathlib.Path) -> Tuple["EvalColumns", Dict[str, Any]]:
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+        return cls(arrays, meta["competencies"], meta["sessions"]), meta
+
+    def mask(
+        self,
+        competency: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> np.ndarray:
+        keep = np.ones(len(self), dtype=bool)
+        if competency is not None:
+            wanted = [i for i, c in enumerate(self.competencies) if c.lower() == competency.lower()]
+            keep &= np.isin(self.competency, wanted)
+        lo, hi = to_epoch(since), to_epoch(until, end=True)
+        if lo is not None:
+            keep &= self.ts >= lo
+        if hi is not None:
+            keep &= (self.ts <= hi) & (self.ts != _NAT)
+        return keep
+
+
+# ============================================================================
+# Segment Column Cache
+# ============================================================================
+
+class ColumnCache:
+    """Columns for the whole eval log; closed segments are cached on disk and in memory"""
+
+    def __init__(self, log: SegmentedEvalLog, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.log = log
+        self.cache_dir = pathlib.Path(cache_dir)
+        self._lock = threading.Lock()
+        self._segments: Dict[int, EvalColumns] = {}
+        self._signature: Optional[Tuple] = None
+        self._merged: Optional[EvalColumns] = None
+
+    def _closed_segment(self, seq: int, path: pathlib.Path, index: Dict[str, Any]) -> EvalColumns:
+        cols = self._segments.get(seq)
+        if cols is not None:
+            return cols
+        directory = self.cache_dir / f"seg-{seq:06d}"
+        if (directory / "meta.json").exists():
+            cols, meta = EvalColumns.load(directory)
+            if meta["records"] != index.get("records"):
+                cols = None  # Stale cache from a different log
+        if cols is None:
+            cols = EvalColumns.from_records(self.log.read_segment(seq, path))
+            cols.save(directory)
+        self._segments[seq] = cols
+        return cols
+
+    def load(self) -> EvalColumns:
+        """All records as columns; only re-merges when a segment changed"""
+        with self._lock:
+            files = self.log.segment_files()
+            signature = tuple(
+                (seq, index["records"] if index else path.stat().st_size) for seq, path, index in files
+            )
+            if signature == self._signature and self._merged is not None:
+                return self._merged
+
+            parts = []
+            for seq, path, index in files:
+                if index is not None:
+                    parts.append(self._closed_segment(seq, path, index))
+                else:
+                    parts.append(EvalColumns.from_records(self.log.read_segment(seq, path)))
+            self._merged = EvalColumns.concat(parts)
+            self._signature = signature
+            return self._merged
+
+
+# ============================================================================
+# Aggregations
+# ============================================================================
+
+def _quantiles(sorted_scores: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Per-group linear-interpolated quantile over group-contiguous sorted scores"""
+    safe = np.maximum(counts, 1)
+    pos = starts + q * (safe - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, starts + safe - 1)
+    if not len(sorted_scores):
+        return np.zeros(len(counts))
+    lo = np.minimum(lo, len(sorted_scores) - 1)
+    hi = np.minimum(hi, len(sorted_scores) - 1)
+    vals = sorted_scores[lo] + (sorted_scores[hi] - sorted_scores[lo]) * (pos - np.floor(pos))
+    return np.where(counts > 0, vals, 0.0)
+
+
+def score_distribution(cols: EvalColumns, keep: Optional[np.ndarray] = None, bins: int = 10) -> Dict[str, Any]:
+    """Per-competency count, mean, std, p10/p50/p90 and score histogram"""
+    comp = np.asarray(cols.competency)
+    score = np.asarray(cols.score)
+    if keep is not None:
+        comp, score = comp[keep], score[keep]
+    n = len(cols.competencies)
+
+    counts = np.bincount(comp, minlength=n)
+    sums = np.bincount(comp, weights=score, minlength=n)
+    sq = np.bincount(comp, weights=score * score, minlength=n)
+    safe = np.maximum(counts, 1)
+    mean = sums / safe
+    std = np.sqrt(np.maximum(sq / safe - mean * mean, 0.0))
+
+    # Scores are in [0, 1], so comp * 2 + score sorts by (competency, score)
+    # with one float sort instead of an argsort/lexsort
+    sorted_scores = np.sort(comp * 2.0 + score) - 2.0 * np.repeat(np.arange(n), counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if n else np.zeros(0, dtype=np.int64)
+    pcts = {f"p{int(q * 100)}": _quantiles(sorted_scores, starts, counts, q) for q in (0.1, 0.5, 0.9)}
+
+    bin_idx = np.minimum((score * bins).astype(np.int64), bins - 1)
+    hist = np.bincount(comp * bins + bin_idx, minlength=n * bins).reshape(n, bins)
+
+    groups = []
+    for i in np.flatnonzero(counts):
+        groups.append({
+            "competency": cols.competencies[i],
+            "count": int(counts[i]),
+            "mean": round(float(mean[i]), 4),
+            "std": round(float(std[i]), 4),
+            **{name: round(float(v[i]), 4) for name, v in pcts.items()},
+            "histogram": hist[i].tolist(),
+        })
+    groups.sort(key=lambda g: g["count"], reverse=True)
+    return {"bin_edges": np.linspace(0, 1, bins + 1).round(4).tolist(), "competencies": groups}
+
+
+def band_histogram(cols: EvalColumns, keep: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Answer counts per band, overall and per competency"""
+    comp = np.asarray(cols.competency)
+    band = cols.band
+    if keep is not None:
+        comp, band = comp[keep], band[keep]
+    n = len(cols.competencies)
+    table = np.bincount(comp * len(BANDS) + band, minlength=n * len(BANDS)).reshape(n, len(BANDS))
+    totals = table.sum(axis=0)
+    return {
+        "bands": list(BANDS),
+        "overall": dict(zip(BANDS, totals.tolist())),
+        "competencies": {
+            cols.competencies[i]: dict(zip(BANDS, table[i].tolist()))
+            for i in np.flatnonzero(table.sum(axis=1))
+        },
+    }
+
+
+def round_drift(cols: EvalColumns, keep: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Mean score per interview round and its change relative to round 1"""
+    rounds = np.asarray(cols.round).astype(np.int64)
+    score = np.asarray(cols.score)
+    # Round 0 means the record predates per-round logging
+    keep = rounds > 0 if keep is None else keep & (rounds > 0)
+    rounds, score = rounds[keep], score[keep]
+    if not len(rounds):
+        return {"rounds": []}
+    counts = np.bincount(rounds)
+    means = np.bincount(rounds, weights=score) / np.maximum(counts, 1)
+    present = np.flatnonzero(counts)
+    baseline = means[present[0]]
+    return {
+        "rounds": [
+            {
+                "round": int(r),
+                "count": int(counts[r]),
+                "mean": round(float(means[r]), 4),
+                "delta": round(float(means[r] - baseline), 4),
+            }
+            for r in present
+        ]
+    }
+
+
+VIEWS = {"scores": score_distribution, "bands": band_histogram, "drift": round_drift}
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def synthetic_columns(n: int, competencies: int = 12, seed: int = 0) -> EvalColumns:
+    rng = np.random.default_rng(seed)
+    arrays = {
+        "session": (np.arange(n) // 5).astype(np.int32),
+        "competency": rng.integers(0, competencies, n, dtype=np.int32),
+        "round": (np.arange(n) % 5 + 1).astype(np.int16),
+        "score": rng.beta(4, 3, n),
+        "ts": 1_760_000_000 + np.arange(n, dtype=np.int64) * 30,
+    }
+    return EvalColumns(arrays, [f"Competency {i}" for i in range(competencies)],
+                       [f"session_{i}" for i in range(n // 5 + 1)])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Score analytics over evaluation records")
+    ap.add_argument("view", choices=list(VIEWS))
+    ap.add_argument("--log-dir", default=DEFAULT_LOG_DIR)
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--competency", default=None)
+    ap.add_argument("--since", default=None, help="ISO date/timestamp lower bound")
+    ap.add_argument("--until", default=None, help="ISO date/timestamp upper bound (inclusive: a date covers the whole day)")
+    ap.add_argument("--bench", type=int, default=0, help="Time the view on N synthetic records instead")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    if args.bench:
+        cols = synthetic_columns(args.bench)
+    else:
+        cols = ColumnCache(SegmentedEvalLog(args.log_dir), args.cache_dir).load()
+    loaded = time.perf_counter()
+    result = VIEWS[args.view](cols, cols.mask(args.competency, args.since, args.until))
+    done = time.perf_counter()
+
+    if not args.bench:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"{len(cols)} record(s): load {(loaded - started) * 1000:.1f} ms, "
+          f"{args.view} {(done - loaded) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
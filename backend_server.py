@@ -13,11 +13,14 @@ Then access:
     - Frontend: http://localhost:5173
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from pydantic import BaseModel
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+from contextlib import asynccontextmanager
+import collections
+import hashlib
 import json
 import os
 import pathlib
@@ -39,18 +42,50 @@ from new_llm_inter import (
     InterviewChainManager,
     InterviewSession,
     load_sample,
-    select_competency,
-    band_from_score,
-    append_record
+    band_from_score
 )
+from interview_plan import InterviewPlan
+from build_rubrics_filled import RubricFiller, RubricLevelCache, DEFAULT_CACHE as RUBRIC_LEVEL_CACHE
+from rubric_cache import SampleCache, sample_key
+from document_parser import DocumentParser, DocumentParseError
+from question_index import QuestionIndex
+from near_dup import LSHIndex
+from context_digest import DigestCache
+from pre_grader import PreGrader
+from record_writer import AsyncRecordWriter
+from eval_log import LEGACY_EVALS_PATH, SegmentedEvalLog
+from session_summaries import SessionSummaryStore, build_summary, summaries_from_records
+import analytics
+import metrics
+from profiling import ProfilingMiddleware
+from llm_admission import AdmissionController, LLMOverloadedError, SingleFlight
+from llm_resilience import breaker_states
+from llm_routing import UsageMeter
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background resources on startup and release them on shutdown"""
+    document_parser.start()
+    await eval_writer.start()
+    if not eval_log.stats()["records"] and pathlib.Path(LEGACY_EVALS_PATH).exists():
+        n = await asyncio.to_thread(eval_log.import_jsonl, pathlib.Path(LEGACY_EVALS_PATH))
+        print(f"✅ Migrated {n} record(s) from {LEGACY_EVALS_PATH} into {eval_log.directory}")
+    if not await asyncio.to_thread(summary_store.load):
+        records = await asyncio.to_thread(lambda: list(eval_log.iter_records()))
+        n = await asyncio.to_thread(summary_store.add_many, summaries_from_records(records))
+        print(f"✅ Backfilled {n} session summaries from the eval log")
+    yield
+    await eval_writer.stop()
+    document_parser.shutdown()
+
 # Initialize FastAPI
 app = FastAPI(
     title="AI Interview Platform API",
     description="Backend API for the AI-powered interview platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - allow frontend to connect
@@ -60,8 +95,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Path", "Retry-After"],
 )
 
+# Opt-in per-request sampling profiler (PROFILING_ENABLED + X-Profile: 1 or ?profile=1)
+app.add_middleware(ProfilingMiddleware)
+
 # ============================================================================
 # Data Models
 # ============================================================================
@@ -71,11 +110,26 @@ class InterviewStartRequest(BaseModel):
     sample_idx: int = 0
     competency: Optional[str] = None
     rounds: int = 3
+    adaptive: Optional[bool] = None  # Stop before `rounds` once the band is stable (default: ADAPTIVE_ROUNDS)
+    min_rounds: Optional[int] = None
+    competencies: Optional[int] = None  # Top-k competencies, `rounds` each (default: INTERVIEW_COMPETENCIES)
+
+class InterviewFromTextRequest(BaseModel):
+    jd: str
+    resume: str
+    mode: str = "practice"
+    competency: Optional[str] = None
+    rounds: int = 3
+    adaptive: Optional[bool] = None
+    min_rounds: Optional[int] = None
+    competencies: Optional[int] = None
 
 class AnswerSubmission(BaseModel):
     session_id: str
     answer: str
     question: str
+    round: Optional[int] = None  # Round being answered (default: derived from `question`)
+    idempotency_key: Optional[str] = None  # Repeats of a key get the first response (default key: the round)
 
 class CVUpload(BaseModel):
     content: str
@@ -110,7 +164,12 @@ class SessionManager:
             "answers_received": [],
             "scores": [],
             "chain_manager": None,
+            "dedup": None,
             "competency": None,
+            "plan": None,
+            "usage": None,
+            "lock": asyncio.Lock(),  # Serializes answer submissions (REST and WebSocket)
+            "responses": collections.OrderedDict(),  # Idempotency key -> response, for repeated submissions
             "sample_data": None,
             "status": "created"  # created, active, completed
         }
@@ -136,20 +195,316 @@ session_manager = SessionManager()
 # Helper Functions
 # ============================================================================
 
+# Optional bank of previously asked questions, reused before calling the LLM
+question_index = (
+    QuestionIndex.from_jsonl()
+    if os.getenv("QUESTION_BANK", "false").lower() in ("1", "true", "yes")
+    else None
+)
+
+# Questions asked in any session; generated near-duplicates are regenerated
+question_dedup = LSHIndex(max_items=int(os.getenv("DEDUP_MAX_ITEMS", "50000")))
+
+# JD/resume digests and pre-grader vocabularies are cached across sessions, so
+# every chain manager shares one of each (None when QUESTION_CONTEXT=raw / PRE_GRADER=false)
+context_digests = DigestCache.from_env()
+pre_grader = PreGrader.from_env()
+
+# Every LLM call from every session is admitted here (in-flight cap, RPM/TPM, fair queueing)
+llm_admission = AdmissionController.from_env()
+
+# Identical concurrent chain calls (client retries, sessions started together) share one flight
+llm_single_flight = SingleFlight.from_env()
+
+def llm_overloaded(e: LLMOverloadedError) -> HTTPException:
+    """503 telling the client when to retry, instead of a degraded fallback answer"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 def initialize_chain_manager() -> InterviewChainManager:
     """Initialize the LangChain interview manager"""
     model_name = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
     api_key = os.getenv("LLM_API_KEY")
     base_url = os.getenv("LLM_BASE_URL", None)
+    provider = os.getenv("LLM_PROVIDER", "openai")
 
-    if not api_key:
+    if not api_key and provider != "fake":
         raise HTTPException(status_code=500, detail="LLM_API_KEY not configured")
 
     return InterviewChainManager(
         model_name=model_name,
         api_key=api_key,
-        base_url=base_url
+        base_url=base_url,
+        question_index=question_index,
+        dedup_index=question_dedup,
+        provider=provider,
+        admission=llm_admission,
+        single_flight=llm_single_flight,
+        context_digests=context_digests,
+        pre_grader=pre_grader
+    )
+
+# CV/JD parsing runs in a process pool; results are cached by content hash
+document_parser = DocumentParser(max_workers=int(os.getenv("PARSER_WORKERS", "2")))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+
+# Samples built from uploaded JD/CV text, keyed by content hash; hashing and
+# evidence matching run in the parser's process pool, off the event loop
+sample_cache = SampleCache(offload=document_parser.run)
+rubric_filler: Optional[RubricFiller] = None
+
+def get_rubric_filler() -> RubricFiller:
+    """Rubric filler shared by all uploads, so the level cache is reused across candidates"""
+    global rubric_filler
+    if rubric_filler is None:
+        rubric_filler = RubricFiller(
+            initialize_chain_manager(),
+            RubricLevelCache(pathlib.Path(RUBRIC_LEVEL_CACHE)),
+            concurrency=int(os.getenv("RUBRIC_FILL_CONCURRENCY", "8")),
+            rpm=int(os.getenv("RUBRIC_FILL_RPM", "0")),
+        )
+    return rubric_filler
+
+async def open_interview_session(
+    sample: Dict[str, Any],
+    mode: str,
+    rounds: int,
+    competency_name: Optional[str],
+    source: Dict[str, Any],
+    adaptive: Optional[bool] = None,
+    min_rounds: Optional[int] = None,
+    competencies: Optional[int] = None,
+) -> dict:
+    """Plan the competencies, generate the first question and register the session"""
+    # Generate session ID
+    session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+
+    # Initialize chain manager
+    chain_manager = initialize_chain_manager()
+    session_dedup = LSHIndex(max_items=64)
+
+    # Top-k competencies; all opening questions are generated concurrently
+    plan = InterviewPlan.for_sample(
+        chain_manager, sample, rounds, competencies, competency_name,
+        session_key=session_id, session_dedup=session_dedup, adaptive=adaptive, min_rounds=min_rounds
+    )
+    # Session-wide meter: prefetch tasks inherit it and outlive the request that spawned them
+    with UsageMeter(chain_manager.routing_label) as usage:
+        q_output = await plan.start()
+
+    # Create session
+    session_manager.create_session(session_id, {
+        "mode": mode,
+        **source,
+        "rounds": rounds,
+        "adaptive": plan.adaptive,
+        "competencies": [t.name for t in plan.tracks],
+        "competency_name": competency_name
+    })
+
+    # Update session with initialized data
+    session_manager.update_session(session_id, {
+        "chain_manager": chain_manager,
+        "dedup": session_dedup,
+        "competency": plan.tracks[0].competency,  # Primary (top-weight) competency, used for history
+        "plan": plan,
+        "usage": usage,
+        "sample_data": sample,
+        "current_question": q_output.question,
+        "current_round": 1,
+        "status": "active"
+    })
+
+    return {
+        "session_id": session_id,
+        "competency": plan.current.name,
+        "competencies": [t.name for t in plan.tracks],
+        "question": q_output.question,
+        "difficulty": q_output.difficulty,
+        "round": 1,
+        "total_rounds": plan.max_rounds
+    }
+
+# All eval records go through one group-commit writer (batched, off the event loop)
+# into a segmented log: rotated by size/age, closed segments compressed + indexed
+eval_log = SegmentedEvalLog(
+    os.getenv("EVAL_LOG_DIR", "data/training/evals"),
+    max_bytes=int(os.getenv("EVAL_SEGMENT_MB", "16")) * 1024 * 1024,
+    max_age=float(os.getenv("EVAL_SEGMENT_HOURS", "24")) * 3600,
+)
+eval_writer = AsyncRecordWriter(
+    eval_log,
+    flush_interval=int(os.getenv("EVAL_FLUSH_INTERVAL_MS", "50")) / 1000,
+    max_batch=int(os.getenv("EVAL_FLUSH_MAX_BATCH", "512")),
+    fsync=os.getenv("EVAL_FSYNC", "interval"),
+)
+
+# Columnar view of the eval log for /api/analytics (closed segments cached as .npy)
+analytics_cache = analytics.ColumnCache(eval_log)
+
+# One summary per completed session, written once and served to /history
+summary_store = SessionSummaryStore(os.getenv("SESSION_SUMMARIES_PATH", "data/training/session_summaries.jsonl"))
+
+async def complete_session(session_id: str, session: dict) -> None:
+    """Mark a session completed and materialize its history summary"""
+    session_manager.update_session(session_id, {"status": "completed"})
+    session["plan"].close()
+    summary = build_summary(
+        session_id,
+        session["competency"].get("name", ""),
+        list(session["scores"]),
+        session["created_at"],
+        datetime.now().isoformat(),
     )
+    await asyncio.to_thread(summary_store.add, summary)
+
+# Responses kept per session for replaying repeated answer submissions
+ANSWER_REPLAY_MAX = 8
+ANSWER_SUBMISSIONS = metrics.Counter(
+    "answer_submissions_total", "Answer submissions by outcome (graded, replayed, conflict)", ["outcome"]
+)
+
+def submission_round(session: dict, question: Optional[str]) -> Optional[int]:
+    """Round a submission answers: the open round, the earlier round that asked `question`, or None"""
+    if not question or question == session["current_question"]:
+        return session["current_round"]
+    asked = session["questions_asked"]
+    for i in range(len(asked) - 1, -1, -1):
+        if asked[i] == question:
+            return i + 1
+    return None
+
+async def answer_round(
+    session_id: str,
+    session: dict,
+    question: Optional[str],
+    answer: str,
+    idempotency_key: Optional[str] = None,
+    round_num: Optional[int] = None,
+) -> dict:
+    """Grade an answer, record it and advance the session, at most once per idempotency key
+
+    Submissions for one session run one at a time under its lock. The key is
+    the client's idempotency key, else the round answered; a repeated key gets
+    the stored response of the first submission, whether that one finished
+    earlier or was still being graded when the repeat arrived. Once the
+    session is completed, a key or question that matches no recorded round
+    gets a 409 instead of the last round's response.
+    """
+    async with session["lock"]:
+        round_num = round_num or submission_round(session, question)
+        if round_num is None and session["status"] == "active":
+            round_num = session["current_round"]  # Question text edited client-side: answers the open round
+        # An unknown question on a completed session has no round: no replay, 409 below
+        key = f"key:{idempotency_key}" if idempotency_key else f"round:{round_num}"
+        cached = session["responses"].get(key)
+        if cached is not None:
+            ANSWER_SUBMISSIONS.labels("replayed").inc()
+            return cached
+        if session["status"] != "active" or round_num != session["current_round"]:
+            ANSWER_SUBMISSIONS.labels("conflict").inc()
+            detail = "Interview already completed" if session["status"] == "completed" else f"Round {round_num} is not open"
+            raise HTTPException(status_code=409, detail=detail)
+
+        question = question or session["current_question"]
+        chain_manager = session["chain_manager"]
+        plan = session["plan"]
+        track = plan.current
+        current_round = session["current_round"]
+
+        with session["usage"]:
+            # Grade the answer
+            grade_output = await chain_manager.agrade_answer(
+                question,
+                answer,
+                track.rubric_fragment,
+                session_key=session_id
+            )
+
+            # Next round's question: usually prefetched (another competency's opening
+            # question or an earlier follow-up); None once every competency is done
+            followup = await plan.advance(grade_output.score, grade_output.followup_question)
+            is_complete = followup is None
+
+        # Calculate band
+        band = band_from_score(grade_output.score)
+
+        # Store the Q&A record
+        record = {
+            "session_id": session_id,
+            "round": current_round,
+            "competency": track.name,
+            "question": question,
+            "answer": answer,
+            "score": grade_output.score,
+            "band": band,
+            "justification": grade_output.justification,
+            "followup_question": grade_output.followup_question,
+            "llm_usage": session["usage"].take(),  # Includes prefetches finished since the last answer
+            "timestamp": datetime.now().isoformat()
+        }
+
+        # Append to session history
+        session["questions_asked"].append(question)
+        session["answers_received"].append(answer)
+        session["scores"].append(grade_output.score)
+
+        # Save to file
+        with metrics.stage("eval_append"):
+            await eval_writer.append(record)
+
+        if not is_complete:
+            # Update session for next round
+            session_manager.update_session(session_id, {
+                "current_question": followup,
+                "current_round": current_round + 1
+            })
+        else:
+            # Mark session as completed
+            await complete_session(session_id, session)
+
+        response = {
+            "score": grade_output.score,
+            "band": band,
+            "justification": grade_output.justification,
+            "next_question": followup,
+            "next_competency": plan.current.name if not is_complete else None,
+            "round": current_round + 1,
+            "total_rounds": plan.max_rounds,
+            "is_complete": is_complete
+        }
+        ANSWER_SUBMISSIONS.labels("graded").inc()
+        session["responses"][key] = response
+        while len(session["responses"]) > ANSWER_REPLAY_MAX:
+            session["responses"].popitem(last=False)
+        return response
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+async def read_upload_limited(file: UploadFile, limit: int = MAX_UPLOAD_BYTES) -> Tuple[bytes, str]:
+    """Read an upload in chunks, rejecting it as soon as it exceeds the limit"""
+    digest = hashlib.sha256()
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large (limit {limit // (1024 * 1024)} MB)"
+            )
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+def format_years(years: Optional[Dict[str, int]]) -> Optional[str]:
+    if not years:
+        return None
+    if years["min"] == years["max"]:
+        return f"{years['min']}+ years"
+    return f"{years['min']}-{years['max']} years"
 
 # Global Whisper model (loaded once for performance)
 whisper_model = None
@@ -181,12 +536,45 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (degraded while an LLM circuit breaker is not closed or eval writes fail)"""
+    breakers = breaker_states()
+    healthy = all(b["state"] == "closed" for b in breakers.values()) and not eval_writer.records_pending_retry
     return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "status": "healthy" if healthy else "degraded",
+        "timestamp": datetime.now().isoformat(),
+        "llm": {
+            "circuit_breakers": breakers,
+            "in_flight": llm_admission.in_flight,
+            "queued": llm_admission.queued,
+            "single_flights": llm_single_flight.in_flight if llm_single_flight else 0
+        },
+        "eval_writer": {
+            "records_written": eval_writer.records_written,
+            "write_errors": eval_writer.write_errors,
+            "pending_retry": eval_writer.records_pending_retry,
+            "records_dropped": eval_writer.records_dropped
+        }
     }
 
+# Gauges are read at scrape time, so the hot path never updates them
+SESSIONS = metrics.Gauge("interview_sessions", "In-memory interview sessions by status", ["status"])
+for _status in ("created", "active", "completed"):
+    SESSIONS.set_function(
+        lambda status=_status: sum(1 for s in session_manager.sessions.values() if s["status"] == status),
+        _status
+    )
+QUEUE_DEPTH = metrics.Gauge("queue_depth", "Items waiting in background queues", ["queue"])
+QUEUE_DEPTH.set_function(lambda: eval_writer.queue_depth, "eval_writer")
+QUEUE_DEPTH.set_function(lambda: rubric_filler.waiting if rubric_filler else 0, "rubric_fill")
+QUEUE_DEPTH.set_function(lambda: llm_admission.queued, "llm_admission")
+LLM_IN_FLIGHT = metrics.Gauge("llm_in_flight", "LLM calls currently admitted")
+LLM_IN_FLIGHT.set_function(lambda: llm_admission.in_flight)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint (stage latencies, LLM retries/fallbacks, gauges)"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/api/interviews/start")
 async def start_interview(request: InterviewStartRequest):
     """
@@ -195,59 +583,63 @@ async def start_interview(request: InterviewStartRequest):
     Returns session_id and first question
     """
     try:
-        # Generate session ID
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-
         # Load sample data
         input_file = "data/training/rubrics_filled.jsonl"
         sample = load_sample(input_file, request.sample_idx)
 
-        # Select competency
-        competency = select_competency(
-            sample.get("rubric", {}),
-            request.competency
+        return await open_interview_session(
+            sample,
+            mode=request.mode,
+            rounds=request.rounds,
+            competency_name=request.competency,
+            source={"sample_idx": request.sample_idx},
+            adaptive=request.adaptive,
+            min_rounds=request.min_rounds,
+            competencies=request.competencies,
         )
 
-        # Initialize chain manager
-        chain_manager = initialize_chain_manager()
-
-        # Generate first question
-        q_output = chain_manager.generate_question(
-            sample.get("jd", ""),
-            sample.get("resume", ""),
-            competency.get("name", "")
-        )
+    except LLMOverloadedError as e:
+        raise llm_overloaded(e)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Sample data file not found")
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start interview: {str(e)}")
 
-        # Create session
-        session = session_manager.create_session(session_id, {
-            "mode": request.mode,
-            "sample_idx": request.sample_idx,
-            "rounds": request.rounds,
-            "competency_name": request.competency
-        })
+@app.post("/api/interviews/start-from-text")
+async def start_interview_from_text(request: InterviewFromTextRequest):
+    """
+    Start an interview from raw JD and resume text
 
-        # Update session with initialized data
-        session_manager.update_session(session_id, {
-            "chain_manager": chain_manager,
-            "competency": competency,
-            "sample_data": sample,
-            "current_question": q_output.question,
-            "current_round": 1,
-            "status": "active"
-        })
+    The evidence + rubric for the pair is built once and cached by content hash;
+    rubric levels are shared between candidates applying to the same JD.
+    """
+    if not request.jd.strip() or not request.resume.strip():
+        raise HTTPException(status_code=400, detail="Both jd and resume text are required")
+    if max(len(request.jd.encode("utf-8")), len(request.resume.encode("utf-8"))) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"jd/resume text too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
 
-        return {
-            "session_id": session_id,
-            "competency": competency.get("name", ""),
-            "question": q_output.question,
-            "difficulty": q_output.difficulty,
-            "round": 1,
-            "total_rounds": request.rounds
-        }
+    try:
+        key = await document_parser.run(sample_key, request.jd, request.resume)
+        sample = await sample_cache.get_or_build(request.jd, request.resume, get_rubric_filler(), key=key)
+
+        return await open_interview_session(
+            sample,
+            mode=request.mode,
+            rounds=request.rounds,
+            competency_name=request.competency,
+            source={"sample_key": key},
+            adaptive=request.adaptive,
+            min_rounds=request.min_rounds,
+            competencies=request.competencies,
+        )
 
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Sample data file not found")
-    except IndexError as e:
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        raise llm_overloaded(e)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start interview: {str(e)}")
@@ -256,78 +648,28 @@ async def start_interview(request: InterviewStartRequest):
 async def submit_answer(submission: AnswerSubmission):
     """
     Submit an answer and get grading + next question
+
+    Idempotent per round (or per idempotency_key): a retried or double-clicked
+    submission gets the first submission's response instead of a second grading.
     """
     try:
         session = session_manager.get_session(submission.session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        chain_manager = session["chain_manager"]
-        competency = session["competency"]
-        current_round = session["current_round"]
-        total_rounds = session["config"]["rounds"]
-
-        # Grade the answer
-        grade_output = chain_manager.grade_answer(
+        return await answer_round(
+            submission.session_id,
+            session,
             submission.question,
             submission.answer,
-            competency
+            idempotency_key=submission.idempotency_key,
+            round_num=submission.round
         )
 
-        # Rewrite follow-up
-        followup = chain_manager.rewrite_followup(grade_output.followup_question)
-
-        # Calculate band
-        band = band_from_score(grade_output.score)
-
-        # Store the Q&A record
-        record = {
-            "session_id": submission.session_id,
-            "round": current_round,
-            "competency": competency.get("name", ""),
-            "question": submission.question,
-            "answer": submission.answer,
-            "score": grade_output.score,
-            "band": band,
-            "justification": grade_output.justification,
-            "followup_question": followup,
-            "timestamp": datetime.now().isoformat()
-        }
-
-        # Append to session history
-        session["questions_asked"].append(submission.question)
-        session["answers_received"].append(submission.answer)
-        session["scores"].append(grade_output.score)
-
-        # Save to file
-        output_path = pathlib.Path("data/training/evals.jsonl")
-        append_record(output_path, record)
-
-        # Check if interview is complete
-        is_complete = current_round >= total_rounds
-
-        if not is_complete:
-            # Update session for next round
-            session_manager.update_session(submission.session_id, {
-                "current_question": followup,
-                "current_round": current_round + 1
-            })
-        else:
-            # Mark session as completed
-            session_manager.update_session(submission.session_id, {
-                "status": "completed"
-            })
-
-        return {
-            "score": grade_output.score,
-            "band": band,
-            "justification": grade_output.justification,
-            "next_question": followup if not is_complete else None,
-            "round": current_round + 1,
-            "total_rounds": total_rounds,
-            "is_complete": is_complete
-        }
-
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        raise llm_overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process answer: {str(e)}")
 
@@ -344,108 +686,141 @@ async def get_feedback(session_id: str):
         if session["status"] != "completed":
             raise HTTPException(status_code=400, detail="Interview not yet completed")
 
-        # Calculate statistics
-        scores = session["scores"]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        avg_band = band_from_score(avg_score)
-
-        # Read the eval records for this session
-        evals = []
-        eval_file = pathlib.Path("data/training/evals.jsonl")
-        if eval_file.exists():
-            with eval_file.open("r", encoding="utf-8") as f:
-                for line in f:
-                    record = json.loads(line)
-                    if record.get("session_id") == session_id:
-                        evals.append(record)
+        # Statistics were materialized when the session completed
+        summary = summary_store.get(session_id)
+        if summary is None:
+            scores = session["scores"]
+            summary = build_summary(session_id, session["competency"].get("name", ""), scores,
+                                    session["created_at"], datetime.now().isoformat())
+
+        # Read the eval records for this session (after pending writes land);
+        # segment indexes skip every segment that doesn't contain the session
+        await eval_writer.flush()
+        evals = await asyncio.to_thread(lambda: list(eval_log.iter_records(session_ids={session_id})))
 
         return {
             "session_id": session_id,
             "competency": session["competency"].get("name", ""),
             "total_questions": len(session["questions_asked"]),
-            "average_score": round(avg_score, 2),
-            "average_band": avg_band,
-            "scores": scores,
+            "average_score": summary["average_score"],
+            "average_band": summary["average_band"],
+            "scores": summary["scores"],
             "evaluations": evals,
             "created_at": session["created_at"],
-            "completed_at": datetime.now().isoformat()
+            "completed_at": summary["completed_at"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get feedback: {str(e)}")
 
 @app.get("/api/interviews/history")
-async def get_interview_history():
+async def get_interview_history(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    competency: Optional[str] = None,
+    band: Optional[str] = Query(None, pattern="^L[1-4]$"),
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
     """
-    Get all completed interview sessions
+    Get completed interview sessions, newest first
+
+    Served from per-session summaries with cursor pagination; pass the
+    returned next_cursor to get the following page. Supports If-None-Match.
     """
     try:
-        history = []
-
-        # Read all eval records
-        eval_file = pathlib.Path("data/training/evals.jsonl")
-        if eval_file.exists():
-            sessions_data = {}
+        etag = summary_store.etag(limit, cursor, competency, band, since, until)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
 
-            with eval_file.open("r", encoding="utf-8") as f:
-                for line in f:
-                    record = json.loads(line)
-                    session_id = record.get("session_id", "unknown")
-
-                    if session_id not in sessions_data:
-                        sessions_data[session_id] = {
-                            "session_id": session_id,
-                            "competency": record.get("competency", ""),
-                            "scores": [],
-                            "timestamp": record.get("timestamp", "")
-                        }
-
-                    sessions_data[session_id]["scores"].append(record.get("score", 0))
-
-            # Calculate averages and format
-            for session_id, data in sessions_data.items():
-                scores = data["scores"]
-                avg_score = sum(scores) / len(scores) if scores else 0
+        history, next_cursor = summary_store.page(
+            limit=limit, cursor=cursor, competency=competency, band=band, since=since, until=until
+        )
+        return JSONResponse(
+            {
+                "history": [{k: v for k, v in item.items() if k != "scores"} for item in history],
+                "next_cursor": next_cursor
+            },
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
 
-                history.append({
-                    "session_id": session_id,
-                    "competency": data["competency"],
-                    "questions_answered": len(scores),
-                    "average_score": round(avg_score, 2),
-                    "average_band": band_from_score(avg_score),
-                    "timestamp": data["timestamp"]
-                })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
 
-        # Sort by timestamp (newest first)
-        history.sort(key=lambda x: x["timestamp"], reverse=True)
+@app.get("/api/analytics/{view}")
+async def get_analytics(
+    view: str,
+    competency: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    bins: int = Query(10, ge=1, le=100)
+):
+    """
+    Cohort analytics over all eval records
 
-        return {"history": history}
+    view: scores (per-competency distribution), bands (band histogram)
+    or drift (mean score per round)
+    """
+    if view not in analytics.VIEWS:
+        raise HTTPException(status_code=404, detail=f"Unknown analytics view: {view}")
+    try:
+        analytics.to_epoch(since)
+        analytics.to_epoch(until, end=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {str(e)}")
+
+    def compute() -> Dict[str, Any]:
+        cols = analytics_cache.load()
+        keep = cols.mask(competency, since, until)
+        if view == "scores":
+            result = analytics.score_distribution(cols, keep, bins=bins)
+        else:
+            result = analytics.VIEWS[view](cols, keep)
+        return {"records": int(keep.sum()), **result}
 
+    try:
+        await eval_writer.flush()
+        return await asyncio.to_thread(compute)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to compute analytics: {str(e)}")
 
 @app.post("/api/cv/upload")
 async def upload_cv(file: UploadFile = File(...)):
     """
-    Upload and parse CV file
+    Upload and parse CV file (PDF, DOCX or text)
+
+    Competencies are matched with the same vocabulary as build_step1
     """
     try:
-        content = await file.read()
-        text_content = content.decode("utf-8")
+        content, digest = await read_upload_limited(file)
+        if not content:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        with metrics.stage("document_parse"):
+            parsed = await document_parser.parse(content, file.filename or "", "cv", digest)
+        years = parsed["years"]
 
-        # For now, return mock parsing result
-        # In production, you'd use a real CV parser
         return {
             "success": True,
             "filename": file.filename,
-            "extracted_skills": [
-                "Python", "JavaScript", "React", "Machine Learning",
-                "FastAPI", "SQL", "Git", "Problem Solving"
-            ],
-            "experience_years": 3,
-            "education": "Bachelor's in Computer Science"
+            "content_hash": digest,
+            "extracted_skills": parsed["skills"],
+            "evidence": parsed["evidence"],
+            "experience_years": years["max"] if years else None,
+            "education": parsed["education"],
+            "text": parsed["text"],
+            "parse_ms": parsed["parse_ms"]
         }
 
+    except HTTPException:
+        raise
+    except DocumentParseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process CV: {str(e)}")
 
@@ -455,18 +830,28 @@ async def parse_job_description(jd: JobDescriptionUpload):
     Parse job description text
     """
     try:
-        # For now, return mock parsing result
-        # In production, you'd use NLP to extract requirements
+        content = jd.content.encode("utf-8")
+        if len(content) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Job description too large")
+        if not jd.content.strip():
+            raise HTTPException(status_code=400, detail="Empty job description")
+
+        with metrics.stage("document_parse"):
+            parsed = await document_parser.parse(content, "", "jd")
+
         return {
             "success": True,
-            "required_skills": [
-                "Python", "React", "System Design", "Communication",
-                "Problem Solving", "Leadership"
-            ],
-            "experience_required": "3-5 years",
-            "role_level": "Mid-Senior"
+            "required_skills": parsed["skills"],
+            "evidence": parsed["evidence"],
+            "experience_required": format_years(parsed["years"]),
+            "role_level": parsed["role_level"],
+            "parse_ms": parsed["parse_ms"]
         }
 
+    except HTTPException:
+        raise
+    except DocumentParseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse JD: {str(e)}")
 
@@ -480,7 +865,11 @@ async def end_interview(session_id: str):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        session_manager.delete_session(session_id)
+        # Wait for an answer being graded: closing the plan cancels the prefetch it may be awaiting
+        async with session["lock"]:
+            if session.get("plan") is not None:
+                session["plan"].close()  # Cancel prefetched questions nobody will ask
+            session_manager.delete_session(session_id)
 
         return {
             "success": True,
@@ -525,7 +914,8 @@ async def transcribe_audio(file: UploadFile = File(...)):
             if file_extension == 'webm':
                 try:
                     # Let Whisper handle the WebM file directly
-                    result = model.transcribe(temp_file_path, fp16=False)
+                    with metrics.stage("whisper_transcribe"):
+                        result = model.transcribe(temp_file_path, fp16=False)
                     transcript = result["text"].strip()
 
                     return {
@@ -540,27 +930,30 @@ async def transcribe_audio(file: UploadFile = File(...)):
 
                     # Try pydub conversion as fallback
                     try:
-                        audio = AudioSegment.from_file(temp_file_path, format='webm')
-                        wav_path = temp_file_path.replace('.webm', '.wav')
-                        audio.export(wav_path, format='wav')
+                        with metrics.stage("audio_decode"):
+                            audio = AudioSegment.from_file(temp_file_path, format='webm')
+                            wav_path = temp_file_path.replace('.webm', '.wav')
+                            audio.export(wav_path, format='wav')
 
-                        # Read with soundfile
-                        audio_data, sample_rate = sf.read(wav_path)
+                            # Read with soundfile
+                            audio_data, sample_rate = sf.read(wav_path)
 
-                        # Convert to mono if stereo
-                        if len(audio_data.shape) > 1:
-                            audio_data = audio_data.mean(axis=1)
+                        with metrics.stage("audio_resample"):
+                            # Convert to mono if stereo
+                            if len(audio_data.shape) > 1:
+                                audio_data = audio_data.mean(axis=1)
 
-                        # Resample to 16kHz if needed
-                        if sample_rate != 16000:
-                            import librosa
-                            audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
+                            # Resample to 16kHz if needed
+                            if sample_rate != 16000:
+                                import librosa
+                                audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
 
-                        # Normalize to float32
-                        audio_data = audio_data.astype(np.float32)
+                            # Normalize to float32
+                            audio_data = audio_data.astype(np.float32)
 
                         # Transcribe
-                        result = model.transcribe(audio_data, fp16=False)
+                        with metrics.stage("whisper_transcribe"):
+                            result = model.transcribe(audio_data, fp16=False)
                         transcript = result["text"].strip()
 
                         return {
@@ -578,22 +971,25 @@ async def transcribe_audio(file: UploadFile = File(...)):
             else:
                 # For non-WebM formats, use soundfile directly
                 try:
-                    audio_data, sample_rate = sf.read(temp_file_path)
+                    with metrics.stage("audio_decode"):
+                        audio_data, sample_rate = sf.read(temp_file_path)
 
-                    # Convert to mono if stereo
-                    if len(audio_data.shape) > 1:
-                        audio_data = audio_data.mean(axis=1)
+                    with metrics.stage("audio_resample"):
+                        # Convert to mono if stereo
+                        if len(audio_data.shape) > 1:
+                            audio_data = audio_data.mean(axis=1)
 
-                    # Resample to 16kHz if needed
-                    if sample_rate != 16000:
-                        import librosa
-                        audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
+                        # Resample to 16kHz if needed
+                        if sample_rate != 16000:
+                            import librosa
+                            audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
 
-                    # Normalize to float32
-                    audio_data = audio_data.astype(np.float32)
+                        # Normalize to float32
+                        audio_data = audio_data.astype(np.float32)
 
                     # Transcribe
-                    result = model.transcribe(audio_data, fp16=False)
+                    with metrics.stage("whisper_transcribe"):
+                        result = model.transcribe(audio_data, fp16=False)
                     transcript = result["text"].strip()
 
                     return {
@@ -605,7 +1001,8 @@ async def transcribe_audio(file: UploadFile = File(...)):
                 except Exception as audio_error:
                     print(f"Audio processing error: {audio_error}")
                     # Fallback to Whisper's built-in loader
-                    result = model.transcribe(temp_file_path, fp16=False)
+                    with metrics.stage("whisper_transcribe"):
+                        result = model.transcribe(temp_file_path, fp16=False)
                     transcript = result["text"].strip()
 
                     return {
@@ -679,8 +1076,9 @@ async def synthesize_speech(request: TextToSpeechRequest):
                 engine.setProperty('rate', 150)  # Normal speed
 
                 # Save to file
-                engine.save_to_file(request.text, temp_path)
-                engine.runAndWait()
+                with metrics.stage("tts_render"):
+                    engine.save_to_file(request.text, temp_path)
+                    engine.runAndWait()
 
             # Read the generated audio file
             with open(temp_path, 'rb') as audio_file:
@@ -740,8 +1138,9 @@ async def websocket_interview(websocket: WebSocket, session_id: str):
             "type": "question",
             "data": {
                 "question": session["current_question"],
+                "competency": session["plan"].current.name,
                 "round": session["current_round"],
-                "total_rounds": session["config"]["rounds"]
+                "total_rounds": session["plan"].max_rounds
             }
         })
 
@@ -768,75 +1167,49 @@ async def websocket_interview(websocket: WebSocket, session_id: str):
                     "data": {"ai_state": "thinking"}
                 })
 
-                # Grade the answer
-                chain_manager = session["chain_manager"]
-                competency = session["competency"]
-                current_question = session["current_question"]
-
-                grade_output = chain_manager.grade_answer(
-                    current_question,
-                    answer,
-                    competency
-                )
-
-                followup = chain_manager.rewrite_followup(grade_output.followup_question)
-                band = band_from_score(grade_output.score)
-
-                # Store record
-                current_round = session["current_round"]
-                record = {
-                    "session_id": session_id,
-                    "round": current_round,
-                    "competency": competency.get("name", ""),
-                    "question": current_question,
-                    "answer": answer,
-                    "score": grade_output.score,
-                    "band": band,
-                    "justification": grade_output.justification,
-                    "followup_question": followup,
-                    "timestamp": datetime.now().isoformat()
-                }
-
-                output_path = pathlib.Path("data/training/evals.jsonl")
-                append_record(output_path, record)
-
-                # Update session
-                session["questions_asked"].append(current_question)
-                session["answers_received"].append(answer)
-                session["scores"].append(grade_output.score)
-
-                # Check if complete
-                total_rounds = session["config"]["rounds"]
-                is_complete = current_round >= total_rounds
-
-                if not is_complete:
-                    session_manager.update_session(session_id, {
-                        "current_question": followup,
-                        "current_round": current_round + 1
+                try:
+                    result = await answer_round(
+                        session_id,
+                        session,
+                        data.get("question"),
+                        answer,
+                        idempotency_key=data.get("idempotency_key"),
+                        round_num=data.get("round")
+                    )
+                except LLMOverloadedError as e:
+                    # Answer not consumed; the client resends it after retry_after
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": str(e),
+                        "retry_after": e.retry_after
                     })
-                else:
-                    session_manager.update_session(session_id, {
-                        "status": "completed"
+                    continue
+                except HTTPException as e:
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": e.detail
                     })
+                    continue
 
                 # Send grading result
                 await websocket.send_json({
                     "type": "grading",
                     "data": {
-                        "score": grade_output.score,
-                        "band": band,
-                        "justification": grade_output.justification
+                        "score": result["score"],
+                        "band": result["band"],
+                        "justification": result["justification"]
                     }
                 })
 
                 # Send next question or completion
-                if not is_complete:
+                if not result["is_complete"]:
                     await websocket.send_json({
                         "type": "question",
                         "data": {
-                            "question": followup,
-                            "round": current_round + 1,
-                            "total_rounds": total_rounds
+                            "question": result["next_question"],
+                            "competency": result["next_competency"],
+                            "round": result["round"],
+                            "total_rounds": result["total_rounds"]
                         }
                     })
                 else:
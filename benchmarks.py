@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-Python hot paths.
+
+Covers validate_theory_question, band_from_score, load_sample,
+select_competency, the builder's normalize/redact/map_to_evidence and the JSON
+encode in append_record, over seeded synthetic inputs at several sizes.
+
+Method (pyperf-style, stdlib only): each case is calibrated to run at least
+--min-time per repetition, then repeated --repeat times; the median time per
+item is reported. Results are saved as JSON so later runs can be compared with
+--baseline, failing when a case slows down by more than --threshold.
+
+Usage:
+  python benchmarks.py --out data/benchmarks/baseline.json
+  python benchmarks.py --max-size 1000000 --filter band --repeat 7
+  python benchmarks.py --baseline data/benchmarks/baseline.json --threshold 0.1
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import build_step1_jd_resume_jsonl as builder
+from new_llm_inter import band_from_score, load_sample, select_competency, validate_theory_question
+
+SIZES = (1, 1_000, 100_000, 1_000_000)
+DOC_SIZES = (1, 100, 10_000)  # map_to_evidence & co. cost up to ~1 ms per document
+
+# (name, sizes, setup(size, rng) -> zero-arg callable processing `size` items)
+BENCHMARKS: List[Tuple[str, Tuple[int, ...], Callable[[int, random.Random], Callable[[], Any]]]] = []
+CLEANUP: List[str] = []  # Temp files created by setups
+
+
+def benchmark(name: str, sizes: Tuple[int, ...] = SIZES) -> Callable:
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS.append((name, sizes, setup))
+        return setup
+    return register
+
+
+# ============================================================================
+# Synthetic Inputs
+# ============================================================================
+
+VOCAB = [term for terms in builder.COMPETENCIES.values() for term in terms]
+FILLER = (
+    "experience with building and operating reliable services for customers across teams using "
+    "modern tooling strong ownership of delivery mentoring engineers improving quality"
+).split()
+QUESTIONS = [
+    "What trade-offs matter most for Kubernetes in production?",
+    "How do you reason about failure modes in CI/CD pipelines?",
+    "Why does batch normalization speed up training?",
+    "Which monitoring signals would you prioritize for data pipelines?",
+    "Can you write a Python function that reverses a list?",
+    "Show the code for a tokenizer",
+    "What is caching and how does it reduce latency or cost?",
+    "Explain the architecture. What would you change?",
+    "How would you use def to define a helper()?",
+    "When should you prefer gradient boosting over random forests for tabular data?",
+]
+
+
+def make_document(rng: random.Random, words: int = 160) -> str:
+    """JD/resume-like text: vocabulary hits mixed with filler and occasional PII"""
+    out: List[str] = []
+    while len(out) < words:
+        out.append(rng.choice(VOCAB) if rng.random() < 0.25 else rng.choice(FILLER))
+        if rng.random() < 0.01:
+            out.append(f"jane.doe{rng.randint(1, 999)}@example.com")
+        if rng.random() < 0.01:
+            out.append(f"+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}")
+    text = " ".join(out)
+    return text[0].upper() + text[1:] + "."
+
+
+def make_record(rng: random.Random, round_num: int = 1) -> Dict[str, Any]:
+    score = round(rng.random(), 2)
+    return {
+        "round": round_num,
+        "competency": rng.choice(list(builder.COMPETENCIES)),
+        "question": rng.choice(QUESTIONS),
+        "answer": make_document(rng, rng.randint(20, 120)),
+        "score": score,
+        "band": band_from_score(score),
+        "justification": "Shows a clear grasp of the core idea; would benefit from concrete trade-offs.",
+        "followup_question": rng.choice(QUESTIONS),
+    }
+
+
+def make_rubric(rng: random.Random, competencies: int) -> Dict[str, Any]:
+    return {"competencies": [
+        {
+            "name": f"{rng.choice(list(builder.COMPETENCIES))}-{i}",
+            "weight": rng.random(),
+            "rubric_levels": [{"level": f"L{lv}", "description": "...", "indicators": [], "pitfalls": []} for lv in range(1, 5)],
+        }
+        for i in range(competencies)
+    ]}
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+@benchmark("validate_theory_question")
+def bench_validate(size: int, rng: random.Random) -> Callable[[], Any]:
+    questions = [rng.choice(QUESTIONS) for _ in range(size)]
+    return lambda: [validate_theory_question(q) for q in questions]
+
+
+@benchmark("band_from_score")
+def bench_band(size: int, rng: random.Random) -> Callable[[], Any]:
+    scores = [rng.random() for _ in range(size)]
+    return lambda: [band_from_score(s) for s in scores]
+
+
+@benchmark("load_sample")
+def bench_load_sample(size: int, rng: random.Random) -> Callable[[], Any]:
+    # One load of the last line of a `size`-record file (the worst case)
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for _ in range(size):
+            f.write(json.dumps({"jd": make_document(rng, 40), "resume": make_document(rng, 40)}) + "\n")
+    CLEANUP.append(path)
+    return lambda: load_sample(path, size - 1)
+
+
+@benchmark("select_competency", sizes=(1, 16, 256, 4096))
+def bench_select(size: int, rng: random.Random) -> Callable[[], Any]:
+    # Size is the number of competencies; looks up the last one by name, then by max weight
+    rubric = make_rubric(rng, size)
+    name = rubric["competencies"][-1]["name"].upper()
+    return lambda: (select_competency(rubric, name), select_competency(rubric))
+
+
+@benchmark("normalize", sizes=DOC_SIZES)
+def bench_normalize(size: int, rng: random.Random) -> Callable[[], Any]:
+    docs = [make_document(rng) for _ in range(size)]
+    return lambda: [builder.normalize(d) for d in docs]
+
+
+@benchmark("redact", sizes=DOC_SIZES)
+def bench_redact(size: int, rng: random.Random) -> Callable[[], Any]:
+    docs = [make_document(rng) for _ in range(size)]
+    return lambda: [builder.redact(d) for d in docs]
+
+
+@benchmark("map_to_evidence", sizes=DOC_SIZES)
+def bench_evidence(size: int, rng: random.Random) -> Callable[[], Any]:
+    pairs = [(make_document(rng), make_document(rng)) for _ in range(size)]
+    return lambda: [builder.map_to_evidence(jd, cv) for jd, cv in pairs]
+
+
+@benchmark("append_record_encode")
+def bench_encode(size: int, rng: random.Random) -> Callable[[], Any]:
+    # The json.dumps line of append_record; the file write is covered by the eval log
+    records = [make_record(rng, i % 5 + 1) for i in range(size)]
+    return lambda: [json.dumps(r, ensure_ascii=False) + "\n" for r in records]
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+def measure(fn: Callable[[], Any], min_time: float, repeat: int) -> List[float]:
+    """Seconds per call for each repetition, with loops calibrated to min_time"""
+    fn()  # Warm-up
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - started) / loops)
+    return runs
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, sizes, setup in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        for size in sizes:
+            if size > args.max_size:
+                continue
+            fn = setup(size, random.Random(f"{args.seed}:{name}:{size}"))
+            runs = measure(fn, args.min_time, args.repeat)
+            per_item = [r / size for r in runs]
+            key = f"{name}[{size}]"
+            results[key] = {
+                "benchmark": name,
+                "size": size,
+                "median_ns": round(statistics.median(per_item) * 1e9, 2),
+                "min_ns": round(min(per_item) * 1e9, 2),
+                "stdev_ns": round(statistics.stdev(per_item) * 1e9, 2) if len(per_item) > 1 else 0.0,
+                "runs": len(runs),
+            }
+            print(f"{key:40s} {results[key]['median_ns']:14,.1f} ns/item  (±{results[key]['stdev_ns']:,.1f})")
+    for path in CLEANUP:
+        os.unlink(path)
+    CLEANUP.clear()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "min_time": args.min_time,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Cases whose median slowed down by more than threshold (fraction)"""
+    problems = []
+    for key, cur in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or not base["median_ns"]:
+            continue
+        change = cur["median_ns"] / base["median_ns"] - 1
+        marker = "❌" if change > threshold else "✅"
+        print(f"{marker} {key:40s} {base['median_ns']:12,.1f} -> {cur['median_ns']:12,.1f} ns/item ({change:+.1%})")
+        if change > threshold:
+            problems.append(key)
+    return problems
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Microbenchmarks for the interview hot paths")
+    ap.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this")
+    ap.add_argument("--max-size", type=int, default=100_000, help="Skip sizes above this (1000000 for the full set)")
+    ap.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per repetition")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="Save results as JSON")
+    ap.add_argument("--baseline", default=None, help="Earlier results to compare against")
+    ap.add_argument("--threshold", type=float, default=0.1, help="Allowed fractional slowdown")
+    args = ap.parse_args()
+
+    report = run(args)
+
+    if args.out:
+        out = pathlib.Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved results to: {out}")
+
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8"))
+        problems = compare(report, baseline, args.threshold)
+        if problems:
+            print(f"❌ {len(problems)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
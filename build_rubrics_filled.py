@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Fill rubric skeletons: rubrics_skeleton.jsonl -> rubrics_filled.jsonl
+
+Every level of every competency has empty description/indicators/pitfalls slots.
+This pipeline fills them with one LLM call per (competency, level) using the same
+ChatOpenAI configuration as InterviewChainManager.
+
+- Streams the skeleton file; only a bounded window of rows is held in memory
+- Bounded-concurrency async LLM calls plus an optional requests-per-minute cap
+- Filled levels are cached by (competency, level, JD hash), so identical
+  competencies across pairs sharing a JD are filled once (also across runs)
+- Levels that fail are retried (--level-retries passes) before a row is written
+- Output rows are written in input order and the run resumes after the last
+  row already present in the output file; rows left with empty levels by an
+  earlier run are re-filled first, and rows still incomplete are reported
+
+Usage:
+  python build_rubrics_filled.py \
+    --input data/training/rubrics_skeleton.jsonl \
+    --output data/training/rubrics_filled.jsonl \
+    --concurrency 8 --rpm 30
+
+Requires:
+- .env with LLM_API_KEY, LLM_BASE_URL, LLM_MODEL (or pass flags)
+  (or --provider fake / LLM_PROVIDER=fake to run offline without a key)
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import math
+import os
+import pathlib
+import sys
+import time
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from new_llm_inter import LLM_PROVIDERS, InterviewChainManager
+
+DEFAULT_CACHE = "data/cache/rubric_levels.jsonl"
+LEVELS = ("L1", "L2", "L3", "L4")
+
+
+# ============================================================================
+# Hashing & Cache
+# ============================================================================
+
+def jd_hash(jd: str) -> str:
+    """Stable hash of a JD, insensitive to case and whitespace differences"""
+    norm = " ".join(jd.lower().split())
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()[:16]
+
+
+def level_cache_key(competency: str, level: str, jd_digest: str) -> str:
+    return f"{competency}|{level}|{jd_digest}"
+
+
+def level_is_filled(level: Dict[str, Any]) -> bool:
+    return bool(level.get("description")) and bool(level.get("indicators"))
+
+
+class RubricLevelCache:
+    """Append-only JSONL cache of filled levels keyed by (competency, level, JD hash)"""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Fills currently running, so concurrent rows wait instead of duplicating calls
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if path.exists():
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line from an interrupted run
+                    self.entries[obj["key"]] = obj["value"]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self.entries[key] = value
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+
+
+# ============================================================================
+# Skeleton Builder
+# ============================================================================
+
+def build_skeleton(
+    evidence: Dict[str, Dict[str, int]],
+    top_k: int = 4,
+    jd_weight: float = 0.7,
+    resume_weight: float = 0.3,
+) -> Dict[str, Any]:
+    """Build an empty rubric from evidence counts (same weighting as rubrics_skeleton.jsonl)
+
+    Competencies are ranked by jd_weight*jd + resume_weight*resume hits; the top-k
+    get softmax-normalized weights and four empty levels each.
+    """
+    scored = [
+        (name, jd_weight * counts.get("jd", 0) + resume_weight * counts.get("resume", 0))
+        for name, counts in evidence.items()
+    ]
+    scored = [item for item in scored if item[1] > 0]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    top = scored[:top_k]
+    if not top:
+        return {"competencies": []}
+
+    peak = top[0][1]
+    exps = [math.exp(score - peak) for _, score in top]
+    total = sum(exps)
+    return {
+        "competencies": [
+            {
+                "name": name,
+                "weight": round(e / total, 6),
+                "rubric_levels": [
+                    {"level": level, "description": "", "indicators": [], "pitfalls": []}
+                    for level in LEVELS
+                ],
+            }
+            for (name, _), e in zip(top, exps)
+        ]
+    }
+
+
+# ============================================================================
+# Rate Limiting
+# ============================================================================
+
+class RateLimiter:
+    """Spaces call starts so at most `rpm` calls begin per minute (0 = unlimited)"""
+
+    def __init__(self, rpm: int):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# ============================================================================
+# Filling
+# ============================================================================
+
+class RubricFiller:
+    """Fills skeleton rows concurrently while sharing work through the level cache"""
+
+    def __init__(
+        self,
+        chain_manager: InterviewChainManager,
+        cache: RubricLevelCache,
+        concurrency: int,
+        rpm: int,
+        level_retries: int = 2,
+    ):
+        self.chain_manager = chain_manager
+        self.level_retries = max(0, level_retries)
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.limiter = RateLimiter(rpm)
+        self.llm_calls = 0
+        self.failures = 0
+        self.waiting = 0  # Level fills queued behind the semaphore / rate limiter
+
+    async def _call_llm(self, jd: str, competency: str, level: str) -> Dict[str, Any]:
+        self.waiting += 1
+        queued = True
+        try:
+            async with self.semaphore:
+                await self.limiter.wait()
+                self.waiting -= 1
+                queued = False
+                self.llm_calls += 1
+                output = await self.chain_manager.afill_rubric_level(jd, competency, level)
+        finally:
+            if queued:
+                self.waiting -= 1
+        return {
+            "description": output.description,
+            "indicators": output.indicators,
+            "pitfalls": output.pitfalls,
+        }
+
+    async def fill_level(self, jd: str, jd_digest: str, competency: str, level: str) -> Optional[Dict[str, Any]]:
+        """Return filled slots for one level, or None if the LLM kept failing"""
+        key = level_cache_key(competency, level, jd_digest)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.hits += 1
+            return cached
+
+        pending = self.cache.in_flight.get(key)
+        if pending is not None:
+            self.cache.hits += 1
+            return await asyncio.shield(pending)
+
+        self.cache.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.cache.in_flight[key] = future
+        try:
+            value = await self._call_llm(jd, competency, level)
+            self.cache.put(key, value)
+        except asyncio.CancelledError:
+            future.set_result(None)  # Waiters see a failed fill, not our cancellation
+            raise
+        except Exception as e:
+            self.failures += 1
+            print(f"  Failed to fill {competency}/{level}: {e}")
+            value = None
+        finally:
+            del self.cache.in_flight[key]
+        future.set_result(value)
+        return value
+
+    def row_is_filled(self, row: Dict[str, Any]) -> bool:
+        return all(
+            level_is_filled(level)
+            for comp in row.get("rubric", {}).get("competencies", [])
+            for level in comp.get("rubric_levels", [])
+        )
+
+    async def fill_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill every empty level of every competency in one skeleton row
+
+        Failed levels are retried up to level_retries more times; a row can
+        still come back incomplete (check row_is_filled).
+        """
+        jd = row.get("jd", "")
+        digest = jd_hash(jd)
+
+        for _ in range(1 + self.level_retries):
+            jobs = []
+            for comp in row.get("rubric", {}).get("competencies", []):
+                for level in comp.get("rubric_levels", []):
+                    if not level_is_filled(level):
+                        jobs.append((level, self.fill_level(jd, digest, comp.get("name", ""), level.get("level", ""))))
+            if not jobs:
+                break
+
+            results = await asyncio.gather(*(job for _, job in jobs))
+            for (level, _), value in zip(jobs, results):
+                if value:
+                    level.update(value)
+        return row
+
+
+# ============================================================================
+# I/O Helpers
+# ============================================================================
+
+def load_output_rows(path: pathlib.Path) -> List[Dict[str, Any]]:
+    """Output rows that parse; a torn final line is truncated away"""
+    if not path.exists():
+        return []
+    rows = []
+    good_bytes = 0
+    with path.open("rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                rows.append(json.loads(raw))
+            except json.JSONDecodeError:
+                break
+            good_bytes += len(raw)
+    if good_bytes != path.stat().st_size:
+        with path.open("r+b") as f:
+            f.truncate(good_bytes)
+    return rows
+
+
+def rewrite_rows(path: pathlib.Path, rows: List[Dict[str, Any]]) -> None:
+    """Replace the output file atomically"""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+async def repair_rows(filler: RubricFiller, path: pathlib.Path, window: int) -> List[Dict[str, Any]]:
+    """Re-fill output rows an earlier run left with empty levels; returns all existing rows"""
+    rows = load_output_rows(path)
+    todo = [i for i, row in enumerate(rows) if not filler.row_is_filled(row)]
+    if not todo:
+        return rows
+    print(f"Re-filling {len(todo)} incomplete row(s) from an earlier run")
+    for start in range(0, len(todo), window):
+        batch = todo[start:start + window]
+        filled = await asyncio.gather(*(filler.fill_row(rows[i]) for i in batch))
+        for i, row in zip(batch, filled):
+            rows[i] = row
+    rewrite_rows(path, rows)
+    return rows
+
+
+def iter_skeleton_rows(path: pathlib.Path, skip: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with path.open("r", encoding="utf-8") as f:
+        idx = 0
+        for line in f:
+            if not line.strip():
+                continue
+            if idx >= skip:
+                yield idx, json.loads(line)
+            idx += 1
+
+
+async def run_pipeline(
+    filler: RubricFiller,
+    input_path: pathlib.Path,
+    output_path: pathlib.Path,
+    window: int,
+) -> Tuple[int, int, List[int]]:
+    """Fill rows with at most `window` rows in flight, writing them in input order
+
+    Returns (rows already present, rows written, indices of rows still incomplete).
+    """
+    existing = await repair_rows(filler, output_path, window)
+    skip = len(existing)
+    if skip:
+        print(f"Resuming after {skip} row(s)")
+    incomplete = [i for i, row in enumerate(existing) if not filler.row_is_filled(row)]
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pending: Deque[asyncio.Task] = collections.deque()
+    written = 0
+
+    with output_path.open("a", encoding="utf-8") as out:
+        async def flush_head() -> None:
+            nonlocal written
+            row = await pending.popleft()
+            if not filler.row_is_filled(row):
+                incomplete.append(skip + written)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            written += 1
+
+        for _, row in iter_skeleton_rows(input_path, skip):
+            pending.append(asyncio.create_task(filler.fill_row(row)))
+            if len(pending) >= window:
+                await flush_head()
+        while pending:
+            await flush_head()
+
+    return skip, written, incomplete
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    """Main entry point for rubric filling"""
+    parser = argparse.ArgumentParser(description="Fill rubric skeletons with LLM-written levels")
+    parser.add_argument("--input", default="data/training/rubrics_skeleton.jsonl", help="Path to rubrics_skeleton.jsonl")
+    parser.add_argument("--output", default="data/training/rubrics_filled.jsonl", help="Path to rubrics_filled.jsonl")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Filled-level cache (JSONL)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max concurrent LLM calls")
+    parser.add_argument("--rpm", type=int, default=0, help="Max LLM calls started per minute (0 = unlimited)")
+    parser.add_argument("--window", type=int, default=32, help="Max skeleton rows in flight")
+    parser.add_argument("--level-retries", type=int, default=2, help="Extra passes over a row's failed levels")
+    parser.add_argument("--model", default=os.getenv("LLM_MODEL", "llama-3.3-70b-versatile"), help="LLM model name")
+    parser.add_argument("--base-url", default=os.getenv("LLM_BASE_URL", None), help="LLM API base URL")
+    parser.add_argument("--api-key", default=os.getenv("LLM_API_KEY", None), help="LLM API key")
+    parser.add_argument(
+        "--provider", choices=LLM_PROVIDERS, default=os.getenv("LLM_PROVIDER", "openai"),
+        help="LLM backend; 'fake' runs offline without a key"
+    )
+
+    args = parser.parse_args()
+
+    if not args.api_key and args.provider != "fake":
+        print("Error: LLM_API_KEY not found in environment or arguments")
+        sys.exit(1)
+
+    input_path = pathlib.Path(args.input)
+    if not input_path.exists():
+        print(f"Error: Input file '{args.input}' not found")
+        sys.exit(1)
+
+    chain_manager = InterviewChainManager(
+        model_name=args.model,
+        api_key=args.api_key,
+        base_url=args.base_url,
+        provider=args.provider,
+    )
+    cache = RubricLevelCache(pathlib.Path(args.cache))
+
+    async def run() -> Tuple[int, int, List[int]]:
+        filler = RubricFiller(chain_manager, cache, args.concurrency, args.rpm, args.level_retries)
+        result = await run_pipeline(filler, input_path, pathlib.Path(args.output), max(1, args.window))
+        print(f"LLM calls: {filler.llm_calls}  failed levels: {filler.failures}")
+        return result
+
+    started = time.perf_counter()
+    skipped, written, incomplete = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    print(f"Filled {written} row(s) → {args.output} (skipped {skipped} already done) in {elapsed:.1f}s")
+    if incomplete:
+        print(f"⚠️ {len(incomplete)} row(s) still have empty levels (re-run to retry): {incomplete[:20]}")
+    print(f"Level cache: {cache.hits} hit(s), {cache.misses} miss(es), {len(cache.entries)} entries in {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
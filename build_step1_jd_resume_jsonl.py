@@ -141,6 +141,12 @@ def normalize(text: str) -> str:
     return text
 
 
+# Literal first token of each compiled pattern; every match must start with it,
+# so count_hits can jump between str.find() candidates instead of scanning the
+# whole text once per pattern (the leading lookbehind defeats re's prefix search)
+PATTERN_LITERALS: Dict[re.Pattern, str] = {}
+
+
 def compile_vocab_patterns(vocab: List[str]) -> List[re.Pattern]:
     pats: List[re.Pattern] = []
     for term in vocab:
@@ -154,7 +160,9 @@ def compile_vocab_patterns(vocab: List[str]) -> List[re.Pattern]:
             pattern = rf"(?<![a-z0-9]){escaped}(?![a-z0-9])"
         else:
             pattern = re.escape(term)
-        pats.append(re.compile(pattern))
+        compiled = re.compile(pattern)
+        PATTERN_LITERALS[compiled] = term.split(" ")[0]
+        pats.append(compiled)
     return pats
 
 # Pre-compile for speed
@@ -163,8 +171,25 @@ COMP_PATTERNS: Dict[str, List[re.Pattern]] = {
 }
 
 
+def count_pattern(text: str, pattern: re.Pattern) -> int:
+    # Same non-overlapping count as len(pattern.findall(text))
+    literal = PATTERN_LITERALS.get(pattern)
+    if not literal:
+        return len(pattern.findall(text))
+    hits = 0
+    pos = text.find(literal)
+    while pos != -1:
+        m = pattern.match(text, pos)
+        if m:
+            hits += 1
+            pos = text.find(literal, m.end())
+        else:
+            pos = text.find(literal, pos + 1)
+    return hits
+
+
 def count_hits(text: str, patterns: List[re.Pattern]) -> int:
-    return sum(len(p.findall(text)) for p in patterns)
+    return sum(count_pattern(text, p) for p in patterns)
 
 
 # ----------------------------------------------------------
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Condensed JD/resume context for question generation.
+
+Question prompts used to carry jd[:800] and resume[:800]: the cut landed
+mid-sentence, often dropped the requirements that matter, and the same text
+was re-sent for every question. Instead each JD/CV pair is digested once:
+
+- key skills: terms from build_step1's competency taxonomy found in each
+  document, grouped by competency (the same matcher that builds `evidence`)
+- requirements: the JD sentences with the most skill hits
+- experience and projects: the resume sentences with the most skill hits
+
+Digests are cached by a content hash of the pair, so every question for a
+sample reuses one digest. render_document() puts the sentences about the
+target competency first and stays within a character budget per document.
+Documents already within the budget are sent as they are; documents without
+taxonomy hits fall back to their leading whole sentences.
+
+Knobs (env):
+  QUESTION_CONTEXT=digest   (raw = the old 800-character truncation)
+  QUESTION_CONTEXT_CHARS=600  per document in the rendered prompt
+
+Usage (print the rendered context of a sample):
+  python context_digest.py --input data/training/rubrics_filled.jsonl --sample-idx 0 --competency GenAI
+"""
+
+from __future__ import annotations
+import argparse
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import re
+from typing import Any, Dict, List, Optional
+
+from build_step1_jd_resume_jsonl import COMP_PATTERNS, COMPETENCIES, count_pattern, normalize
+
+DEFAULT_BUDGET = 600
+TOP_SENTENCES = 8
+MAX_SENTENCE_CHARS = 200
+MAX_SKILL_GROUPS = 3
+MAX_SKILLS_PER_GROUP = 5
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\s*\n+\s*|\s+[•·▪]\s+")
+BULLET_CHARS = " \t-*•·▪\"'"
+
+# (term, compiled pattern) per competency, in taxonomy order
+VOCAB_PATTERNS = {comp: list(zip(COMPETENCIES[comp], COMP_PATTERNS[comp])) for comp in COMP_PATTERNS}
+
+
+def content_key(jd: str, resume: str) -> str:
+    """Content hash of the raw JD + resume pair"""
+    h = hashlib.sha256()
+    h.update(jd.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(resume.encode("utf-8"))
+    return h.hexdigest()
+
+
+def clip(text: str, limit: int) -> str:
+    """Cut at a word boundary, marking the cut"""
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for part in SENTENCE_SPLIT.split(text or ""):
+        part = part.strip(BULLET_CHARS)
+        if len(part.split()) >= 3:
+            sentences.append(clip(part, MAX_SENTENCE_CHARS))
+    return sentences
+
+
+def skill_hits(text: str) -> Dict[str, List[str]]:
+    """competency -> taxonomy terms found in text"""
+    norm = normalize(text)
+    hits = {}
+    for comp, terms in VOCAB_PATTERNS.items():
+        found = [term for term, pattern in terms if count_pattern(norm, pattern)]
+        if found:
+            hits[comp] = found
+    return hits
+
+
+# ============================================================================
+# Digest
+# ============================================================================
+
+def digest_document(text: str, top: int = TOP_SENTENCES) -> Dict[str, Any]:
+    """Skills plus the `top` most skill-dense sentences of one document"""
+    sentences = []
+    for pos, sentence in enumerate(split_sentences(text)):
+        hits = skill_hits(sentence)
+        sentences.append({
+            "text": sentence,
+            "competencies": sorted(hits),
+            "hits": sum(len(terms) for terms in hits.values()),
+            "pos": pos,
+        })
+    ranked = sorted((s for s in sentences if s["hits"]), key=lambda s: (-s["hits"], s["pos"]))[:top]
+    text = (text or "").strip()
+    return {
+        "skills": skill_hits(text),
+        "sentences": ranked or sentences[:top],
+        "short_text": text if len(text) <= MAX_SENTENCE_CHARS * 5 else None,  # Small enough to send whole
+    }
+
+
+def build_digest(jd: str, resume: str, top: int = TOP_SENTENCES) -> Dict[str, Any]:
+    return {"jd": digest_document(jd, top), "resume": digest_document(resume, top)}
+
+
+def render_document(doc: Dict[str, Any], heading: str, competency: Optional[str] = None,
+                    budget: int = DEFAULT_BUDGET) -> str:
+    """Prompt text for one digested document, target competency first, about `budget` characters"""
+    if doc["short_text"] is not None and len(doc["short_text"]) <= budget:
+        return doc["short_text"]
+    skills = doc["skills"]
+    groups = sorted(skills, key=lambda c: (c != competency, -len(skills[c])))[:MAX_SKILL_GROUPS]
+    lines = []
+    if groups:
+        lines.append("Key skills: " + "; ".join(
+            f"{c}: {', '.join(skills[c][:MAX_SKILLS_PER_GROUP])}" for c in groups
+        ))
+    lines.append(f"{heading}:")
+    used = sum(len(line) + 1 for line in lines)
+    for sentence in sorted(doc["sentences"], key=lambda s: competency not in s["competencies"]):
+        line = f"- {sentence['text']}"
+        if used + len(line) + 1 > budget and len(lines) > 1 + bool(groups):
+            continue
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+class DigestCache:
+    """In-memory LRU of digests keyed by content_key; each pair is digested once"""
+
+    def __init__(self, budget: int = DEFAULT_BUDGET, max_entries: int = 1024):
+        self.budget = budget
+        self.max_entries = max_entries
+        self._digests: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["DigestCache"]:
+        """None when QUESTION_CONTEXT=raw"""
+        if os.getenv("QUESTION_CONTEXT", "digest").lower() == "raw":
+            return None
+        return cls(budget=int(os.getenv("QUESTION_CONTEXT_CHARS", str(DEFAULT_BUDGET))))
+
+    def get(self, jd: str, resume: str) -> Dict[str, Any]:
+        key = content_key(jd, resume)
+        digest = self._digests.get(key)
+        if digest is not None:
+            self.hits += 1
+            self._digests.move_to_end(key)
+            return digest
+        self.misses += 1
+        digest = self._digests[key] = build_digest(jd, resume)
+        while len(self._digests) > self.max_entries:
+            self._digests.popitem(last=False)
+        return digest
+
+    def context(self, jd: str, resume: str, competency: Optional[str] = None) -> Dict[str, str]:
+        """{"jd", "resume"} prompt text for a question about `competency`"""
+        digest = self.get(jd, resume)
+        return {
+            "jd": render_document(digest["jd"], "Requirements", competency, self.budget),
+            "resume": render_document(digest["resume"], "Experience and projects", competency, self.budget),
+        }
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Show the condensed question context of a JD/resume sample")
+    ap.add_argument("--input", default="data/training/rubrics_filled.jsonl")
+    ap.add_argument("--sample-idx", type=int, default=0)
+    ap.add_argument("--competency", default=None)
+    ap.add_argument("--budget", type=int, default=DEFAULT_BUDGET)
+    args = ap.parse_args()
+
+    lines = pathlib.Path(args.input).read_text(encoding="utf-8").splitlines()
+    sample = json.loads(lines[args.sample_idx])
+    context = DigestCache(budget=args.budget).context(sample["jd"], sample["resume"], args.competency)
+    raw = len(sample["jd"][:800]) + len(sample["resume"][:800])
+    print(f"JD:\n{context['jd']}\n\nResume:\n{context['resume']}\n")
+    print(f"{len(context['jd']) + len(context['resume'])} chars (raw truncation: {raw})")
+
+
+if __name__ == "__main__":
+    main()
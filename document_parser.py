@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+CV / JD document parsing backed by the build_step1 competency matcher.
+
+- Text extraction for PDF (pypdf, optional), DOCX (stdlib zip/xml) and plain text
+- Competency hits via the precompiled COMP_PATTERNS from build_step1_jd_resume_jsonl
+- Extraction + matching run in a process pool, so the event loop never parses
+- Results are cached in memory by content hash (LRU)
+
+Usage (CLI, handy for checking a file):
+  python document_parser.py path/to/cv.pdf --kind cv
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Optional
+from xml.etree import ElementTree
+
+from build_step1_jd_resume_jsonl import COMP_PATTERNS, count_hits, normalize
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+class DocumentParseError(ValueError):
+    """Raised when an uploaded document cannot be turned into text"""
+
+
+# ============================================================================
+# Text Extraction
+# ============================================================================
+
+DOCX_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def extract_pdf_text(data: bytes) -> str:
+    if PdfReader is None:
+        raise DocumentParseError("PDF support requires: pip install pypdf")
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        raise DocumentParseError(f"Unreadable PDF: {e}")
+
+
+def extract_docx_text(data: bytes) -> str:
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            xml = zf.read("word/document.xml")
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise DocumentParseError(f"Unreadable DOCX: {e}")
+
+    paragraphs: List[str] = []
+    for para in ElementTree.fromstring(xml).iter(f"{DOCX_NS}p"):
+        text = "".join(node.text or "" for node in para.iter(f"{DOCX_NS}t"))
+        if text:
+            paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+
+def extract_text(data: bytes, filename: str = "") -> str:
+    """Pick an extractor by magic bytes first, file extension second"""
+    name = (filename or "").lower()
+    if data.startswith(b"%PDF") or name.endswith(".pdf"):
+        return extract_pdf_text(data)
+    if data.startswith(b"PK\x03\x04") and (name.endswith(".docx") or not name):
+        return extract_docx_text(data)
+    if name.endswith(".doc"):
+        raise DocumentParseError("Legacy .doc files are not supported; upload PDF, DOCX or text")
+    return data.decode("utf-8", errors="replace")
+
+
+# ============================================================================
+# Field Extraction
+# ============================================================================
+
+YEARS_RE = re.compile(r"(\d{1,2})\s*(?:\+|plus)?\s*(?:-|to|–)?\s*(\d{1,2})?\s*\+?\s*(?:years?|yrs?)", re.I)
+# Highest degree first. B.E/M.E only count dotted or as upper-case "BE"/"ME"
+# followed by "in"/"(" or ",": the bare words "be"/"me" are ordinary English
+EDUCATION_LEVELS = [
+    ("PhD", re.compile(r"(?i:\b(?:ph\.?\s?d|doctorate)\b)")),
+    ("Master's", re.compile(
+        r"(?i:\b(?:master'?s\b|masters?\s+of\b|m\.?\s?tech\b|m\.?\s?sc\b|m\.\s?e\b\.?))|\bME\b(?=\s*(?:in\b|\(|,))"
+    )),
+    ("MBA", re.compile(r"(?i:\bmba\b)")),
+    ("Bachelor's", re.compile(
+        r"(?i:\b(?:bachelor'?s?\b|b\.?\s?tech\b|b\.?\s?sc\b|b\.\s?e\b\.?))|\bBE\b(?=\s*(?:in\b|\(|,))"
+    )),
+    ("Diploma", re.compile(r"(?i:\bdiploma\b)")),
+]
+
+# In a title line the level word alone names the role ("Team Lead", "Sr. Engineer").
+# In body text "lead"/"manager" are usually someone else ("work with the team
+# lead"), so only "a/an <level> <role>" phrases count there.
+ROLE_NOUN = r"(?:engineer|developer|scientist|architect|analyst|consultant|designer|programmer|specialist)s?"
+ROLE_LEVELS = [
+    ("Principal",
+     re.compile(r"\b(principal|staff|architect)\b", re.I),
+     re.compile(rf"\ban?\s+(?:(?:principal|staff)\s+(?:(?!of\b)[\w/+#.-]+\s+){{0,2}}?{ROLE_NOUN}|(?:[\w-]+\s+)?architect)\b", re.I)),
+    ("Lead",
+     re.compile(r"\b(lead|manager|head of)\b", re.I),
+     re.compile(
+         rf"\ban?\s+(?:(?:tech(?:nical)?|team|engineering)\s+lead|lead\s+(?:(?!of\b)[\w/+#.-]+\s+){{0,2}}?{ROLE_NOUN}"
+         r"|(?:engineering|development|software)\s+manager|head of)\b", re.I)),
+    ("Senior",
+     re.compile(r"\b(senior|sr\.?)(?!\w)", re.I),
+     re.compile(r"\ban?\s+(?:senior|sr\.?)\s", re.I)),
+    ("Junior",
+     re.compile(r"\b(junior|jr\.?|entry[\s-]level|graduate|intern)\b", re.I),
+     re.compile(rf"\ban?\s+(?:junior|jr\.?|entry[\s-]level|graduate\s+{ROLE_NOUN}|intern)\b|\binternship\b", re.I)),
+]
+TITLE_LINE_RE = re.compile(r"^\s*(?:job\s+title|title|position|role)\s*[:\-]", re.I)
+# Where a title's role ends: "Senior Engineer reporting to the manager", "Engineering Manager - Payments"
+TITLE_TAIL_RE = re.compile(r"\s+(?:reporting|working|with|to|for|at|in)\s.*$|\s+[-–|(].*$|,.*$", re.I)
+
+
+def match_competencies(text: str) -> Dict[str, int]:
+    """Hit counts per competency for one document (same matcher as map_to_evidence)"""
+    norm = normalize(text)
+    return {comp: count_hits(norm, pats) for comp, pats in COMP_PATTERNS.items()}
+
+
+def ranked_skills(hits: Dict[str, int]) -> List[str]:
+    return [comp for comp, n in sorted(hits.items(), key=lambda kv: kv[1], reverse=True) if n > 0]
+
+
+def extract_years(text: str) -> Optional[Dict[str, int]]:
+    """Smallest and largest year counts mentioned, e.g. '3-5 years' -> {min: 3, max: 5}"""
+    values: List[int] = []
+    for m in YEARS_RE.finditer(text):
+        values.extend(int(g) for g in m.groups() if g)
+    values = [v for v in values if 0 < v <= 40]
+    if not values:
+        return None
+    return {"min": min(values), "max": max(values)}
+
+
+def extract_education(text: str) -> Optional[str]:
+    """Highest degree mentioned anywhere in the text"""
+    for label, pattern in EDUCATION_LEVELS:
+        if pattern.search(text):
+            return label
+    return None
+
+
+def title_lines(text: str) -> List[str]:
+    """The first line if it reads as a heading (short, not a sentence), plus "Title:"/"Position:" lines"""
+    lines = [line.strip().lstrip("#").strip() for line in text.splitlines() if line.strip()]
+    titles = [TITLE_LINE_RE.sub("", line) for line in lines if TITLE_LINE_RE.match(line)]
+    if lines and not TITLE_LINE_RE.match(lines[0]) and len(lines[0].split()) <= 10 and not lines[0].endswith((".", "!", "?")):
+        titles.insert(0, lines[0])
+    return [TITLE_TAIL_RE.sub("", title) for title in titles]
+
+
+def extract_role_level(text: str) -> str:
+    """Level from the title line(s) first, then from "a/an <level> <role>" phrases in the body"""
+    titles = "\n".join(title_lines(text))
+    for label, title_pattern, _ in ROLE_LEVELS:
+        if title_pattern.search(titles):
+            return label
+    for label, _, body_pattern in ROLE_LEVELS:
+        if body_pattern.search(text):
+            return label
+    return "Mid"
+
+
+def parse_document(data: bytes, filename: str, kind: str) -> Dict[str, Any]:
+    """Extract text and match competencies; runs inside the worker pool"""
+    started = time.perf_counter()
+    text = extract_text(data, filename)
+    if not text.strip():
+        raise DocumentParseError("No text could be extracted from the document")
+
+    hits = match_competencies(text)
+    years = extract_years(text)
+    result: Dict[str, Any] = {
+        "text": text,
+        "evidence": {comp: n for comp, n in hits.items() if n > 0},
+        "skills": ranked_skills(hits),
+        "years": years,
+    }
+    if kind == "cv":
+        result["education"] = extract_education(text)
+    else:
+        result["role_level"] = extract_role_level(text)
+    result["parse_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+# ============================================================================
+# Async Parser with Worker Pool + Cache
+# ============================================================================
+
+class DocumentParser:
+    """Runs parse_document in a process pool and caches results by content hash"""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_entries: int = 512):
+        self.max_workers = max_workers
+        self.cache_entries = cache_entries
+        self._cache: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self._executor: Optional[concurrent.futures.Executor] = None
+
+    def start(self) -> None:
+        """Create the worker pool and import the matcher in each worker up front"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            # Warm the workers so the first upload doesn't pay process spawn + regex compile
+            workers = self.max_workers or os.cpu_count() or 1
+            for _ in range(workers):
+                self._executor.submit(match_competencies, "")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run another CPU-bound, picklable function (e.g. evidence matching) in the worker pool"""
+        self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def parse(self, data: bytes, filename: str, kind: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        """Parse a document, reusing the cached result for identical content"""
+        key = f"{kind}:{digest or self.content_hash(data)}"
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, parse_document, data, filename, kind)
+
+        self._cache[key] = result
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return result
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse a CV/JD file and print matched competencies")
+    ap.add_argument("path", help="PDF, DOCX or text file")
+    ap.add_argument("--kind", choices=["cv", "jd"], default="cv")
+    args = ap.parse_args()
+
+    with open(args.path, "rb") as f:
+        data = f.read()
+    result = parse_document(data, os.path.basename(args.path), args.kind)
+    result["text"] = f"<{len(result['text'])} chars>"
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
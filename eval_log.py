@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Segmented, compressed, rotating evaluation log.
+
+Layout (default data/training/evals/):
+  seg-000001.jsonl.zst   closed segment (zstd if `zstandard` is installed, else .gz)
+  seg-000001.idx.json    sidecar: record count, session_ids, competencies, time range
+  seg-000002.jsonl       active segment (plain JSONL, appended by AsyncRecordWriter)
+
+- The active segment rotates when it exceeds max_bytes or max_age seconds
+- Closed segments are compressed in a background thread, so the writer never
+  waits on compression
+- Readers consult the sidecar indexes and only open segments that can contain
+  the requested session_ids / time range
+
+The log is a record_writer sink (open/write/fsync/close).
+
+Usage:
+  python eval_log.py import data/training/evals.jsonl    # one-time migration
+  python eval_log.py stats
+  python eval_log.py query --session-id session_20251018_023806_148670
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import io
+import json
+import os
+import pathlib
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_LOG_DIR = "data/training/evals"
+LEGACY_EVALS_PATH = "data/training/evals.jsonl"
+SEGMENT_RE = re.compile(r"^seg-(\d{6})\.jsonl(\.gz|\.zst)?$")
+
+
+def _open_segment_text(path: pathlib.Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} needs: pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def _parse_lines(f: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue  # Partially written tail of the active segment
+
+
+def iter_segment(path: pathlib.Path) -> Iterator[Dict[str, Any]]:
+    """Records of one segment file; partially written lines are skipped"""
+    with _open_segment_text(path) as f:
+        yield from _parse_lines(f)
+
+
+class _SegmentIndex:
+    """Summary of one segment used to skip it during queries"""
+
+    def __init__(self):
+        self.records = 0
+        self.session_ids: Set[str] = set()
+        self.competencies: Set[str] = set()
+        self.min_ts: Optional[str] = None
+        self.max_ts: Optional[str] = None
+
+    def update(self, record: Dict[str, Any]) -> None:
+        self.records += 1
+        self.session_ids.add(str(record.get("session_id", "unknown")))
+        if record.get("competency"):
+            self.competencies.add(str(record["competency"]))
+        ts = record.get("timestamp")
+        if ts:
+            # ISO-8601 strings from datetime.isoformat() sort chronologically
+            if self.min_ts is None or ts < self.min_ts:
+                self.min_ts = ts
+            if self.max_ts is None or ts > self.max_ts:
+                self.max_ts = ts
+
+    def to_dict(self, file: str) -> Dict[str, Any]:
+        return {
+            "file": file,
+            "records": self.records,
+            "session_ids": sorted(self.session_ids),
+            "competencies": sorted(self.competencies),
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+        }
+
+
+def _index_matches(
+    idx: Dict[str, Any],
+    session_ids: Optional[Set[str]],
+    since: Optional[str],
+    until: Optional[str],
+) -> bool:
+    if session_ids is not None and not session_ids.intersection(idx.get("session_ids", [])):
+        return False
+    if since and idx.get("max_ts") and idx["max_ts"] < since:
+        return False
+    if until and idx.get("min_ts") and idx["min_ts"] > until + "\uffff":
+        return False
+    return True
+
+
+class SegmentedEvalLog:
+    """Rotating JSONL segments with compressed history and sidecar indexes"""
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_LOG_DIR,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_age: float = 24 * 3600,
+        codec: Optional[str] = None,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.codec = codec or ("zst" if zstandard is not None else "gz")
+
+        self._lock = threading.RLock()
+        self._file = None
+        self._active_seq = 0
+        self._active_index = _SegmentIndex()
+        self._active_opened = 0.0
+        self._active_bytes = 0
+        self._compressors: List[threading.Thread] = []
+
+    # ------------------------------------------------------------------
+    # Segment bookkeeping
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, seq: int, suffix: str = "") -> pathlib.Path:
+        return self.directory / f"seg-{seq:06d}.jsonl{suffix}"
+
+    def _index_path(self, seq: int) -> pathlib.Path:
+        return self.directory / f"seg-{seq:06d}.idx.json"
+
+    def _segments(self) -> Dict[int, pathlib.Path]:
+        """Newest file per sequence number (compressed beats plain)"""
+        found: Dict[int, pathlib.Path] = {}
+        if not self.directory.exists():
+            return found
+        for path in self.directory.iterdir():
+            m = SEGMENT_RE.match(path.name)
+            if not m:
+                continue
+            seq = int(m.group(1))
+            if seq not in found or m.group(2):
+                found[seq] = path
+        return found
+
+    def _load_index(self, seq: int) -> Optional[Dict[str, Any]]:
+        path = self._index_path(seq)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_index(self, seq: int, index: Dict[str, Any]) -> None:
+        tmp = self._index_path(seq).with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._index_path(seq))
+
+    @staticmethod
+    def _scan_index(path: pathlib.Path) -> _SegmentIndex:
+        index = _SegmentIndex()
+        for record in iter_segment(path):
+            index.update(record)
+        return index
+
+    def segment_files(self) -> List[Tuple[int, pathlib.Path, Optional[Dict[str, Any]]]]:
+        """(seq, path, sidecar index) per segment, oldest first; the index is None while a segment is open"""
+        with self._lock:
+            return [(seq, path, self._load_index(seq)) for seq, path in sorted(self._segments().items())]
+
+    # ------------------------------------------------------------------
+    # Sink interface (called from AsyncRecordWriter's worker thread)
+    # ------------------------------------------------------------------
+
+    def open(self) -> None:
+        """Resume the last active segment or start a new one; finish interrupted compressions"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            segments = self._segments()
+            for seq, path in sorted(segments.items()):
+                if path.suffix == ".jsonl" and self._index_path(seq).exists():
+                    self._start_compression(seq)  # Closed but never compressed
+
+            last = max(segments, default=0)
+            last_path = segments.get(last)
+            if last_path is not None and last_path.suffix == ".jsonl" and not self._index_path(last).exists():
+                self._active_seq = last
+                self._active_index = self._scan_index(last_path)
+                self._active_opened = last_path.stat().st_mtime
+            else:
+                self._active_seq = last + 1
+                self._active_index = _SegmentIndex()
+                self._active_opened = time.time()
+            path = self._segment_path(self._active_seq)
+            self._file = path.open("a", encoding="utf-8")
+            self._active_bytes = path.stat().st_size
+
+    def write(self, data: str, records: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if self._active_bytes and (
+                self._active_bytes + len(data) > self.max_bytes
+                or time.time() - self._active_opened > self.max_age
+            ):
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._active_bytes += len(data.encode("utf-8"))
+            for record in records:
+                self._active_index.update(record)
+
+    def fsync(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the active segment (left uncompressed; resumed by the next open)"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        for thread in self._compressors:
+            thread.join()
+        self._compressors = []
+
+    def _rotate(self) -> None:
+        self._file.close()
+        seq = self._active_seq
+        self._write_index(seq, self._active_index.to_dict(self._segment_path(seq).name))
+        self._start_compression(seq)
+
+        self._active_seq = seq + 1
+        self._active_index = _SegmentIndex()
+        self._active_opened = time.time()
+        self._active_bytes = 0
+        self._file = self._segment_path(self._active_seq).open("a", encoding="utf-8")
+
+    def _start_compression(self, seq: int) -> None:
+        thread = threading.Thread(target=self._compress, args=(seq,), daemon=True)
+        thread.start()
+        self._compressors = [t for t in self._compressors if t.is_alive()] + [thread]
+
+    def _compress(self, seq: int) -> None:
+        src = self._segment_path(seq)
+        dst = self._segment_path(seq, f".{self.codec}")
+        tmp = dst.with_name(dst.name + ".tmp")
+        try:
+            with src.open("rb") as fin, tmp.open("wb") as fout:
+                if self.codec == "zst":
+                    zstandard.ZstdCompressor(level=10).copy_stream(fin, fout)
+                else:
+                    with gzip.GzipFile(fileobj=fout, mode="wb", compresslevel=6) as gz:
+                        while True:
+                            chunk = fin.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            gz.write(chunk)
+            with self._lock:
+                os.replace(tmp, dst)
+                index = self._load_index(seq) or {}
+                index.update({"file": dst.name, "raw_bytes": src.stat().st_size, "bytes": dst.stat().st_size})
+                self._write_index(seq, index)
+                src.unlink()
+        except OSError as e:
+            print(f"⚠️ Could not compress {src.name}: {e}")
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def iter_records(
+        self,
+        session_ids: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Records in write order, opening only segments whose index can match
+
+        until is an inclusive prefix bound, as in session_summaries: "2025-10-01"
+        covers that whole day.
+        """
+        wanted = set(session_ids) if session_ids is not None else None
+        with self._lock:
+            segments = sorted(self._segments().items())
+            active_seq = self._active_seq if self._file is not None else None
+            active_index = self._active_index.to_dict("") if active_seq is not None else None
+
+        for seq, path in segments:
+            index = active_index if seq == active_seq else self._load_index(seq)
+            if index is not None and not _index_matches(index, wanted, since, until):
+                continue
+            for record in self.read_segment(seq, path):
+                if wanted is not None and record.get("session_id") not in wanted:
+                    continue
+                ts = record.get("timestamp") or ""
+                if (since and ts < since) or (until and ts > until + "\uffff"):
+                    continue
+                yield record
+
+    def read_segment(self, seq: int, path: pathlib.Path) -> Iterator[Dict[str, Any]]:
+        """Records of one listed segment, following it if it was compressed meanwhile"""
+        try:
+            f = _open_segment_text(path)
+        except FileNotFoundError:
+            index = self._load_index(seq) or {}
+            f = _open_segment_text(self.directory / index.get("file", path.name))
+        with f:
+            yield from _parse_lines(f)
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self._segments()
+        total_bytes = sum(p.stat().st_size for p in segments.values())
+        raw_bytes = 0
+        records = 0
+        for seq, path in segments.items():
+            index = self._load_index(seq)
+            if index:
+                raw_bytes += index.get("raw_bytes", path.stat().st_size)
+                records += index.get("records", 0)
+            else:
+                raw_bytes += path.stat().st_size
+                records += self._active_index.records if seq == self._active_seq else 0
+        return {"segments": len(segments), "records": records, "bytes": total_bytes, "raw_bytes": raw_bytes}
+
+    def import_jsonl(self, path: pathlib.Path, batch: int = 5000) -> int:
+        """Append an existing JSONL file (e.g. the legacy evals.jsonl) to the log"""
+        opened_here = self._file is None
+        if opened_here:
+            self.open()
+        count = 0
+        lines: List[str] = []
+        records: List[Dict[str, Any]] = []
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                lines.append(line if line.endswith("\n") else line + "\n")
+                if len(lines) >= batch:
+                    self.write("".join(lines), records)
+                    count += len(lines)
+                    lines, records = [], []
+        if lines:
+            self.write("".join(lines), records)
+            count += len(lines)
+        if opened_here:
+            self.close()
+        return count
+
+
+# ============================================================================
+# Readers
+# ============================================================================
+
+def iter_eval_records(
+    log_dir: Optional[str] = None,
+    legacy: Optional[str] = LEGACY_EVALS_PATH,
+) -> Iterator[Dict[str, Any]]:
+    """Every eval record: the segmented log, or the legacy JSONL while the log is still empty
+
+    The backend imports the legacy file into an empty log on first start, so
+    reading both once the log has records would count them twice.
+    """
+    log = SegmentedEvalLog(log_dir or os.getenv("EVAL_LOG_DIR", DEFAULT_LOG_DIR))
+    if log.segment_files():
+        yield from log.iter_records()
+        return
+    if legacy and pathlib.Path(legacy).exists():
+        with pathlib.Path(legacy).open("r", encoding="utf-8") as f:
+            yield from _parse_lines(f)
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Segmented evaluation log tools")
+    ap.add_argument("--dir", default=os.getenv("EVAL_LOG_DIR", DEFAULT_LOG_DIR), help="Log directory")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    imp = sub.add_parser("import", help="Append a JSONL file to the log")
+    imp.add_argument("path")
+
+    sub.add_parser("stats", help="Show segment count, records and disk usage")
+
+    q = sub.add_parser("query", help="Print records for a session / time range")
+    q.add_argument("--session-id", action="append", default=None)
+    q.add_argument("--since", default=None, help="ISO timestamp lower bound")
+    q.add_argument("--until", default=None, help="ISO timestamp upper bound (inclusive prefix)")
+
+    args = ap.parse_args()
+    log = SegmentedEvalLog(args.dir)
+
+    if args.cmd == "import":
+        n = log.import_jsonl(pathlib.Path(args.path))
+        print(f"Imported {n} record(s) into {args.dir}")
+    elif args.cmd == "stats":
+        print(json.dumps(log.stats(), indent=2))
+    else:
+        started = time.perf_counter()
+        n = 0
+        for record in log.iter_records(args.session_id, args.since, args.until):
+            print(json.dumps(record, ensure_ascii=False))
+            n += 1
+        print(f"{n} record(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
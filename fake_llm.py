@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Deterministic offline chat model for InterviewChainManager.
+
+Selected with LLM_PROVIDER=fake (or --provider fake). Each chain gets a model
+for its role and answers with schema-valid JSON for that chain's parser:
+
+  question -> QuestionOutput     grader -> GradeOutput
+  rewrite  -> RewrittenQuestion  rubric -> RubricLevelOutput
+
+Outputs are seeded from the prompt text and how often that prompt was seen, so
+a replayed run produces the same questions, scores and failures.
+
+Knobs (env):
+  FAKE_LLM_LATENCY_MS      "0" | "120" | "uniform:50:300" | "lognormal:200:0.6" | "exp:150"
+  FAKE_LLM_FAILURE_RATE    fraction of calls raising FakeLLMError (like an HTTP 5xx)
+  FAKE_LLM_MALFORMED_RATE  fraction of calls returning unparsable / schema-violating output
+                           (with response_format JSON mode only schema violations remain)
+  FAKE_LLM_SEED            changes every generated output
+
+Usage (sample a few outputs per role):
+  python fake_llm.py --role grader -n 3
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+ROLES = ("question", "grader", "rewrite", "rubric")
+
+ASPECTS = [
+    "trade-offs", "failure modes", "evaluation metrics", "scaling limits", "security risks",
+    "design choices", "performance bottlenecks", "monitoring signals", "data quality issues", "cost drivers",
+]
+CONTEXTS = [
+    "in production", "for large datasets", "under strict latency budgets",
+    "for regulated workloads", "during migrations", "across many teams",
+]
+STEMS = [
+    "What {aspect} matter most for {competency} {context}?",
+    "How do you reason about {aspect} in {competency} {context}?",
+    "Which {aspect} would you prioritize for {competency} {context}?",
+]
+# Dropped when picking a rewrite topic, so the result never asks for code
+REWRITE_STOPWORDS = {
+    "show", "write", "code", "implement", "create", "build", "design", "provide", "give", "snippet",
+    "function", "what", "which", "would", "could", "should", "your", "about", "explain", "describe",
+    "does", "this", "that", "with", "from", "when", "where", "there", "have",
+}
+LEVEL_NAMES = {"L1": "basic awareness", "L2": "practical experience", "L3": "advanced expertise", "L4": "expert leadership"}
+
+
+class FakeLLMError(RuntimeError):
+    """Simulated provider failure (timeouts, 5xx, rate limits)"""
+
+
+class LatencyModel:
+    """Parses a latency spec and samples delays in seconds"""
+
+    def __init__(self, spec: str = "0"):
+        self.spec = spec.strip() or "0"
+        kind, _, rest = self.spec.partition(":")
+        if not rest:
+            kind, rest = "fixed", kind
+        self.kind = kind
+        self.params = [float(p) for p in rest.split(":") if p]
+        if kind not in ("fixed", "uniform", "lognormal", "exp"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "lognormal":
+            ms = p[0] * math.exp(rng.gauss(0, p[1] if len(p) > 1 else 0.5))  # p[0] is the median
+        else:
+            ms = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, ms) / 1000
+
+
+# System-prompt fingerprints of the InterviewChainManager chains
+ROLE_MARKERS = (
+    ("You write hiring rubrics", "rubric"),
+    ("You rewrite follow-up questions", "rewrite"),
+    ("You are a fair and encouraging grader", "grader"),
+)
+
+
+def detect_role(prompt: str) -> str:
+    """Which chain a raw prompt came from (used by the HTTP stub server)"""
+    for marker, role in ROLE_MARKERS:
+        if marker in prompt:
+            return role
+    return "question"
+
+
+def _grab(pattern: str, text: str, default: str = "") -> str:
+    m = re.search(pattern, text, re.S)
+    return m.group(1).strip() if m else default
+
+
+class FakeInterviewChatModel(BaseChatModel):
+    """Chat model that fabricates plausible, schema-valid interview JSON locally"""
+
+    role: str = "question"
+    latency: str = "0"
+    failure_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: int = 0
+
+    _seen: Dict[int, int] = PrivateAttr(default_factory=dict)
+    _latency: Optional[LatencyModel] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_env(cls, role: str) -> "FakeInterviewChatModel":
+        return cls(
+            role=role,
+            latency=os.getenv("FAKE_LLM_LATENCY_MS", "0"),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+            malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-interview"
+
+    def _rng(self, prompt: str) -> random.Random:
+        """Seeded by (seed, prompt, n-th time this prompt was seen) so retries differ"""
+        key = zlib.crc32(prompt.encode("utf-8"))
+        if len(self._seen) > 50000:
+            self._seen.clear()
+        n = self._seen.get(key, 0)
+        self._seen[key] = n + 1
+        return random.Random(f"{self.seed}:{self.role}:{key}:{n}")
+
+    def _plan(self, messages: List[BaseMessage]) -> Tuple[str, random.Random, float]:
+        prompt = "\n".join(str(m.content) for m in messages)
+        rng = self._rng(prompt)
+        if self._latency is None:
+            self._latency = LatencyModel(self.latency)
+        return prompt, rng, self._latency.sample(rng)
+
+    def complete(self, prompt: str, json_mode: bool = False) -> Tuple[Optional[str], float]:
+        """(response text, simulated latency in seconds) without sleeping; text is None for a simulated failure"""
+        _, rng, delay = self._plan([AIMessage(content=prompt)])
+        try:
+            return self._respond(prompt, rng, json_mode), delay
+        except FakeLLMError:
+            return None, delay
+
+    def _respond(self, prompt: str, rng: random.Random, json_mode: bool = False) -> str:
+        roll = rng.random()
+        if roll < self.failure_rate:
+            raise FakeLLMError(f"Simulated provider error ({self.role})")
+        answer = json.dumps(getattr(self, f"_{self.role}")(prompt, rng), ensure_ascii=False)
+        if roll < self.failure_rate + self.malformed_rate:
+            return self._malformed(answer, rng, json_mode)
+        return answer
+
+    # ------------------------------------------------------------------
+    # Per-role outputs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _make_question(competency: str, rng: random.Random) -> str:
+        return rng.choice(STEMS).format(
+            aspect=rng.choice(ASPECTS),
+            competency=competency or "this area",
+            context=rng.choice(CONTEXTS),
+        )
+
+    def _question(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        competency = _grab(r"Target competency: ([^\n]+)", prompt)
+        return {
+            "question": self._make_question(competency, rng),
+            "difficulty": rng.choice(["L1", "L2", "L2", "L3", "L3", "L4"]),
+            "competency": competency,
+            "rationale": "Probes reasoning about real-world constraints",
+        }
+
+    def _grader(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        answer = _grab(r"Candidate answer:\n(.*?)(?:\n\n(?:Grade the answer|Local pre-score)|$)", prompt)
+        question = _grab(r"Question asked: ([^\n]+)", prompt)
+        competency = _grab(r'"name":\s*"([^"]+)"', prompt)
+        words = re.findall(r"[a-z0-9]+", answer.lower())
+        q_words = set(re.findall(r"[a-z0-9]{4,}", question.lower()))
+        overlap = len(q_words.intersection(words)) / len(q_words) if q_words else 0.0
+        score = 0.2 + 0.5 * min(1.0, len(words) / 60) + 0.25 * overlap + rng.uniform(-0.05, 0.05)
+        score = round(min(1.0, max(0.0, score)), 2)
+        strength = "clear grasp of the core idea" if score >= 0.6 else "some relevant awareness"
+        return {
+            "score": score,
+            "justification": f"Shows {strength}; would benefit from concrete trade-offs.",
+            "followup_question": self._make_question(competency, rng),
+        }
+
+    def _rewrite(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        original = _grab(r"Original follow-up: ([^\n]+)", prompt)
+        words = [w for w in re.findall(r"[A-Za-z][A-Za-z-]{3,}", original) if w.lower() not in REWRITE_STOPWORDS]
+        topic = " ".join(words[:2]) or "this approach"
+        return {"question": self._make_question(topic, rng)}
+
+    def _rubric(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        competency = _grab(r"Competency: ([^\n]+)", prompt, "the competency")
+        level = _grab(r"Level: (L[1-4])", prompt, "L2")
+        aspects = rng.sample(ASPECTS, 6)
+        return {
+            "description": f"{LEVEL_NAMES[level].capitalize()} of {competency} as required by the JD.",
+            "indicators": [f"Explains {a} in {competency}" for a in aspects[:4]],
+            "pitfalls": [f"Overlooks {a}" for a in aspects[4:]],
+        }
+
+    @staticmethod
+    def _malformed(answer: str, rng: random.Random, json_mode: bool = False) -> str:
+        """A bad completion; JSON mode (response_format) rules out the free-text failures"""
+        bad = rng.choice([
+            '{"score": 1.7, "justification": "", "followup_question": ""}',
+            '{"unexpected": true}',
+            "Sure! Here is a great question for you.",
+            '{"question": "Explain the architecture", "difficulty": "L9"',
+            f"```json\n{answer}\n```",  # Right answer, fenced
+            f"Here is the JSON:\n{answer[:-1]},}}",  # Right answer, chatty with a trailing comma
+        ])
+        if json_mode and not bad.startswith('{"'):
+            return answer
+        return bad
+
+    # ------------------------------------------------------------------
+    # BaseChatModel hooks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _result(prompt: str, content: str) -> ChatResult:
+        # ~4 characters per token, so usage accounting works offline too
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt, rng, delay = self._plan(messages)
+        if delay:
+            time.sleep(delay)
+        content = self._respond(prompt, rng, "response_format" in kwargs)
+        return self._result(prompt, content)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt, rng, delay = self._plan(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        content = self._respond(prompt, rng, "response_format" in kwargs)
+        return self._result(prompt, content)
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Print sample outputs of the offline fake LLM")
+    ap.add_argument("--role", choices=ROLES, default="question")
+    ap.add_argument("-n", type=int, default=3)
+    args = ap.parse_args()
+
+    model = FakeInterviewChatModel.from_env(args.role)
+    prompts = {
+        "question": "Target competency: GenAI\n",
+        "grader": 'Rubric fragment: {"name": "GenAI"}\nQuestion asked: What limits diffusion models?\n\n'
+                  "Candidate answer:\nSampling is slow because diffusion needs many denoising steps.\n\nGrade the answer",
+        "rewrite": "Original follow-up: Show the code for a tokenizer\n",
+        "rubric": "Competency: GenAI\nLevel: L3\n",
+    }
+    for _ in range(args.n):
+        print(model.invoke(prompts[args.role]).content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Multi-competency interview plans with prefetched questions.
+
+A session covers the top-k weighted competencies of the rubric (k=1 is the
+single-competency interview). At start the opening questions of all k
+competencies are generated concurrently; rounds then rotate across the
+competencies still in play:
+
+  round 1: A opening   round 2: B opening   round 3: A follow-up   ...
+
+After an answer is graded, the follow-up rewrite for its competency runs in
+the background while the candidate answers the next competency's question,
+so with k >= 2 the next question is normally ready as soon as the grade is.
+Each competency has its own StoppingRule (`rounds` per competency, adaptive
+early stop per competency); the interview ends when every competency is done.
+
+Knobs (env):
+  INTERVIEW_COMPETENCIES=1   competencies per session when the request does not say
+
+Usage (offline: time the round-to-round path of a k-competency interview):
+  python interview_plan.py --competencies 3 --rounds 2
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from llm_admission import LLMOverloadedError
+from metrics import Counter
+from new_llm_inter import (
+    InterviewChainManager,
+    QuestionOutput,
+    StoppingRule,
+    rubric_fragment,
+    select_competencies,
+)
+
+QUESTION_PREFETCH = Counter(
+    "question_prefetch_total", "Next questions by readiness when their round came (ready, waited, fallback)", ["outcome"]
+)
+
+
+def competency_count(requested: Optional[int] = None) -> int:
+    return max(1, requested or int(os.getenv("INTERVIEW_COMPETENCIES", "1")))
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """Prefetches that are never awaited (session abandoned) must not log 'exception never retrieved'"""
+    if not task.cancelled():
+        task.exception()
+
+
+class CompetencyTrack:
+    """One competency of a plan: its rubric, stopping rule, scores and next question"""
+
+    def __init__(self, competency: Dict[str, Any], stopping: StoppingRule):
+        self.competency = competency
+        self.name = competency.get("name", "")
+        self.rubric_fragment = rubric_fragment(competency)  # Serialized once: a stable grader prompt prefix
+        self.stopping = stopping
+        self.scores: List[float] = []
+        self.done = False
+        self.pending: Optional[asyncio.Task] = None  # Opening question or rewritten follow-up
+        self.fallback: Optional[str] = None  # The grader's follow-up, if its rewrite fails
+
+
+class InterviewPlan:
+    """Round-robin schedule over competency tracks, one question prefetched per track"""
+
+    def __init__(
+        self,
+        chain_manager: InterviewChainManager,
+        sample: Dict[str, Any],
+        competencies: List[Dict[str, Any]],
+        rounds: int,
+        session_key: str = "default",
+        session_dedup: Optional[Any] = None,
+        adaptive: Optional[bool] = None,
+        min_rounds: Optional[int] = None,
+    ):
+        self.chain_manager = chain_manager
+        self.jd = sample.get("jd", "")
+        self.resume = sample.get("resume", "")
+        self.session_key = session_key
+        self.session_dedup = session_dedup
+        self.tracks = [CompetencyTrack(c, StoppingRule.from_env(rounds, adaptive, min_rounds)) for c in competencies]
+        self.cursor = 0
+
+    @classmethod
+    def for_sample(
+        cls,
+        chain_manager: InterviewChainManager,
+        sample: Dict[str, Any],
+        rounds: int,
+        count: Optional[int] = None,
+        competency_name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "InterviewPlan":
+        """Plan over the top-`count` competencies of the sample's rubric (INTERVIEW_COMPETENCIES by default)"""
+        competencies = select_competencies(sample.get("rubric", {}), competency_count(count), competency_name)
+        return cls(chain_manager, sample, competencies, rounds, **kwargs)
+
+    @property
+    def current(self) -> CompetencyTrack:
+        """The track whose question is being answered"""
+        return self.tracks[self.cursor]
+
+    @property
+    def max_rounds(self) -> int:
+        return sum(t.stopping.max_rounds for t in self.tracks)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.tracks[0].stopping.adaptive
+
+    @property
+    def scores(self) -> Dict[str, List[float]]:
+        return {t.name: list(t.scores) for t in self.tracks}
+
+    def _spawn(self, track: CompetencyTrack, coro: Any) -> None:
+        if track.pending is not None:
+            track.pending.cancel()
+        track.pending = asyncio.create_task(coro)
+        track.pending.add_done_callback(_consume_exception)
+
+    def _opening(self, track: CompetencyTrack) -> Any:
+        return self.chain_manager.agenerate_question(
+            self.jd,
+            self.resume,
+            track.name,
+            session_dedup=self.session_dedup,
+            session_key=self.session_key,
+        )
+
+    async def start(self) -> QuestionOutput:
+        """Generate every track's opening question concurrently; return the first one"""
+        for track in self.tracks:
+            self._spawn(track, self._opening(track))
+        first = self.tracks[0]
+        try:
+            output = await first.pending
+        except BaseException:
+            self.close()
+            raise
+        first.pending = None
+        return output
+
+    async def _take(self, track: CompetencyTrack) -> str:
+        """The track's next question: its prefetch if that succeeded, else a usable substitute"""
+        task, track.pending = track.pending, None
+        if task is not None:
+            QUESTION_PREFETCH.labels("ready" if task.done() else "waited").inc()
+            try:
+                output: Union[str, QuestionOutput] = await asyncio.shield(task)
+                return output if isinstance(output, str) else output.question
+            except LLMOverloadedError:
+                raise  # Includes CircuitOpenError: a 503 with Retry-After, the round stays open
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # This request was cancelled, not the prefetch
+                print(f"  Prefetch for {track.name} was cancelled")
+            except Exception as e:
+                print(f"  Prefetch for {track.name} failed: {type(e).__name__}: {e}")
+        QUESTION_PREFETCH.labels("fallback").inc()
+        if track.fallback is not None:
+            # The grader's raw follow-up, unvalidated: same checks as a rewrite, else the canned question
+            return self.chain_manager.checked_followup(track.fallback, self.session_dedup)
+        return (await self._opening(track)).question
+
+    def _next_index(self, current_done: bool) -> Optional[int]:
+        n = len(self.tracks)
+        for step in range(1, n + 1):
+            i = (self.cursor + step) % n
+            if not (self.tracks[i].done or (i == self.cursor and current_done)):
+                return i
+        return None
+
+    async def advance(self, score: float, followup: str) -> Optional[str]:
+        """Record the current track's score and return the next question (None: the interview is over)
+
+        Plan state changes only once the next question is in hand, so a
+        failure here (e.g. a 503) leaves the round open to be answered again.
+        """
+        track = self.current
+        done = track.stopping.should_stop(track.scores + [score])
+        if not done:
+            track.fallback = followup
+            self._spawn(track, self.chain_manager.arewrite_followup(
+                followup, self.session_dedup, session_key=self.session_key
+            ))
+        nxt = self._next_index(done)
+        question = await self._take(self.tracks[nxt]) if nxt is not None else None
+
+        track.scores.append(score)
+        track.done = done
+        if nxt is not None:
+            self.cursor = nxt
+        return question
+
+    def close(self) -> None:
+        """Cancel outstanding prefetches"""
+        for track in self.tracks:
+            if track.pending is not None:
+                track.pending.cancel()
+                track.pending = None
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+async def simulate(sample: Dict[str, Any], competencies: int, rounds: int, think_s: float) -> None:
+    """Answer every round with a canned answer after `think_s` seconds; time the wait for each next question"""
+    chain_manager = InterviewChainManager(model_name="fake", api_key=None, provider="fake")
+    plan = InterviewPlan.for_sample(chain_manager, sample, rounds, competencies)
+
+    started = time.perf_counter()
+    question = (await plan.start()).question
+    print(f"start: {time.perf_counter() - started:.3f}s  [{plan.current.name}] {question}")
+    waits = []
+    while question is not None:
+        await asyncio.sleep(think_s)  # The candidate answering
+        track = plan.current
+        answer = f"{track.name} relies on clear abstractions, trade-offs between cost and latency, and testing."
+        grade = await chain_manager.agrade_answer(question, answer, track.rubric_fragment)
+        started = time.perf_counter()
+        question = await plan.advance(grade.score, grade.followup_question)
+        waits.append(time.perf_counter() - started)
+        if question is not None:
+            print(f"next: {waits[-1]:.3f}s  [{plan.current.name}] {question}")
+    print(f"\n{len(waits)} rounds, mean wait for the next question {sum(waits) / len(waits):.3f}s")
+    print(json.dumps(plan.scores, indent=2))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulate a multi-competency interview plan on the fake LLM")
+    ap.add_argument("--input", default="data/training/rubrics_filled.jsonl")
+    ap.add_argument("--sample-idx", type=int, default=0)
+    ap.add_argument("--competencies", type=int, default=3)
+    ap.add_argument("--rounds", type=int, default=2, help="Rounds per competency")
+    ap.add_argument("--think-s", type=float, default=1.0, help="Simulated answering time per round")
+    args = ap.parse_args()
+
+    lines = pathlib.Path(args.input).read_text(encoding="utf-8").splitlines()
+    sample = json.loads(lines[args.sample_idx])
+    asyncio.run(simulate(sample, args.competencies, args.rounds, args.think_s))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Global admission control for LLM calls.
+
+Every async chain call in InterviewChainManager passes through one
+AdmissionController shared by all sessions:
+
+- At most `max_in_flight` calls run at once
+- Optional requests-per-minute and (estimated) tokens-per-minute budgets,
+  refilled continuously
+- Waiters queue per session key and are admitted round-robin across keys, so a
+  client hammering one session cannot starve the others
+- A call that cannot start within `queue_timeout` (or arrives to a full queue,
+  or while the provider is rate limiting us) raises LLMOverloadedError with a
+  Retry-After hint, which the API turns into a 503 instead of a fallback answer
+
+In front of admission, SingleFlight coalesces identical concurrent calls
+(same chain, model setup and normalized input, from any session): the first
+caller runs the call, later callers await the same task and get the same
+result or error. Client retries of a slow answer submission and sessions
+started together on one sample then cost one LLM call, not one per request.
+
+Knobs (env):
+  LLM_MAX_IN_FLIGHT=16  LLM_RPM=0  LLM_TPM=0  LLM_QUEUE_TIMEOUT_S=10  LLM_MAX_QUEUED=256
+  (0 disables the RPM/TPM budgets)
+  LLM_SINGLE_FLIGHT=true
+"""
+
+from __future__ import annotations
+import asyncio
+import collections
+import contextlib
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from metrics import LLM_ADMISSION_REJECTED, LLM_SINGLE_FLIGHT, STAGE_SECONDS
+
+T = TypeVar("T")
+
+# Rough completion size added to the prompt estimate when charging the TPM budget
+EXPECTED_COMPLETION_TOKENS = 300
+
+
+class LLMOverloadedError(RuntimeError):
+    """LLM capacity exhausted; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def estimate_tokens(inputs: Any) -> int:
+    """Cheap token estimate (~4 characters per token) of a chain's input dict"""
+    if isinstance(inputs, dict):
+        chars = sum(len(str(v)) for v in inputs.values())
+    else:
+        chars = len(str(inputs))
+    return chars // 4 + EXPECTED_COMPLETION_TOKENS
+
+
+class _Budget:
+    """Token bucket holding up to `per_minute` units, refilled continuously (0 = unlimited)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+
+class AdmissionController:
+    """Bounds concurrent LLM calls and per-minute budgets with fair per-session queueing"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        rpm: int = 0,
+        tpm: int = 0,
+        queue_timeout: float = 10.0,
+        max_queued: int = 256,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_timeout = queue_timeout
+        self.max_queued = max_queued
+        self.requests = _Budget(rpm)
+        self.tokens = _Budget(tpm)
+
+        self.in_flight = 0
+        self.queued = 0
+        self._waiters: Dict[str, Deque[Tuple[asyncio.Future, int]]] = {}
+        self._ring: "collections.OrderedDict[str, None]" = collections.OrderedDict()  # Keys with waiters
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._avg_call = 1.0  # EWMA of call duration, for Retry-After hints
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "16")),
+            rpm=int(os.getenv("LLM_RPM", "0")),
+            tpm=int(os.getenv("LLM_TPM", "0")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_S", "10")),
+            max_queued=int(os.getenv("LLM_MAX_QUEUED", "256")),
+        )
+
+    def retry_after(self) -> float:
+        """Rough seconds until a newly queued call would start"""
+        backlog = (self.queued + 1) / self.max_in_flight * self._avg_call
+        return max(backlog, self._paused_until - time.monotonic())
+
+    def penalize(self, seconds: float) -> None:
+        """Hold all admissions for `seconds` (the provider answered 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._schedule(seconds)
+
+    def _reject(self, reason: str, message: str) -> LLMOverloadedError:
+        LLM_ADMISSION_REJECTED.labels(reason).inc()
+        return LLMOverloadedError(message, self.retry_after())
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(max(delay, 0.001), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters round-robin across session keys while capacity and budget allow"""
+        while self._ring and self.in_flight < self.max_in_flight:
+            now = time.monotonic()
+            key = next(iter(self._ring))
+            queue = self._waiters[key]
+            future, tokens = queue[0]
+            if future.done():  # Timed out or cancelled
+                queue.popleft()
+            else:
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now),
+                )
+                if wait > 0:
+                    self._schedule(wait)
+                    return
+                queue.popleft()
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                self.in_flight += 1
+                self.queued -= 1
+                future.set_result(None)
+
+            self._ring.move_to_end(key)
+            if not queue:
+                del self._ring[key], self._waiters[key]
+
+    def _release(self, elapsed: float) -> None:
+        self.in_flight -= 1
+        self._avg_call = 0.8 * self._avg_call + 0.2 * elapsed
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: str, tokens: int = 0) -> AsyncIterator[None]:
+        """Hold one LLM slot for `key` (a session id) for the duration of the block"""
+        if self.queued >= self.max_queued:
+            raise self._reject("queue_full", "LLM queue is full")
+        if self._paused_until > time.monotonic():
+            raise self._reject("rate_limited", "LLM provider is rate limiting requests")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, collections.deque()).append((future, tokens))
+        self._ring.setdefault(key, None)
+        self.queued += 1
+        queued_at = time.monotonic()
+        self._dispatch()
+
+        try:
+            done, _ = await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(0.0)  # Admitted just as the caller went away
+            else:
+                future.cancel()
+                self.queued -= 1
+            raise
+        if not done:
+            future.cancel()
+            self.queued -= 1
+            raise self._reject("queue_timeout", f"No LLM capacity within {self.queue_timeout:g}s")
+
+        started = time.monotonic()
+        STAGE_SECONDS.labels("llm_admission_wait").observe(started - queued_at)
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+
+# ============================================================================
+# Single-flight
+# ============================================================================
+
+def flight_key(chain: str, scope: str, inputs: Dict[str, Any]) -> str:
+    """Hash of a chain call: chain, model setup and input with whitespace-normalized strings"""
+    normalized = {k: " ".join(v.split()) if isinstance(v, str) else v for k, v in inputs.items()}
+    payload = json.dumps([chain, scope, normalized], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight task"""
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["SingleFlight"]:
+        """None when LLM_SINGLE_FLIGHT is off"""
+        if os.getenv("LLM_SINGLE_FLIGHT", "true").lower() in ("0", "false", "no", "off"):
+            return None
+        return cls()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _land(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved even if every caller went away
+
+    async def do(self, key: str, chain: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn() once per key at a time; callers arriving meanwhile share its outcome"""
+        task = self._flights.get(key)
+        if task is None:
+            LLM_SINGLE_FLIGHT.labels(chain, "leader").inc()
+            task = self._flights[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._land(key, t))
+        else:
+            LLM_SINGLE_FLIGHT.labels(chain, "coalesced").inc()
+        # Shielded: one caller going away must not cancel the call for the others
+        return await asyncio.shield(task)
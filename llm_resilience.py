@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Resilience policy around LLM chain calls: deadlines, retries, circuit breaking.
+
+- Every attempt runs under a timeout, and all attempts of one call share an
+  overall deadline, so a hung provider connection cannot hold a request
+  indefinitely
+- Transient failures (timeouts, connection errors, 5xx, 429) are retried
+  with exponential backoff and full jitter, while the deadline allows
+- One CircuitBreaker per model endpoint, shared by all sessions: once at least
+  `failure_threshold` attempts in the last `window` seconds failed transiently
+  and they make up `failure_ratio` of that window, the breaker opens and calls
+  fail fast with CircuitOpenError (a 503 with Retry-After) until a single
+  probe call succeeds after `reset_timeout`. Judging a ratio over time (not a
+  run of consecutive failures) keeps a partial outage from tripping it by
+  chance at high concurrency
+
+Parse/validation errors mean the provider answered, so they are neither
+retried here nor counted against the breaker.
+
+Knobs (env):
+  LLM_CALL_TIMEOUT_S=20  LLM_DEADLINE_S=45  LLM_RETRY_ATTEMPTS=3
+  LLM_RETRY_BASE_S=0.5   LLM_RETRY_MAX_S=8
+  LLM_BREAKER_FAILURES=5  LLM_BREAKER_RATIO=0.5  LLM_BREAKER_WINDOW_S=10  LLM_BREAKER_RESET_S=30
+"""
+
+from __future__ import annotations
+import asyncio
+import collections
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from llm_admission import LLMOverloadedError
+from metrics import Counter, Gauge
+
+try:
+    import openai
+    _OPENAI_TRANSIENT: tuple = (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+    _OPENAI_RATE_LIMIT: tuple = (openai.RateLimitError,)
+except ImportError:
+    _OPENAI_TRANSIENT = _OPENAI_RATE_LIMIT = ()
+
+try:
+    from fake_llm import FakeLLMError
+except ImportError:
+    FakeLLMError = ConnectionError
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+LLM_CALL_FAILURES = Counter(
+    "llm_call_failures_total", "Failed LLM call attempts by kind (timeout, transient, circuit_open)", ["kind"]
+)
+LLM_CIRCUIT_STATE = Gauge("llm_circuit_state", "Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)", ["breaker"])
+
+
+class CircuitOpenError(LLMOverloadedError):
+    """The provider endpoint is failing; calls are refused until the breaker probes again"""
+
+
+def is_rate_limit(exc: BaseException) -> bool:
+    return isinstance(exc, _OPENAI_RATE_LIMIT)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Failures worth retrying: the provider did not produce an answer"""
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, FakeLLMError)
+                      + _OPENAI_TRANSIENT + _OPENAI_RATE_LIMIT)
+
+
+def retry_after_header(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# ============================================================================
+# Circuit Breaker
+# ============================================================================
+
+class CircuitBreaker:
+    """Rolling-window failure-ratio breaker with a single half-open probe"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        failure_ratio: float = 0.5,
+        window: float = 10.0,
+        reset_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.failure_ratio = failure_ratio
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.window = window
+        self.outcomes: collections.deque = collections.deque()  # (time, failed) within the window
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()  # The CLI path calls from worker threads too
+        LLM_CIRCUIT_STATE.set_function(lambda: (CLOSED, HALF_OPEN, OPEN).index(self.state), name)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the provider now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        LLM_CALL_FAILURES.labels("circuit_open").inc()
+        raise CircuitOpenError(f"LLM endpoint {self.name} is unavailable", max(remaining, 1.0))
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        self.outcomes.append((now, failed))
+        self.failures += failed
+        while self.outcomes[0][0] < now - self.window:
+            self.failures -= self.outcomes.popleft()[1]
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._probing = False
+            if self.state != CLOSED:
+                print(f"✅ Circuit {self.name} closed")
+                self.outcomes.clear()
+                self.failures = 0
+            self.state = CLOSED
+            self._record(False)
+
+    def abandon(self) -> None:
+        """The call ended without telling us anything about the endpoint (cancelled, shed)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._record(True)
+            self._probing = False
+            failures = self.failures
+            if self.state == HALF_OPEN or (
+                failures >= self.failure_threshold and failures >= self.failure_ratio * len(self.outcomes)
+            ):
+                if self.state != OPEN:
+                    print(f"⚠️ Circuit {self.name} opened after {failures}/{len(self.outcomes)} failed calls")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap: Dict[str, Any] = {"state": self.state, "recent_failures": self.failures, "recent_calls": len(self.outcomes)}
+        if self.state == OPEN:
+            snap["retry_in_s"] = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 1)
+        return snap
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Shared breaker for one model endpoint (created on first use from env settings)"""
+    with _BREAKERS_LOCK:
+        breaker = BREAKERS.get(name)
+        if breaker is None:
+            breaker = BREAKERS[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                failure_ratio=float(os.getenv("LLM_BREAKER_RATIO", "0.5")),
+                window=float(os.getenv("LLM_BREAKER_WINDOW_S", "10")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET_S", "30")),
+            )
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.snapshot() for name, breaker in list(BREAKERS.items())}
+
+
+# ============================================================================
+# Retry Policy
+# ============================================================================
+
+class RetryPolicy:
+    """Per-attempt timeout, overall deadline and jittered exponential backoff"""
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        call_timeout: float = 20.0,
+        deadline: float = 45.0,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+    ):
+        self.attempts = max(1, attempts)
+        self.call_timeout = call_timeout
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "3")),
+            call_timeout=float(os.getenv("LLM_CALL_TIMEOUT_S", "20")),
+            deadline=float(os.getenv("LLM_DEADLINE_S", "45")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_S", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_S", "8")),
+        )
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based); honours Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        hinted = retry_after_header(exc)
+        return max(delay, hinted) if hinted is not None else delay
+
+    def attempt_timeout(self, give_up_at: float) -> float:
+        """Timeout for an attempt starting now (at least 0.5s, so queueing never counts as a provider timeout)"""
+        return max(0.5, min(self.call_timeout, give_up_at - time.monotonic()))
+
+    def _next_delay(self, attempt: int, exc: BaseException, give_up_at: float, breaker: CircuitBreaker) -> Optional[float]:
+        """Delay before the next attempt, or None to give up and re-raise"""
+        LLM_CALL_FAILURES.labels("timeout" if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) else "transient").inc()
+        if not is_rate_limit(exc):
+            breaker.record_failure()
+        if attempt >= self.attempts:
+            return None
+        delay = self.backoff(attempt, exc)
+        # Leave room for at least a short attempt after sleeping
+        if time.monotonic() + delay + min(1.0, self.call_timeout) > give_up_at:
+            return None
+        return delay
+
+    async def acall(self, fn: Callable[[float], Awaitable[T]], breaker: CircuitBreaker) -> T:
+        """Await fn(give_up_at) under the policy, once per attempt
+
+        fn bounds its own provider call with attempt_timeout(give_up_at), so time
+        spent waiting for admission is not mistaken for a provider timeout.
+        """
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                result = await fn(give_up_at)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as e:
+                if isinstance(e, LLMOverloadedError):
+                    breaker.abandon()
+                    raise
+                if not is_transient(e):
+                    breaker.record_success()  # The endpoint answered (e.g. unparsable output)
+                    raise
+                delay = self._next_delay(attempt, e, give_up_at, breaker)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    def call(self, fn: Callable[[], T], breaker: CircuitBreaker) -> T:
+        """Blocking variant for the CLI; the per-attempt timeout is enforced by the client"""
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                result = fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    breaker.abandon()
+                    raise
+                if not is_transient(e):
+                    breaker.record_success()
+                    raise
+                delay = self._next_delay(attempt, e, give_up_at, breaker)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
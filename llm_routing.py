@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Per-chain model routing, small-model cascade and LLM usage accounting.
+
+Routes: each chain (question, grader, rewrite, rubric) can use its own model,
+endpoint and key; unset values fall back to LLM_MODEL / LLM_BASE_URL /
+LLM_API_KEY:
+
+  LLM_QUESTION_MODEL=llama-3.1-8b-instant   LLM_GRADER_MODEL=llama-3.3-70b-versatile
+  LLM_REWRITE_MODEL=...  LLM_RUBRIC_MODEL=...  (and LLM_<CHAIN>_BASE_URL, LLM_<CHAIN>_API_KEY)
+
+Cascade: with LLM_CASCADE_MODEL set, the chains in LLM_CASCADE_CHAINS
+(default question,rewrite) call that model first and escalate to the chain's
+own model only when the output fails to parse, fails validate_theory_question,
+or the small model is unavailable.
+
+Accounting: token counts (from the provider's usage metadata, including
+prompt tokens served from the provider's prefix cache) and LLM seconds are
+added to the UsageMeter active for the current request; the API stores the
+totals on each eval record as `llm_usage`. The report compares routing setups
+per answer:
+
+Usage:
+  python llm_routing.py report --log-dir data/training/evals
+"""
+
+from __future__ import annotations
+import argparse
+import collections
+import contextvars
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import Counter
+
+ROLES = ("question", "grader", "rewrite", "rubric")
+CASCADE_DEFAULT_CHAINS = ("question", "rewrite")
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by the provider (direction: input, cached_input, output)", ["model", "direction"]
+)
+LLM_CASCADE = Counter("llm_cascade_total", "Cascade outcomes per chain (accepted by the small model or escalated)",
+                      ["chain", "outcome"])
+
+
+def resolve_routes(
+    model_name: str,
+    api_key: Optional[str],
+    base_url: Optional[str],
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """role -> {"model", "base_url", "api_key"}: explicit overrides, then LLM_<ROLE>_* env, then defaults"""
+    routes = {}
+    for role in ROLES:
+        override = (overrides or {}).get(role, {})
+        prefix = f"LLM_{role.upper()}_"
+        routes[role] = {
+            "model": override.get("model") or os.getenv(prefix + "MODEL") or model_name,
+            "base_url": override.get("base_url") or os.getenv(prefix + "BASE_URL") or base_url,
+            "api_key": override.get("api_key") or os.getenv(prefix + "API_KEY") or api_key,
+        }
+    return routes
+
+
+def resolve_cascade(
+    api_key: Optional[str],
+    base_url: Optional[str],
+    cascade: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Small-model route plus the chains it fronts, or None when the cascade is off"""
+    cascade = cascade or {}
+    model = cascade.get("model") or os.getenv("LLM_CASCADE_MODEL")
+    if not model:
+        return None
+    chains = cascade.get("chains") or [
+        c.strip() for c in os.getenv("LLM_CASCADE_CHAINS", ",".join(CASCADE_DEFAULT_CHAINS)).split(",") if c.strip()
+    ]
+    unknown = set(chains) - set(ROLES)
+    if unknown:
+        raise ValueError(f"Unknown cascade chain(s): {sorted(unknown)}")
+    return {
+        "model": model,
+        "base_url": cascade.get("base_url") or os.getenv("LLM_CASCADE_BASE_URL") or base_url,
+        "api_key": cascade.get("api_key") or os.getenv("LLM_CASCADE_API_KEY") or api_key,
+        "chains": tuple(chains),
+    }
+
+
+def routing_label(routes: Dict[str, Dict[str, Any]], cascade: Optional[Dict[str, Any]]) -> str:
+    """Compact description of a routing setup, used to group the usage report"""
+    parts = []
+    for role in ("question", "grader", "rewrite"):
+        model = routes[role]["model"]
+        if cascade and role in cascade["chains"]:
+            model = f"{cascade['model']}>{model}"
+        parts.append(f"{role}={model}")
+    return ",".join(parts)
+
+
+# ============================================================================
+# Usage Accounting
+# ============================================================================
+
+class UsageMeter:
+    """Collects LLM calls made while it is active (via a context variable)
+
+    Tasks created while a meter is active keep charging it after the request
+    returns, so sessions hold one meter and each answer takes its share.
+    """
+
+    _current: contextvars.ContextVar = contextvars.ContextVar("llm_usage_meter", default=None)
+
+    def __init__(self, routing: str = ""):
+        self.routing = routing
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.llm_seconds = 0.0
+        self.escalations = 0
+        self.by_model: Dict[str, int] = collections.Counter()
+        self._token = None
+
+    def __enter__(self) -> "UsageMeter":
+        self._token = UsageMeter._current.set(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        UsageMeter._current.reset(self._token)
+
+    @staticmethod
+    def current() -> Optional["UsageMeter"]:
+        return UsageMeter._current.get()
+
+    def take(self) -> Dict[str, Any]:
+        """Summary of the calls since the last take(), then reset (a session meter outlives its requests)"""
+        summary = self.summary()
+        self.calls = self.input_tokens = self.cached_input_tokens = self.output_tokens = self.escalations = 0
+        self.llm_seconds = 0.0
+        self.by_model = collections.Counter()
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "routing": self.routing,
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "output_tokens": self.output_tokens,
+            "llm_seconds": round(self.llm_seconds, 3),
+            "escalations": self.escalations,
+            "by_model": dict(self.by_model),
+        }
+
+
+def record_call(chain: str, seconds: float, escalated: Optional[bool] = None) -> None:
+    """Account one finished chain call (escalated is set for cascade chains)"""
+    if escalated is not None:
+        LLM_CASCADE.labels(chain, "escalated" if escalated else "accepted").inc()
+    meter = UsageMeter.current()
+    if meter is not None:
+        meter.llm_seconds += seconds
+        meter.escalations += bool(escalated)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Counts provider-reported tokens for one model into metrics and the active UsageMeter"""
+
+    run_inline = True  # Runs in the caller's context, so UsageMeter.current() is the request's meter
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        input_tokens = cached_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+                output_tokens += usage.get("output_tokens", 0)
+        LLM_TOKENS.labels(self.model, "input").inc(input_tokens)
+        LLM_TOKENS.labels(self.model, "cached_input").inc(cached_tokens)
+        LLM_TOKENS.labels(self.model, "output").inc(output_tokens)
+        meter = UsageMeter.current()
+        if meter is not None:
+            meter.calls += 1
+            meter.input_tokens += input_tokens
+            meter.cached_input_tokens += cached_tokens
+            meter.output_tokens += output_tokens
+            meter.by_model[self.model] += 1
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def usage_report(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per routing setup: mean LLM tokens, seconds and escalations per answer, and the prefix-cache hit ratio"""
+    groups: Dict[str, List[Dict[str, Any]]] = collections.defaultdict(list)
+    for record in records:
+        usage = record.get("llm_usage")
+        if usage:
+            groups[usage.get("routing") or "unknown"].append(usage)
+
+    report = {}
+    for routing, usages in groups.items():
+        n = len(usages)
+        input_tokens = sum(u["input_tokens"] for u in usages)
+        report[routing] = {
+            "answers": n,
+            "calls_per_answer": round(sum(u["calls"] for u in usages) / n, 2),
+            "input_tokens_per_answer": round(input_tokens / n, 1),
+            "cached_input_ratio": round(sum(u.get("cached_input_tokens", 0) for u in usages) / max(input_tokens, 1), 3),
+            "output_tokens_per_answer": round(sum(u["output_tokens"] for u in usages) / n, 1),
+            "llm_seconds_per_answer": round(sum(u["llm_seconds"] for u in usages) / n, 3),
+            "escalation_rate": round(sum(u["escalations"] for u in usages) / n, 3),
+        }
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="LLM routing usage report")
+    sub = ap.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="Per-answer tokens/latency for each routing setup in the eval log")
+    rep.add_argument("--log-dir", default=os.getenv("EVAL_LOG_DIR", "data/training/evals"))
+    rep.add_argument("--since", default=None)
+    rep.add_argument("--baseline", default=None, help="Routing label to compute savings against")
+    args = ap.parse_args()
+
+    from eval_log import SegmentedEvalLog
+
+    started = time.perf_counter()
+    records = list(SegmentedEvalLog(args.log_dir).iter_records(since=args.since))
+    report = usage_report(records)
+    print(f"{len(records)} records in {time.perf_counter() - started:.2f}s")
+
+    baseline = report.get(args.baseline) if args.baseline else None
+    for routing, row in sorted(report.items(), key=lambda kv: -kv[1]["answers"]):
+        print(f"\n{routing}")
+        for key, value in row.items():
+            line = f"  {key:26s} {value}"
+            if baseline is not None and routing != args.baseline and key.endswith("_per_answer") and baseline[key]:
+                line += f"  ({value / baseline[key] - 1:+.1%} vs baseline)"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stub server for load tests.
+
+Serves POST /v1/chat/completions with the deterministic outputs of
+fake_llm.FakeInterviewChatModel (the chain is recognised from its system
+prompt), so the backend runs its real ChatOpenAI + HTTP path with no API key
+and no network. Latency is awaited, so one stub process can hold thousands
+of in-flight completions.
+
+Point the backend at it with:
+  LLM_BASE_URL=http://127.0.0.1:8001/v1 LLM_API_KEY=stub
+
+Per-model latency / malformed rates (matched on the request's "model") let
+routing setups be compared, e.g. a small fast model against a large slow one.
+
+Prompt prefix caching is simulated like OpenAI's: per model, the longest
+previously seen prompt prefix (in 128-token blocks) is reported as
+usage.prompt_tokens_details.cached_tokens once the prompt reaches
+--cache-min-tokens.
+
+Usage:
+  python llm_stub_server.py --port 8001 --latency uniform:50:300 --failure-rate 0.01
+  python llm_stub_server.py --latency lognormal:900:0.4 --model-latency small=uniform:80:200 --model-malformed small=0.1
+  python llm_stub_server.py --cache-min-tokens 256
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from fake_llm import FakeInterviewChatModel, detect_role
+
+CACHE_BLOCK_CHARS = 128 * 4  # 128 tokens at ~4 characters per token
+
+
+class PrefixCache:
+    """Remembers prompt prefixes per model, block by block, and reports how much of a prompt was seen before"""
+
+    def __init__(self, min_tokens: int = 1024, max_blocks: int = 200_000):
+        self.min_tokens = min_tokens
+        self.max_blocks = max_blocks
+        self._blocks: "collections.OrderedDict[Tuple[str, bytes], None]" = collections.OrderedDict()
+
+    def cached_tokens(self, model: str, prompt: str) -> int:
+        if len(prompt) // 4 < self.min_tokens:
+            return 0
+        h = hashlib.sha1()
+        cached = 0
+        for end in range(CACHE_BLOCK_CHARS, len(prompt) + 1, CACHE_BLOCK_CHARS):
+            h.update(prompt[end - CACHE_BLOCK_CHARS:end].encode("utf-8"))
+            key = (model, h.digest())
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+                if cached == end - CACHE_BLOCK_CHARS:
+                    cached = end
+            else:
+                self._blocks[key] = None
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return cached // 4 if cached // 4 >= self.min_tokens else 0
+
+
+def create_app(
+    latency: str = "0",
+    failure_rate: float = 0.0,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+    model_latency: Optional[Dict[str, str]] = None,
+    model_malformed: Optional[Dict[str, float]] = None,
+    cache_min_tokens: int = 1024,
+) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+    models: Dict[Tuple[str, str], FakeInterviewChatModel] = {}
+    prefix_cache = PrefixCache(cache_min_tokens)
+    stats: Dict[str, Any] = {
+        "requests": 0, "failures": 0, "tokens": collections.Counter(), "cached_tokens": collections.Counter(),
+    }
+
+    def model_for(name: str, role: str) -> FakeInterviewChatModel:
+        model = models.get((name, role))
+        if model is None:
+            model = models[(name, role)] = FakeInterviewChatModel(
+                role=role,
+                latency=(model_latency or {}).get(name, latency),
+                failure_rate=failure_rate,
+                malformed_rate=(model_malformed or {}).get(name, malformed_rate),
+                seed=seed,
+            )
+        return model
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body: Dict[str, Any] = await request.json()
+        messages: List[Dict[str, Any]] = body.get("messages", [])
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+
+        name = str(body.get("model", "stub"))
+        stats["requests"] += 1
+        json_mode = bool(body.get("response_format"))
+        content, delay = model_for(name, detect_role(prompt)).complete(prompt, json_mode)
+        if delay:
+            await asyncio.sleep(delay)
+        if content is None:
+            stats["failures"] += 1
+            return JSONResponse(status_code=503, content={"error": {"message": "Simulated overload", "type": "server_error"}})
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        cached_tokens = prefix_cache.cached_tokens(name, prompt)
+        stats["tokens"][name] += prompt_tokens + completion_tokens
+        stats["cached_tokens"][name] += cached_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": name,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    ap = argparse.ArgumentParser(description="OpenAI-compatible stub for load tests")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--latency", default="uniform:50:300", help="fake_llm latency spec in ms")
+    ap.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    ap.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of unparsable completions")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                    help="Latency spec for one model name (repeatable)")
+    ap.add_argument("--model-malformed", action="append", default=[], metavar="MODEL=RATE",
+                    help="Malformed rate for one model name (repeatable)")
+    ap.add_argument("--cache-min-tokens", type=int, default=1024,
+                    help="Smallest prompt/prefix reported as cached (OpenAI: 1024)")
+    args = ap.parse_args()
+
+    import uvicorn
+    app = create_app(
+        args.latency, args.failure_rate, args.malformed_rate, args.seed,
+        model_latency=dict(item.split("=", 1) for item in args.model_latency),
+        model_malformed={k: float(v) for k, v in (item.split("=", 1) for item in args.model_malformed)},
+        cache_min_tokens=args.cache_min_tokens,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
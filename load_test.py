@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the interview REST and WebSocket flows.
+
+Each simulated candidate runs a full session:
+  POST /api/interviews/start
+  N x POST /api/interviews/answer   (or the /ws/interview/{id} loop with --mode ws)
+  GET  /api/interviews/{id}/feedback
+  GET  /api/interviews/history
+
+The report (JSON) has throughput, p50/p95/p99 and error rate per endpoint and
+server RSS (start/peak/end). With --spawn the backend and an OpenAI-compatible
+stub (llm_stub_server.py) are started locally with temporary data dirs, so no
+API key or network is needed. --baseline compares against an earlier report
+and exits non-zero on regressions.
+
+Usage:
+  python load_test.py --spawn --sessions 200 --concurrency 50 --rounds 3 --out load.json
+  python load_test.py --spawn --mode ws --llm-latency lognormal:200:0.5 --baseline load.json
+  python load_test.py --base-url http://localhost:8000 --server-pid 12345   # existing server
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ANSWER_WORDS = (
+    "model data latency trade-off because cache index gradient attention embedding token batch "
+    "throughput memory overfitting regularization pipeline evaluation metric drift retrieval context "
+    "we would measure then compare the baseline and tune it under load for production"
+).split()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+class Recorder:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = collections.defaultdict(list)
+        self.errors: collections.Counter = collections.Counter()
+        self.error_samples: Dict[str, str] = {}
+
+    def ok(self, name: str, seconds: float) -> None:
+        self.latencies[name].append(seconds)
+
+    def fail(self, name: str, reason: str) -> None:
+        self.errors[name] += 1
+        self.error_samples.setdefault(name, reason[:200])
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            resp = await request
+        except Exception as e:
+            self.fail(name, f"{type(e).__name__}: {e}")
+            return None
+        if resp.status_code >= 400:
+            self.fail(name, f"HTTP {resp.status_code}: {resp.text}")
+            return None
+        self.ok(name, time.perf_counter() - started)
+        return resp
+
+    def endpoints(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies.get(name, [])
+            total = len(values) + self.errors[name]
+            report[name] = {
+                "count": total,
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / total, 4) if total else 0.0,
+                "mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+                "p50_ms": round(1000 * percentile(values, 50), 2),
+                "p95_ms": round(1000 * percentile(values, 95), 2),
+                "p99_ms": round(1000 * percentile(values, 99), 2),
+            }
+        return report
+
+
+class RssSampler:
+    def __init__(self, pid: Optional[int], interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+
+    async def run(self) -> None:
+        while self.pid:
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            await asyncio.sleep(self.interval)
+
+    def report(self) -> Optional[Dict[str, float]]:
+        if not self.samples:
+            return None
+        return {
+            "start_mb": round(self.samples[0], 1),
+            "peak_mb": round(max(self.samples), 1),
+            "end_mb": round(self.samples[-1], 1),
+        }
+
+
+# ============================================================================
+# Candidate Sessions
+# ============================================================================
+
+def make_answer(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(ANSWER_WORDS) for _ in range(words)).capitalize() + "."
+
+
+async def start_session(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    resp = await rec.call("start", client.post("/api/interviews/start", json={
+        "mode": "practice",
+        "sample_idx": args.sample_idx,
+        "rounds": args.rounds,
+    }))
+    return resp.json() if resp is not None else None
+
+
+async def finish_session(client: httpx.AsyncClient, rec: Recorder, session_id: str) -> None:
+    await rec.call("feedback", client.get(f"/api/interviews/{session_id}/feedback"))
+    await rec.call("history", client.get("/api/interviews/history", params={"limit": 20}))
+
+
+async def rest_session(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace, rng: random.Random) -> bool:
+    started = await start_session(client, rec, args)
+    if started is None:
+        return False
+    session_id, question = started["session_id"], started["question"]
+
+    for _ in range(args.rounds):
+        await asyncio.sleep(args.think_ms / 1000)
+        resp = await rec.call("answer", client.post("/api/interviews/answer", json={
+            "session_id": session_id,
+            "question": question,
+            "answer": make_answer(rng, args.answer_words),
+        }))
+        if resp is None:
+            return False
+        body = resp.json()
+        if body.get("is_complete"):
+            break
+        question = body.get("next_question") or question
+
+    await finish_session(client, rec, session_id)
+    return True
+
+
+async def ws_session(client: httpx.AsyncClient, rec: Recorder, args: argparse.Namespace, rng: random.Random) -> bool:
+    import websockets
+
+    started = await start_session(client, rec, args)
+    if started is None:
+        return False
+    session_id = started["session_id"]
+    ws_url = args.base_url.replace("http", "ws", 1) + f"/ws/interview/{session_id}"
+
+    try:
+        async with websockets.connect(ws_url, open_timeout=args.timeout) as ws:
+            first = json.loads(await ws.recv())
+            if first.get("type") != "question":
+                rec.fail("ws_answer", f"Unexpected first message: {first}")
+                return False
+            for _ in range(args.rounds):
+                await asyncio.sleep(args.think_ms / 1000)
+                sent = time.perf_counter()
+                await ws.send(json.dumps({"type": "answer", "data": {"answer": make_answer(rng, args.answer_words)}}))
+                # status -> grading -> question|complete
+                while True:
+                    msg = json.loads(await asyncio.wait_for(ws.recv(), args.timeout))
+                    if msg.get("type") == "error":
+                        rec.fail("ws_answer", msg.get("message", "error"))
+                        return False
+                    if msg.get("type") in ("question", "complete"):
+                        break
+                rec.ok("ws_answer", time.perf_counter() - sent)
+                if msg["type"] == "complete":
+                    break
+    except Exception as e:
+        rec.fail("ws_answer", f"{type(e).__name__}: {e}")
+        return False
+
+    await finish_session(client, rec, session_id)
+    return True
+
+
+async def run_load(args: argparse.Namespace, server_pid: Optional[int]) -> Dict[str, Any]:
+    rec = Recorder()
+    rss = RssSampler(server_pid)
+    rss_task = asyncio.create_task(rss.run())
+    semaphore = asyncio.Semaphore(args.concurrency)
+    completed = 0
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        async def one(i: int) -> None:
+            nonlocal completed
+            rng = random.Random(args.seed * 1_000_003 + i)
+            mode = args.mode if args.mode != "mixed" else ("ws" if i % 2 else "rest")
+            async with semaphore:
+                ok = await (ws_session if mode == "ws" else rest_session)(client, rec, args, rng)
+            completed += ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(rss.interval)  # One more RSS sample after the load
+    rss_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await rss_task
+
+    endpoints = rec.endpoints()
+    requests = sum(e["count"] for e in endpoints.values())
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        "duration_s": round(elapsed, 2),
+        "sessions_completed": completed,
+        "sessions_failed": args.sessions - completed,
+        "sessions_per_s": round(completed / elapsed, 2),
+        "requests_per_s": round(requests / elapsed, 2),
+        "endpoints": endpoints,
+        "server_rss": rss.report(),
+        "error_samples": rec.error_samples,
+    }
+
+
+# ============================================================================
+# Spawned Servers
+# ============================================================================
+
+async def wait_for_http(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            with contextlib.suppress(httpx.HTTPError):
+                if (await client.get(url)).status_code < 500:
+                    return
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout:.0f}s")
+
+
+def spawn_servers(args: argparse.Namespace, data_dir: str) -> List[subprocess.Popen]:
+    stub = subprocess.Popen([
+        sys.executable, "llm_stub_server.py", "--port", str(args.stub_port),
+        "--latency", args.llm_latency, "--failure-rate", str(args.llm_failure_rate),
+    ])
+    env = dict(
+        os.environ,
+        LLM_PROVIDER="openai",
+        LLM_API_KEY="stub",
+        LLM_BASE_URL=f"http://127.0.0.1:{args.stub_port}/v1",
+        EVAL_LOG_DIR=os.path.join(data_dir, "evals"),
+        SESSION_SUMMARIES_PATH=os.path.join(data_dir, "session_summaries.jsonl"),
+    )
+    port = args.base_url.rsplit(":", 1)[-1].strip("/")
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend_server:app", "--port", port, "--log-level", "warning"],
+        env=env,
+    )
+    return [stub, backend]
+
+
+# ============================================================================
+# Baseline Comparison
+# ============================================================================
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Human-readable regressions of report vs baseline (empty when none)"""
+    problems = []
+    if report["sessions_per_s"] < baseline["sessions_per_s"] * (1 - max_regression):
+        problems.append(f"throughput {baseline['sessions_per_s']} -> {report['sessions_per_s']} sessions/s")
+    for name, base in baseline.get("endpoints", {}).items():
+        cur = report["endpoints"].get(name)
+        if cur is None:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            problems.append(f"{name} p95 {base['p95_ms']} -> {cur['p95_ms']} ms")
+        if cur["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{name} error rate {base['error_rate']} -> {cur['error_rate']}")
+    return problems
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test the interview REST/WebSocket flows")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--mode", choices=["rest", "ws", "mixed"], default="rest")
+    ap.add_argument("--sessions", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--answer-words", type=int, default=60)
+    ap.add_argument("--think-ms", type=float, default=0, help="Pause before each answer")
+    ap.add_argument("--sample-idx", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--server-pid", type=int, default=None, help="Backend PID for RSS sampling")
+    ap.add_argument("--spawn", action="store_true", help="Start the backend and LLM stub locally")
+    ap.add_argument("--stub-port", type=int, default=8001)
+    ap.add_argument("--llm-latency", default="uniform:50:300", help="Stub latency spec (see fake_llm.py)")
+    ap.add_argument("--llm-failure-rate", type=float, default=0.0)
+    ap.add_argument("--out", default=None, help="Write the JSON report here")
+    ap.add_argument("--baseline", default=None, help="Earlier report to compare against")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional slowdown")
+    args = ap.parse_args()
+
+    procs: List[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        try:
+            server_pid = args.server_pid
+            if args.spawn:
+                procs = spawn_servers(args, data_dir)
+                server_pid = procs[1].pid
+                asyncio.run(wait_for_http(f"http://127.0.0.1:{args.stub_port}/stats"))
+                asyncio.run(wait_for_http(f"{args.base_url}/health"))
+            report = asyncio.run(run_load(args, server_pid))
+        finally:
+            for proc in procs:
+                proc.terminate()
+            for proc in procs:
+                with contextlib.suppress(subprocess.TimeoutExpired):
+                    proc.wait(timeout=10)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"❌ Regression: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
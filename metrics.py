@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus-compatible metrics (no client library needed).
+
+- Counter, Gauge (incl. callback gauges evaluated at scrape time) and Histogram
+- Labelled children are created once and cached, so the hot path is a dict
+  lookup plus a couple of additions under a per-child lock
+- render() produces the text exposition format served at /metrics
+
+Shared metrics used by new_llm_inter.py and backend_server.py are defined at
+the bottom of this module.
+
+Usage (print what a scrape would return):
+  python metrics.py
+"""
+
+from __future__ import annotations
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+# ============================================================================
+# Counter / Gauge
+# ============================================================================
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, fn: Callable[[], float], *values: str) -> None:
+        """Evaluate fn at scrape time instead of tracking the value on the hot path"""
+        self._functions[tuple(str(v) for v in values)] = fn
+
+    def _samples(self) -> List[str]:
+        values = {key: child.value for key, child in list(self._children.items())}
+        for key, fn in list(self._functions.items()):
+            try:
+                values[key] = float(fn())
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values.items()]
+
+
+# ============================================================================
+# Histogram
+# ============================================================================
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: "_HistogramChild"):
+        self.child = child
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + [math.inf], counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format"""
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
+
+
+# ============================================================================
+# Shared Metrics
+# ============================================================================
+
+STAGE_SECONDS = Histogram(
+    "interview_stage_seconds",
+    "Time spent per pipeline stage (LLM chains, eval append, audio, TTS)",
+    ["stage"],
+)
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls repeated after invalid or unparsable output", ["chain"])
+LLM_FALLBACKS = Counter("llm_fallbacks_total", "Canned responses returned after the LLM path failed", ["kind"])
+LLM_PARSE = Counter(
+    "llm_parse_total", "Parsed LLM completions by outcome (ok, repaired, invalid_json, invalid_schema)", ["chain", "outcome"]
+)
+LLM_ADMISSION_REJECTED = Counter(
+    "llm_admission_rejected_total", "LLM calls refused by admission control (answered with 503)", ["reason"]
+)
+LLM_SINGLE_FLIGHT = Counter(
+    "llm_single_flight_total", "Async chain calls that started a flight (leader) or joined an identical one (coalesced)",
+    ["chain", "outcome"]
+)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator recording a function's (or coroutine's) duration under STAGE_SECONDS"""
+    child = STAGE_SECONDS.labels(stage)
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with child.time():
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with child.time():
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def stage(name: str) -> _Timer:
+    """Context manager timing an inline block under STAGE_SECONDS"""
+    return STAGE_SECONDS.labels(name).time()
+
+
+if __name__ == "__main__":
+    with stage("example"):
+        time.sleep(0.01)
+    LLM_FALLBACKS.labels("question").inc()
+    print(render(), end="")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+MinHash / LSH near-duplicate detection for interview questions.
+
+- Character 4-gram shingles over normalized text, 64-permutation MinHash
+- 16 bands x 4 rows LSH buckets -> candidates, verified by estimated Jaccard
+- Incremental inserts with FIFO eviction past max_items (bounded memory)
+
+The chain manager consults a global index plus one small index per session
+before a generated question or follow-up reaches the candidate. The same index
+powers a dedup pass over question JSONL files (e.g. qg_samples.jsonl).
+
+Usage:
+  python near_dup.py --input data/training/qg_samples.jsonl \
+    --output data/training/qg_samples.dedup.jsonl --threshold 0.6
+"""
+
+from __future__ import annotations
+import argparse
+import collections
+import json
+import pathlib
+import re
+import zlib
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, k: int = 4) -> Set[str]:
+    """Character k-grams of the lowercased, punctuation-stripped text"""
+    norm = " ".join(_WORDS.findall(text.lower()))
+    if len(norm) <= k:
+        return {norm} if norm else set()
+    return {norm[i:i + k] for i in range(len(norm) - k + 1)}
+
+
+class MinHasher:
+    """Vectorized MinHash over crc32 shingle hashes"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(text)
+        if not grams:
+            return np.full(self.num_perm, int(_MERSENNE), dtype=np.uint64)
+        h = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        h %= _MERSENNE
+        # (a*h + b) mod p fits in uint64 because a, h < 2^31
+        return ((np.outer(h, self.a) + self.b) % _MERSENNE).min(axis=0)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures with bounded, FIFO-evicted storage
+
+    Signatures live in a ring-buffer matrix (slot = id % max_items) that grows
+    by doubling up to max_items, so candidates are verified in one NumPy op.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        bands: int = 16,
+        rows: int = 4,
+        max_items: int = 50000,
+        hasher: Optional[MinHasher] = None,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.max_items = max_items
+        self.hasher = hasher or MinHasher(num_perm=bands * rows)
+        self._buckets: List[Dict[bytes, Set[int]]] = [collections.defaultdict(set) for _ in range(bands)]
+        self._matrix = np.zeros((min(64, max_items), bands * rows), dtype=np.uint64)
+        self._texts: Dict[int, str] = {}
+        self._order: Deque[int] = collections.deque()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _evict_oldest(self) -> None:
+        old = self._order.popleft()
+        sig = self._matrix[old % self.max_items]
+        self._texts.pop(old, None)
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(old)
+                if not ids:
+                    del band[key]
+
+    def query(self, text: str, sig: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Stored texts whose estimated Jaccard similarity is >= threshold, best first"""
+        if sig is None:
+            sig = self.hasher.signature(text)
+        candidates: Set[int] = set()
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            ids = band.get(key)
+            if ids:
+                candidates |= ids
+        if not candidates:
+            return []
+
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = (self._matrix[ids % self.max_items] == sig).mean(axis=1)
+        keep = np.flatnonzero(sims >= self.threshold)
+        keep = keep[np.argsort(-sims[keep])]
+        return [(self._texts[int(ids[i])], float(sims[i])) for i in keep]
+
+    def is_duplicate(self, text: str) -> bool:
+        return bool(self.query(text))
+
+    def add(self, text: str, sig: Optional[np.ndarray] = None) -> None:
+        """Insert a text; the oldest entry is evicted once max_items is reached"""
+        if sig is None:
+            sig = self.hasher.signature(text)
+        if len(self._order) >= self.max_items:
+            self._evict_oldest()
+        item_id = self._next_id
+        self._next_id += 1
+
+        slot = item_id % self.max_items
+        if slot >= self._matrix.shape[0]:
+            grown = np.zeros((min(self._matrix.shape[0] * 2, self.max_items), self._matrix.shape[1]), dtype=np.uint64)
+            grown[:self._matrix.shape[0]] = self._matrix
+            self._matrix = grown
+        self._matrix[slot] = sig
+        self._texts[item_id] = text
+        self._order.append(item_id)
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            band[key].add(item_id)
+
+    def add_if_new(self, text: str) -> bool:
+        """Insert unless a near-duplicate is already stored; True when inserted"""
+        sig = self.hasher.signature(text)
+        if self.query(text, sig):
+            return False
+        self.add(text, sig)
+        return True
+
+
+# ============================================================================
+# CLI: dedup pass over a JSONL file
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Drop near-duplicate questions from a JSONL file")
+    ap.add_argument("--input", required=True, help="JSONL with one question per row")
+    ap.add_argument("--output", required=True, help="Where to write the deduplicated JSONL")
+    ap.add_argument("--field", default="question", help="JSON key holding the question text")
+    ap.add_argument("--threshold", type=float, default=0.6, help="Estimated Jaccard threshold")
+    args = ap.parse_args()
+
+    index = LSHIndex(threshold=args.threshold, max_items=10_000_000)
+    kept = total = 0
+    out_path = pathlib.Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.input, "r", encoding="utf-8") as f, out_path.open("w", encoding="utf-8") as out:
+        for line in f:
+            if not line.strip():
+                continue
+            total += 1
+            row = json.loads(line)
+            if index.add_if_new(str(row.get(args.field, ""))):
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                kept += 1
+
+    print(f"Kept {kept}/{total} rows ({total - kept} near-duplicates dropped) → {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,32 +19,45 @@ Usage:
   python new_llm_inter.py \
     --input data/training/rubrics_filled.jsonl \
     --sample-idx 1 \
-    --outfile data/training/evals.jsonl \
+    --log-dir data/training/evals \
     --rounds 3
 
 Requires:
 - pip install langchain langchain-openai python-dotenv
 - .env with LLM_API_KEY, LLM_BASE_URL, LLM_MODEL
+  (or --provider fake / LLM_PROVIDER=fake to run offline without a key)
 """
 
 from __future__ import annotations
 import argparse
+import asyncio
+import bisect
 import json
+import math
 import os
 import pathlib
 import re
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationError, validator
+
+from context_digest import DigestCache
+from llm_admission import LLMOverloadedError, estimate_tokens, flight_key
+from llm_resilience import RetryPolicy, get_breaker, is_rate_limit, is_transient, retry_after_header
+from llm_routing import TokenUsageCallback, record_call, resolve_cascade, resolve_routes, routing_label
+from metrics import LLM_FALLBACKS, LLM_PARSE, LLM_RETRIES, timed
+from pre_grader import PreGrader
 
 load_dotenv()
 
 try:
     from langchain_openai import ChatOpenAI
+    from langchain_core.language_models.chat_models import BaseChatModel
     from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_core.output_parsers import BaseOutputParser
     from langchain_core.exceptions import OutputParserException
 except ImportError as e:
     print(f"Missing dependencies: {e}")
@@ -104,6 +117,94 @@ class RewrittenQuestion(BaseModel):
     question: str = Field(description="Rewritten theoretical question")
 
 
+class NearDuplicateError(ValueError):
+    """A generated question nearly repeats one already asked in some session"""
+
+    def __init__(self, output: Any, earlier: str):
+        super().__init__(f"Near-duplicate of '{earlier}'")
+        self.output = output
+        self.earlier = earlier
+
+
+class RubricLevelOutput(BaseModel):
+    """Schema for one filled rubric level"""
+    description: str = Field(description="One-sentence description of the level (max 120 chars)")
+    indicators: List[str] = Field(description="3-4 short observable indicators")
+    pitfalls: List[str] = Field(description="2 short pitfalls typical for this level")
+
+    @validator("indicators", "pitfalls")
+    def validate_items(cls, v):
+        items = [str(i).strip() for i in v if str(i).strip()]
+        if not items:
+            raise ValueError("At least one item is required")
+        return items
+
+
+# ============================================================================
+# Structured Output
+# ============================================================================
+
+STRUCTURED_OUTPUT_MODES = ("json_schema", "json_object", "off")
+
+JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.I)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def parse_json_str(s: str) -> Any:
+    """json.loads that tolerates code fences, chatter around the object and trailing commas"""
+    try:
+        return json.loads(s)
+    except ValueError:
+        pass
+    t = JSON_FENCE.sub("", s.strip())
+    start, end = t.find("{"), t.rfind("}")
+    if start != -1 and end > start:
+        t = t[start:end + 1]
+    return json.loads(TRAILING_COMMA.sub(r"\1", t))
+
+
+def schema_hint(model: type) -> str:
+    """Compact one-line JSON shape for a prompt, instead of the full JSON schema"""
+    fields = []
+    for name, field in model.model_fields.items():
+        kind = {str: "string", float: "number", List[str]: "string[]"}.get(field.annotation, "string")
+        fields.append(f'"{name}": {kind} ({field.description})' if field.description else f'"{name}": {kind}')
+    return "Reply with one JSON object only: {" + ", ".join(fields) + "}"
+
+
+class JsonModelParser(BaseOutputParser):
+    """Parses a completion into a Pydantic model, repairing near-JSON locally before any retry"""
+
+    pydantic_object: Any
+    chain: str = ""
+
+    def parse(self, text: str) -> Any:
+        try:
+            obj = json.loads(text)
+            outcome = "ok"
+        except ValueError:
+            try:
+                obj = parse_json_str(text)
+                outcome = "repaired"
+            except ValueError as e:
+                LLM_PARSE.labels(self.chain, "invalid_json").inc()
+                raise OutputParserException(f"Invalid JSON output: {e}", llm_output=text)
+        try:
+            result = self.pydantic_object.model_validate(obj)
+        except ValidationError as e:
+            LLM_PARSE.labels(self.chain, "invalid_schema").inc()
+            raise OutputParserException(f"Output does not match {self.pydantic_object.__name__}: {e}", llm_output=text)
+        LLM_PARSE.labels(self.chain, outcome).inc()
+        return result
+
+    def get_format_instructions(self) -> str:
+        return schema_hint(self.pydantic_object)
+
+    @property
+    def _type(self) -> str:
+        return "json_model"
+
+
 # ============================================================================
 # Validation Functions
 # ============================================================================
@@ -151,16 +252,79 @@ def validate_theory_question(q: str) -> Tuple[bool, str]:
     return True, ""
 
 
+LLM_PROVIDERS = ("openai", "fake")
+
+# Lower edges of L2..L4 - generous bands (analytics vectorizes over the same edges)
+BAND_EDGES = (0.40, 0.60, 0.80)
+BANDS = ("L1", "L2", "L3", "L4")
+
+REWRITE_FALLBACK = "Could you explain the key concepts behind your approach?"
+
+
 def band_from_score(score: float) -> str:
     """Convert numeric score to band level - generous bands"""
-    if score < 0.40:
-        return "L1"
-    elif score < 0.60:
-        return "L2"
-    elif score < 0.80:
-        return "L3"
-    else:
-        return "L4"
+    return BANDS[bisect.bisect_right(BAND_EDGES, score)]
+
+
+# Assumed spread of single-answer scores around a candidate's level (used until
+# the observed spread is larger)
+SCORE_NOISE = 0.15
+
+
+def band_confidence(scores: List[float]) -> Tuple[str, float]:
+    """Band of the mean score, and the probability (normal approximation) that the candidate's level is in it"""
+    n = len(scores)
+    mean = sum(scores) / n
+    spread = SCORE_NOISE
+    if n > 1:
+        spread = max(spread, math.sqrt(sum((s - mean) ** 2 for s in scores) / (n - 1)))
+    stderr = spread / math.sqrt(n)
+
+    i = bisect.bisect_right(BAND_EDGES, mean)
+    lower = BAND_EDGES[i - 1] if i > 0 else -math.inf
+    upper = BAND_EDGES[i] if i < len(BAND_EDGES) else math.inf
+
+    def cdf(x: float) -> float:
+        return 0.5 * (1 + math.erf((x - mean) / (stderr * math.sqrt(2))))
+
+    return BANDS[i], cdf(upper) - cdf(lower)
+
+
+class StoppingRule:
+    """When an interview ends: after max_rounds, or (adaptive) once the band is stable
+
+    Adaptive mode never stops before min_rounds, then stops as soon as
+    band_confidence() reaches `confidence`.
+    """
+
+    def __init__(self, max_rounds: int, adaptive: bool = False, min_rounds: int = 2, confidence: float = 0.9):
+        self.max_rounds = max(1, max_rounds)
+        self.adaptive = adaptive
+        self.min_rounds = max(1, min(min_rounds, self.max_rounds))
+        self.confidence = confidence
+
+    @classmethod
+    def from_env(cls, max_rounds: int, adaptive: Optional[bool] = None, min_rounds: Optional[int] = None) -> "StoppingRule":
+        if adaptive is None:
+            adaptive = os.getenv("ADAPTIVE_ROUNDS", "false").lower() in ("1", "true", "yes", "on")
+        return cls(
+            max_rounds,
+            adaptive=adaptive,
+            min_rounds=min_rounds or int(os.getenv("ADAPTIVE_MIN_ROUNDS", "2")),
+            confidence=float(os.getenv("ADAPTIVE_CONFIDENCE", "0.9")),
+        )
+
+    def should_stop(self, scores: List[float]) -> bool:
+        if len(scores) >= self.max_rounds:
+            return True
+        if not self.adaptive or len(scores) < self.min_rounds:
+            return False
+        return band_confidence(scores)[1] >= self.confidence
+
+
+def rubric_fragment(competency_rubric: Dict[str, Any]) -> str:
+    """Canonical, compact serialization of one competency for the grader prompt (compute once per session)"""
+    return json.dumps(competency_rubric, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
 
 
 # ============================================================================
@@ -170,37 +334,138 @@ def band_from_score(score: float) -> str:
 class InterviewChainManager:
     """Manages LangChain chains for the interview process"""
 
-    def __init__(self, model_name: str, api_key: str, base_url: Optional[str] = None):
-        """Initialize the chain manager with LLM configuration"""
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str,
+        base_url: Optional[str] = None,
+        question_index: Optional[Any] = None,
+        dedup_index: Optional[Any] = None,
+        provider: Optional[str] = None,
+        admission: Optional[Any] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        cascade: Optional[Dict[str, Any]] = None,
+        structured_output: Optional[str] = None,
+        context_digests: Optional[DigestCache] = None,
+        pre_grader: Optional[PreGrader] = None,
+        single_flight: Optional[Any] = None,
+    ):
+        """Initialize the chain manager with LLM configuration
+
+        provider: "openai" (any OpenAI-compatible API) or "fake" for the offline,
+        deterministic model in fake_llm.py; defaults to LLM_PROVIDER or "openai".
+
+        question_index: optional QuestionIndex (question_index.py); when set,
+        generate_question reuses a stored question and only calls the LLM on a miss.
+        dedup_index: optional global LSHIndex (near_dup.py) of questions already
+        asked in any session; near-duplicates are rejected before reaching a candidate.
+        admission: optional AdmissionController (llm_admission.py) that every async
+        chain call waits on; overload raises LLMOverloadedError instead of falling back.
+        retry_policy: timeouts, deadline and backoff for chain calls (llm_resilience.py);
+        defaults to the LLM_* env settings. Each endpoint has a shared circuit breaker.
+        routes: per-chain {"model", "base_url", "api_key"} overrides (llm_routing.py);
+        unset values come from LLM_<CHAIN>_* env vars, then the arguments above.
+        cascade: {"model", "chains", ...} small model tried first for those chains,
+        escalating to the chain's model on invalid output; defaults to LLM_CASCADE_*.
+        structured_output: provider-native JSON output - "json_schema" (the chain's
+        schema is enforced by the API), "json_object" (JSON mode) or "off" for
+        providers without response_format; defaults to LLM_STRUCTURED_OUTPUT or
+        "json_object". Prompts carry a compact schema hint either way.
+        context_digests: DigestCache (context_digest.py) that condenses each JD/resume
+        pair once for question prompts; defaults to QUESTION_CONTEXT* env settings
+        (QUESTION_CONTEXT=raw keeps the plain 800-character truncation).
+        pre_grader: PreGrader (pre_grader.py) that scores trivial answers locally and
+        gives the LLM a prior for the rest; defaults to PRE_GRADER env (on).
+        single_flight: optional SingleFlight (llm_admission.py) shared by all sessions;
+        identical concurrent async chain calls then run once and share the result.
+        """
         self.model_name = model_name
         self.api_key = api_key
         self.base_url = base_url
+        self.question_index = question_index
+        self.dedup_index = dedup_index
+        self.context_digests = context_digests if context_digests is not None else DigestCache.from_env()
+        self.pre_grader = pre_grader if pre_grader is not None else PreGrader.from_env()
+        self.admission = admission
+        self.single_flight = single_flight
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.breakers: Dict[str, Any] = {}  # tier ("grader", "question_small", ...) -> CircuitBreaker
+        self.provider = (provider or os.getenv("LLM_PROVIDER", "openai")).lower()
+        if self.provider not in LLM_PROVIDERS:
+            raise ValueError(f"Unknown LLM provider '{self.provider}' (expected one of {LLM_PROVIDERS})")
+        self.structured_output = (structured_output or os.getenv("LLM_STRUCTURED_OUTPUT", "json_object")).lower()
+        if self.structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown structured output mode '{self.structured_output}' (expected one of {STRUCTURED_OUTPUT_MODES})"
+            )
+        self.routes = resolve_routes(model_name, api_key, base_url, routes)
+        self.cascade = resolve_cascade(api_key, base_url, cascade)
+        self.routing_label = routing_label(self.routes, self.cascade)
+        self._flight_scope = f"{self.provider}|{self.structured_output}|{self.routing_label}"
+        self.cascade_chains: Dict[str, Any] = {}  # role -> same chain on the cascade's small model
 
         # Initialize LLMs with different temperatures for different tasks
-        self.question_llm = self._create_llm(temperature=0.2)
-        self.grader_llm = self._create_llm(temperature=0.3)  # Higher temp for more lenient grading
-        self.rewrite_llm = self._create_llm(temperature=0.2)
+        self.question_llm = self._create_llm(temperature=0.2, role="question")
+        self.grader_llm = self._create_llm(temperature=0.3, role="grader")  # Higher temp for more lenient grading
+        self.rewrite_llm = self._create_llm(temperature=0.2, role="rewrite")
 
         # Build chains
         self.question_chain = self._build_question_chain()
         self.grader_chain = self._build_grader_chain()
         self.rewrite_chain = self._build_rewrite_chain()
-
-    def _create_llm(self, temperature: float) -> ChatOpenAI:
-        """Create a ChatOpenAI instance with specified temperature"""
+        for role, temperature in (("question", 0.2), ("grader", 0.3), ("rewrite", 0.2)):
+            if self.cascade and role in self.cascade["chains"]:
+                small_llm = self._create_llm(temperature, role, small=True)
+                self.cascade_chains[role] = getattr(self, f"_build_{role}_chain")(small_llm)
+
+        # Rubric filling is only used by offline tooling; built on first use
+        self._rubric_chain = None
+
+    def _create_llm(self, temperature: float, role: str = "question", small: bool = False) -> BaseChatModel:
+        """Create the chat model for one chain (role picks the route and the fake model's output schema)
+
+        small: use the cascade's small model instead of the chain's own route.
+        """
+        route = self.cascade if small else self.routes[role]
+        tier = f"{role}_small" if small else role
+
+        if self.provider == "fake":
+            from fake_llm import FakeInterviewChatModel
+            self.breakers[tier] = get_breaker(f"fake:{route['model']}")
+            llm = FakeInterviewChatModel.from_env(role)
+            llm.callbacks = [TokenUsageCallback(route["model"])]
+            return llm
+
+        self.breakers[tier] = get_breaker(f"{route['model']}@{route['base_url'] or 'api.openai.com'}")
         kwargs = {
-            "model": self.model_name,
+            "model": route["model"],
             "temperature": temperature,
-            "api_key": self.api_key,
+            "api_key": route["api_key"],
+            # Retries and backoff are owned by retry_policy; the client only enforces the timeout
+            "timeout": self.retry_policy.call_timeout,
+            "max_retries": 0,
+            "callbacks": [TokenUsageCallback(route["model"])],
         }
-        if self.base_url:
-            kwargs["base_url"] = self.base_url
+        if route["base_url"]:
+            kwargs["base_url"] = route["base_url"]
 
         return ChatOpenAI(**kwargs)
 
-    def _build_question_chain(self):
+    def _structured(self, llm: BaseChatModel, schema: type) -> Any:
+        """Bind the provider's response_format for `schema` according to structured_output"""
+        if self.structured_output == "json_schema":
+            return llm.bind(response_format={
+                "type": "json_schema",
+                "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()},
+            })
+        if self.structured_output == "json_object":
+            return llm.bind(response_format={"type": "json_object"})
+        return llm
+
+    def _build_question_chain(self, llm: Optional[BaseChatModel] = None):
         """Build the question generation chain"""
-        parser = PydanticOutputParser(pydantic_object=QuestionOutput)
+        parser = JsonModelParser(pydantic_object=QuestionOutput, chain="question")
 
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You write concise, single-claim interview questions aligned to the JD+resume.
@@ -217,18 +482,18 @@ Resume:
 {resume}
 
 Target competency: {competency}
-
+{avoid}
 Generate a theoretical interview question that evaluates this competency.""")
         ])
 
         prompt = prompt.partial(format_instructions=parser.get_format_instructions())
 
         # Use LCEL (pipe operator) instead of deprecated LLMChain
-        return prompt | self.question_llm | parser
+        return prompt | self._structured(llm or self.question_llm, QuestionOutput) | parser
 
-    def _build_grader_chain(self):
+    def _build_grader_chain(self, llm: Optional[BaseChatModel] = None):
         """Build the answer grading chain"""
-        parser = PydanticOutputParser(pydantic_object=GradeOutput)
+        parser = JsonModelParser(pydantic_object=GradeOutput, chain="grader")
 
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a fair and encouraging grader. Use the rubric as a guide, but be lenient and supportive.
@@ -251,27 +516,27 @@ In justification, mention what the candidate did well first, then areas for impr
 Your followup_question MUST be theoretical (no code requests).
 Examples: 'Which module would you choose for X?', 'What does function Y do?', 'How do you evaluate A vs B?'
 Limits: ≤15 words, single claim, ends with '?'.
+Grade the answer fairly and generously. Focus on what they understood correctly.
 
 {format_instructions}"""),
+            # Static system prompt, then the session's rubric, then the per-answer tail:
+            # everything before the question is a stable prefix for provider prompt caching
             ("human", """Rubric fragment (one competency):
-{competency_rubric}
-
-Question asked: {question}
+{competency_rubric}"""),
+            ("human", """Question asked: {question}
 
 Candidate answer:
-{answer}
-
-Grade the answer fairly and generously. Focus on what they understood correctly.""")
+{answer}{prior}""")
         ])
 
         prompt = prompt.partial(format_instructions=parser.get_format_instructions())
 
         # Use LCEL (pipe operator) instead of deprecated LLMChain
-        return prompt | self.grader_llm | parser
+        return prompt | self._structured(llm or self.grader_llm, GradeOutput) | parser
 
-    def _build_rewrite_chain(self):
+    def _build_rewrite_chain(self, llm: Optional[BaseChatModel] = None):
         """Build the follow-up question rewrite chain"""
-        parser = PydanticOutputParser(pydantic_object=RewrittenQuestion)
+        parser = JsonModelParser(pydantic_object=RewrittenQuestion, chain="rewrite")
 
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You rewrite follow-up questions into concise, theoretical, single-claim questions.
@@ -282,43 +547,285 @@ Constraints: ≤15 words, one question, ends with '?'.
 
 {format_instructions}"""),
             ("human", """Original follow-up: {original_question}
-
+{avoid}
 Rewrite into a theoretical, single-claim question (≤15 words).""")
         ])
 
         prompt = prompt.partial(format_instructions=parser.get_format_instructions())
 
         # Use LCEL (pipe operator) instead of deprecated LLMChain
-        return prompt | self.rewrite_llm | parser
+        return prompt | self._structured(llm or self.rewrite_llm, RewrittenQuestion) | parser
 
-    def generate_question(
+    def _build_rubric_chain(self, llm: Optional[BaseChatModel] = None):
+        """Build the rubric level filling chain"""
+        parser = JsonModelParser(pydantic_object=RubricLevelOutput, chain="rubric")
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You write hiring rubrics for technical interviews.
+
+Fill ONE proficiency level of ONE competency, grounded in the job description.
+L1 = basic awareness, L2 = practical experience, L3 = advanced expertise, L4 = expert/leadership.
+Indicators are short observable behaviours (≤12 words each); pitfalls are typical gaps at this level.
+
+{format_instructions}"""),
+            ("human", """JD:
+{jd}
+
+Competency: {competency}
+Level: {level}
+
+Write the description, indicators and pitfalls for this level only.""")
+        ])
+
+        prompt = prompt.partial(format_instructions=parser.get_format_instructions())
+
+        return prompt | self._structured(llm or self.rubric_llm, RubricLevelOutput) | parser
+
+    @property
+    def rubric_chain(self):
+        """Rubric level chain, created lazily with the question LLM settings"""
+        if self._rubric_chain is None:
+            self.rubric_llm = self._create_llm(temperature=0.2, role="rubric")
+            self._rubric_chain = self._build_rubric_chain()
+            if self.cascade and "rubric" in self.cascade["chains"]:
+                self.cascade_chains["rubric"] = self._build_rubric_chain(self._create_llm(0.2, "rubric", small=True))
+        return self._rubric_chain
+
+    def _dedup_indexes(self, session_dedup: Optional[Any], cross_session: bool = True) -> List[Any]:
+        indexes = (session_dedup, self.dedup_index) if cross_session else (session_dedup,)
+        return [index for index in indexes if index is not None]
+
+    def _find_repeat(self, question: str, session_dedup: Optional[Any], cross_session: bool = True) -> Optional[str]:
+        """Earlier question that `question` nearly duplicates, if any
+
+        cross_session=False checks only this session's questions: bank reuse
+        across sessions is the point of the bank, and LLM generations are
+        checked against the global index once per call by _claim_question.
+        """
+        for index in self._dedup_indexes(session_dedup, cross_session):
+            matches = index.query(question)
+            if matches:
+                return matches[0][0]
+        return None
+
+    def _remember_asked(self, question: str, session_dedup: Optional[Any], cross_session: bool = True) -> None:
+        for index in self._dedup_indexes(session_dedup, cross_session):
+            index.add(question)
+
+    # ------------------------------------------------------------------
+    # Chain invocation
+    #
+    # Each public method's logic is written once as a step generator that
+    # yields chain inputs and is sent back the parsed output (or the parse
+    # error). _drive runs it with blocking invoke() for the CLI; _adrive
+    # awaits ainvoke() through the admission controller for the server.
+    # Both apply retry_policy and the chain's circuit breaker, and try the
+    # cascade's small model first where one is configured.
+    # ------------------------------------------------------------------
+
+    def _chain(self, role: str) -> Any:
+        return getattr(self, f"{role}_chain")
+
+    @staticmethod
+    def _cascade_accepts(role: str, output: Any) -> bool:
+        """Whether the small model's parsed output can be used without escalating"""
+        if role in ("question", "rewrite"):
+            return validate_theory_question(output.question)[0]
+        return True  # Grades and rubric levels only need to parse
+
+    def _claim_question(self, role: str, output: Any) -> Any:
+        """Check a generated question against the global dedup index and add it there
+
+        Runs once per chain call, inside the single flight, so sessions that
+        shared the call all get it instead of finding each other's copy as a
+        cross-session repeat. Raises NearDuplicateError for an earlier question.
+        Per-session checks stay in the step generators.
+        """
+        if role not in ("question", "rewrite") or self.dedup_index is None:
+            return output
+        if not validate_theory_question(output.question)[0]:
+            return output  # Rejected by the step generator anyway
+        matches = self.dedup_index.query(output.question)
+        if matches:
+            raise NearDuplicateError(output, matches[0][0])
+        self.dedup_index.add(output.question)
+        return output
+
+    def _invoke(self, role: str, request: Dict[str, Any]) -> Any:
+        """Blocking counterpart of _ainvoke (no admission control)"""
+        return self._claim_question(role, self._invoke_call(role, request))
+
+    def _invoke_call(self, role: str, request: Dict[str, Any]) -> Any:
+        chain = self._chain(role)
+        started = time.perf_counter()
+        escalated = None
+        try:
+            small = self.cascade_chains.get(role)
+            if small is not None:
+                escalated = True
+                try:
+                    output = self.retry_policy.call(lambda: small.invoke(request), self.breakers[f"{role}_small"])
+                    if self._cascade_accepts(role, output):
+                        escalated = False
+                        return output
+                except (OutputParserException, ValueError, LLMOverloadedError) as e:
+                    print(f"  Cascade escalation ({role}): {e}")
+                except Exception as e:
+                    if not is_transient(e):
+                        raise
+                    print(f"  Cascade escalation ({role}): {type(e).__name__}")
+            return self.retry_policy.call(lambda: chain.invoke(request), self.breakers[role])
+        finally:
+            record_call(role, time.perf_counter() - started, escalated)
+
+    def _drive(self, steps: Generator[Dict[str, Any], Any, Any], role: str) -> Any:
+        try:
+            request = next(steps)
+            while True:
+                try:
+                    result = self._invoke(role, request)
+                except (OutputParserException, ValueError) as e:
+                    result = e
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def _adrive(self, steps: Generator[Dict[str, Any], Any, Any], role: str, session_key: str) -> Any:
+        try:
+            request = next(steps)
+            while True:
+                try:
+                    result = await self._ainvoke(role, request, session_key)
+                except (OutputParserException, ValueError) as e:
+                    result = e
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def _ainvoke(self, role: str, request: Dict[str, Any], session_key: str) -> Any:
+        """One async chain call; joins an identical call already in flight when single_flight is set"""
+        if self.single_flight is None:
+            return await self._ainvoke_claimed(role, request, session_key)
+        key = flight_key(role, self._flight_scope, request)
+        return await self.single_flight.do(key, role, lambda: self._ainvoke_claimed(role, request, session_key))
+
+    async def _ainvoke_claimed(self, role: str, request: Dict[str, Any], session_key: str) -> Any:
+        return self._claim_question(role, await self._ainvoke_call(role, request, session_key))
+
+    async def _ainvoke_call(self, role: str, request: Dict[str, Any], session_key: str) -> Any:
+        """One async chain call, through the cascade's small model first when configured"""
+        chain = self._chain(role)
+        started = time.perf_counter()
+        escalated = None
+        try:
+            small = self.cascade_chains.get(role)
+            if small is not None:
+                escalated = True
+                try:
+                    output = await self._ainvoke_tier(f"{role}_small", small, request, session_key)
+                    if self._cascade_accepts(role, output):
+                        escalated = False
+                        return output
+                except (OutputParserException, ValueError, LLMOverloadedError) as e:
+                    print(f"  Cascade escalation ({role}): {e}")
+            return await self._ainvoke_tier(role, chain, request, session_key)
+        finally:
+            record_call(role, time.perf_counter() - started, escalated)
+
+    async def _ainvoke_tier(self, tier: str, chain: Any, request: Dict[str, Any], session_key: str) -> Any:
+        """One async call of one model under retry_policy, admitted by the shared controller when configured"""
+        policy = self.retry_policy
+
+        async def attempt(give_up_at: float) -> Any:
+            if self.admission is None:
+                return await asyncio.wait_for(chain.ainvoke(request), policy.attempt_timeout(give_up_at))
+            async with self.admission.slot(session_key, estimate_tokens(request)):
+                return await asyncio.wait_for(chain.ainvoke(request), policy.attempt_timeout(give_up_at))
+
+        try:
+            return await policy.acall(attempt, self.breakers[tier])
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            # Retries exhausted: shed the request (503) rather than answer with a fallback
+            retry_after = retry_after_header(e) or policy.base_delay * 2 ** policy.attempts
+            if is_rate_limit(e) and self.admission is not None:
+                self.admission.penalize(retry_after)  # Back off globally
+            raise LLMOverloadedError(f"LLM provider unavailable ({type(e).__name__})", retry_after) from e
+
+    # ------------------------------------------------------------------
+    # Question generation
+    # ------------------------------------------------------------------
+
+    def _question_steps(
         self,
         jd: str,
         resume: str,
         competency: str,
-        max_retries: int = 3
-    ) -> QuestionOutput:
-        """Generate a theoretical interview question with validation retries"""
+        max_retries: int,
+        asked: Optional[List[str]],
+        session_dedup: Optional[Any],
+    ) -> Generator[Dict[str, Any], Any, QuestionOutput]:
+        if self.question_index is not None:
+            hit = self.question_index.lookup(jd, competency, exclude=asked)
+            if hit is not None and self._find_repeat(hit["question"], session_dedup, cross_session=False) is None:
+                self._remember_asked(hit["question"], session_dedup, cross_session=False)
+                return QuestionOutput(
+                    question=hit["question"],
+                    difficulty=hit.get("difficulty") or "L2",
+                    competency=competency,
+                    rationale="Reused from question bank"
+                )
+
+        if self.context_digests is not None:
+            context = self.context_digests.context(jd, resume, competency)
+        else:
+            context = {"jd": jd[:800], "resume": resume[:800]}
+
+        avoid: List[str] = []
+        repeated: Optional[QuestionOutput] = None
         for attempt in range(max_retries):
-            try:
-                # LCEL chains return the parsed output directly
-                output = self.question_chain.invoke({
-                    "jd": jd[:800],
-                    "resume": resume[:800],
-                    "competency": competency,
-                })
+            # LCEL chains return the parsed output directly
+            output = yield {
+                **context,
+                "competency": competency,
+                "avoid": f"Do not repeat or paraphrase: {' | '.join(avoid)}\n" if avoid else "",
+            }
 
+            if isinstance(output, NearDuplicateError):
+                # Repeats a question from another session (checked once per call in _claim_question)
+                avoid.append(output.earlier)
+                repeated = output.output
+                print(f"  Retry {attempt + 1}: {output}")
+            elif isinstance(output, Exception):
+                print(f"  Parse error on attempt {attempt + 1}: {output}")
+            else:
                 # Validate theory constraints
                 is_valid, reason = validate_theory_question(output.question)
                 if is_valid:
-                    return output
+                    earlier = self._find_repeat(output.question, session_dedup, cross_session=False)
+                    if earlier is None:
+                        if self.question_index is not None:
+                            self.question_index.add(output.question, competency, difficulty=output.difficulty, source="llm")
+                            self.question_index.mark_asked(output.question)
+                        self._remember_asked(output.question, session_dedup, cross_session=False)
+                        return output
+                    reason = f"Near-duplicate of '{earlier}'"
+                    avoid.append(earlier)
+                    repeated = output
 
                 print(f"  Retry {attempt + 1}: {reason}")
 
-            except (OutputParserException, ValueError) as e:
-                print(f"  Parse error on attempt {attempt + 1}: {e}")
+            if attempt + 1 < max_retries:
+                LLM_RETRIES.labels("question").inc()
+
+        # A valid (if repeated) question beats the generic fallback
+        if repeated is not None:
+            self._remember_asked(repeated.question, session_dedup, cross_session=False)
+            return repeated
 
         # Fallback question if all retries fail
+        LLM_FALLBACKS.labels("question").inc()
         return QuestionOutput(
             question=f"What are the key considerations for {competency}?",
             difficulty="L2",
@@ -326,67 +833,209 @@ Rewrite into a theoretical, single-claim question (≤15 words).""")
             rationale="Fallback question"
         )
 
+    @timed("generate_question")
+    def generate_question(
+        self,
+        jd: str,
+        resume: str,
+        competency: str,
+        max_retries: int = 3,
+        asked: Optional[List[str]] = None,
+        session_dedup: Optional[Any] = None
+    ) -> QuestionOutput:
+        """Generate a theoretical interview question with validation retries
+
+        asked: questions already put to this candidate; never reused from the index.
+        session_dedup: per-session LSHIndex; near-duplicates of earlier questions
+        (this session or, via dedup_index, any session) are regenerated.
+        """
+        steps = self._question_steps(jd, resume, competency, max_retries, asked, session_dedup)
+        return self._drive(steps, "question")
+
+    @timed("generate_question")
+    async def agenerate_question(
+        self,
+        jd: str,
+        resume: str,
+        competency: str,
+        max_retries: int = 3,
+        asked: Optional[List[str]] = None,
+        session_dedup: Optional[Any] = None,
+        session_key: str = "default"
+    ) -> QuestionOutput:
+        """Async generate_question; LLM calls are admitted under session_key"""
+        steps = self._question_steps(jd, resume, competency, max_retries, asked, session_dedup)
+        return await self._adrive(steps, "question", session_key)
+
+    # ------------------------------------------------------------------
+    # Grading
+    # ------------------------------------------------------------------
+
+    def _grade_steps(
+        self,
+        question: str,
+        answer: str,
+        competency_rubric: Union[str, Dict[str, Any]]
+    ) -> Generator[Dict[str, Any], Any, GradeOutput]:
+        if not isinstance(competency_rubric, str):
+            competency_rubric = rubric_fragment(competency_rubric)
+
+        prior = ""
+        if self.pre_grader is not None:
+            pre = self.pre_grader.grade(question, answer, competency_rubric)
+            if pre.trivial:
+                # Clearly trivial answer: deterministic low score, no LLM call
+                return GradeOutput(
+                    score=pre.score,
+                    justification=pre.justification,
+                    followup_question=pre.followup_question
+                )
+            prior = f"\n\nLocal pre-score from length and rubric keyword overlap (a hint, not a verdict): {pre.score:.2f}"
+
+        # LCEL chains return the parsed output directly
+        output = yield {
+            "question": question,
+            "answer": answer,
+            "competency_rubric": competency_rubric,
+            "prior": prior,
+        }
+        if not isinstance(output, Exception):
+            return output
+
+        print(f"  Grading error: {output}")
+        # Fallback grading
+        LLM_FALLBACKS.labels("grading").inc()
+        return GradeOutput(
+            score=0.5,
+            justification="Unable to parse grading response",
+            followup_question="Could you elaborate on your answer?"
+        )
+
+    @timed("grade_answer")
     def grade_answer(
         self,
         question: str,
         answer: str,
-        competency_rubric: Dict[str, Any]
+        competency_rubric: Union[str, Dict[str, Any]]
     ) -> GradeOutput:
-        """Grade an answer against the rubric"""
-        try:
-            # LCEL chains return the parsed output directly
-            output = self.grader_chain.invoke({
-                "question": question,
-                "answer": answer,
-                "competency_rubric": json.dumps(competency_rubric, ensure_ascii=False),
-            })
+        """Grade an answer against the rubric
 
-            return output
+        competency_rubric: the competency dict, or its rubric_fragment() computed
+        once per session so every grading prompt shares the same prefix.
+        """
+        return self._drive(self._grade_steps(question, answer, competency_rubric), "grader")
 
-        except (OutputParserException, ValueError) as e:
-            print(f"  Grading error: {e}")
-            # Fallback grading
-            return GradeOutput(
-                score=0.5,
-                justification="Unable to parse grading response",
-                followup_question="Could you elaborate on your answer?"
-            )
+    @timed("grade_answer")
+    async def agrade_answer(
+        self,
+        question: str,
+        answer: str,
+        competency_rubric: Union[str, Dict[str, Any]],
+        session_key: str = "default"
+    ) -> GradeOutput:
+        """Async grade_answer; the LLM call is admitted under session_key"""
+        steps = self._grade_steps(question, answer, competency_rubric)
+        return await self._adrive(steps, "grader", session_key)
+
+    # ------------------------------------------------------------------
+    # Follow-up rewriting
+    # ------------------------------------------------------------------
 
-    def rewrite_followup(self, original_question: str) -> str:
-        """Rewrite a follow-up question to ensure it's theoretical"""
+    def _rewrite_steps(self, original_question: str, session_dedup: Optional[Any]) -> Generator[Dict[str, Any], Any, str]:
         is_valid, _ = validate_theory_question(original_question)
-        if is_valid:
+        earlier = self._find_repeat(original_question, session_dedup) if is_valid else None
+        if is_valid and earlier is None:
+            self._remember_asked(original_question, session_dedup)
             return original_question
 
-        try:
-            # LCEL chains return the parsed output directly
-            output = self.rewrite_chain.invoke({
-                "original_question": original_question,
-            })
+        # LCEL chains return the parsed output directly
+        output = yield {
+            "original_question": original_question,
+            "avoid": f"It repeats an earlier question ('{earlier}'); ask about a different aspect.\n" if earlier else "",
+        }
 
+        if isinstance(output, Exception):
+            print(f"  Rewrite error: {output}")
+        else:
             rewritten = output.question
 
-            # Validate the rewritten question
+            # Validate the rewritten question (already checked across sessions by _claim_question)
             is_valid, _ = validate_theory_question(rewritten)
-            if is_valid:
+            if is_valid and self._find_repeat(rewritten, session_dedup, cross_session=False) is None:
+                self._remember_asked(rewritten, session_dedup, cross_session=False)
                 return rewritten
 
-        except (OutputParserException, ValueError) as e:
-            print(f"  Rewrite error: {e}")
-
         # Ultimate fallback
-        return "Could you explain the key concepts behind your approach?"
-
+        LLM_FALLBACKS.labels("rewrite").inc()
+        return REWRITE_FALLBACK
+
+    def checked_followup(self, question: str, session_dedup: Optional[Any] = None) -> str:
+        """`question` if it is a theory question not asked before, else the canned follow-up (no LLM call)"""
+        if validate_theory_question(question)[0] and self._find_repeat(question, session_dedup) is None:
+            self._remember_asked(question, session_dedup)
+            return question
+        LLM_FALLBACKS.labels("rewrite").inc()
+        return REWRITE_FALLBACK
+
+    @timed("rewrite_followup")
+    def rewrite_followup(self, original_question: str, session_dedup: Optional[Any] = None) -> str:
+        """Rewrite a follow-up question to ensure it's theoretical and not a repeat"""
+        return self._drive(self._rewrite_steps(original_question, session_dedup), "rewrite")
+
+    @timed("rewrite_followup")
+    async def arewrite_followup(
+        self,
+        original_question: str,
+        session_dedup: Optional[Any] = None,
+        session_key: str = "default"
+    ) -> str:
+        """Async rewrite_followup; the LLM call (if any) is admitted under session_key"""
+        steps = self._rewrite_steps(original_question, session_dedup)
+        return await self._adrive(steps, "rewrite", session_key)
+
+    # ------------------------------------------------------------------
+    # Rubric filling (offline tooling)
+    # ------------------------------------------------------------------
+
+    @timed("fill_rubric_level")
+    async def afill_rubric_level(
+        self,
+        jd: str,
+        competency: str,
+        level: str,
+        max_retries: int = 2
+    ) -> RubricLevelOutput:
+        """Fill one rubric level asynchronously; raises after the last failed attempt
+
+        All rubric fills share one admission key, so bulk filling gets a single
+        fair share of LLM capacity next to live interview sessions.
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                return await self._ainvoke("rubric", {
+                    "jd": jd[:2000],
+                    "competency": competency,
+                    "level": level,
+                }, "rubric_fill")
+            except (OutputParserException, ValueError) as e:
+                if attempt >= max_retries:
+                    raise
+                print(f"  Rubric parse error on attempt {attempt + 1}: {e}")
+                LLM_RETRIES.labels("rubric").inc()
 
 # ============================================================================
 # I/O Helpers
 # ============================================================================
 
-def append_record(path: pathlib.Path, record: Dict[str, Any]) -> None:
-    """Append a JSON record to the output file"""
+def append_record(path: Union[pathlib.Path, Any], record: Dict[str, Any]) -> None:
+    """Append a JSON record to the output file, or to an open eval_log.SegmentedEvalLog"""
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    if not isinstance(path, pathlib.Path):
+        path.write(line, [record])
+        return
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.write(line)
 
 
 def load_sample(input_path: str, sample_idx: int) -> Dict[str, Any]:
@@ -422,6 +1071,20 @@ def select_competency(
         return max(competencies, key=lambda c: c.get("weight", 0.0))
 
 
+def select_competencies(
+    rubric: Dict[str, Any],
+    count: int,
+    competency_name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Top-`count` competencies by weight (a named competency goes first)"""
+    first = select_competency(rubric, competency_name)
+    others = sorted(
+        (c for c in rubric.get("competencies", []) if c is not first),
+        key=lambda c: -c.get("weight", 0.0)
+    )
+    return [first] + others[:max(0, count - 1)]
+
+
 # ============================================================================
 # Main Interview Flow
 # ============================================================================
@@ -435,7 +1098,8 @@ class InterviewSession:
         jd: str,
         resume: str,
         competency: Dict[str, Any],
-        output_path: pathlib.Path,
+        output_path: Union[pathlib.Path, Any],
+        session_dedup: Optional[Any] = None,
     ):
         self.chain_manager = chain_manager
         self.jd = jd
@@ -443,16 +1107,21 @@ class InterviewSession:
         self.competency = competency
         self.output_path = output_path
         self.competency_name = competency.get("name", "Unknown")
+        self.rubric_fragment = rubric_fragment(competency)
+        self.session_dedup = session_dedup
 
-    def run(self, rounds: int) -> None:
-        """Run the interview for the specified number of rounds"""
+    def run(self, rounds: int, stopping: Optional[StoppingRule] = None) -> None:
+        """Run the interview for up to `rounds` rounds (fewer if an adaptive rule stops it)"""
+        stopping = stopping or StoppingRule(rounds)
+        scores: List[float] = []
         print(f"\n=== Competency: {self.competency_name} (theory-only) ===")
 
         # Generate initial question
         q_output = self.chain_manager.generate_question(
             self.jd,
             self.resume,
-            self.competency_name
+            self.competency_name,
+            session_dedup=self.session_dedup
         )
         current_question = q_output.question
 
@@ -478,13 +1147,16 @@ class InterviewSession:
             grade_output = self.chain_manager.grade_answer(
                 current_question,
                 answer,
-                self.competency
+                self.rubric_fragment
             )
 
-            # Rewrite follow-up if needed
-            followup = self.chain_manager.rewrite_followup(
-                grade_output.followup_question
-            )
+            scores.append(grade_output.score)
+            done = stopping.should_stop(scores)
+
+            # Rewrite follow-up if needed (no next question once the interview is over)
+            followup = grade_output.followup_question
+            if not done:
+                followup = self.chain_manager.rewrite_followup(followup, self.session_dedup)
 
             # Calculate band
             band = band_from_score(grade_output.score)
@@ -492,7 +1164,8 @@ class InterviewSession:
             # Display results
             print(f"→ Score: {grade_output.score:.2f}  Band: {band}")
             print(f"→ Why: {grade_output.justification}")
-            print(f"→ Follow-up: {followup}")
+            if not done:
+                print(f"→ Follow-up: {followup}")
 
             # Store record
             record = {
@@ -507,10 +1180,16 @@ class InterviewSession:
             }
             append_record(self.output_path, record)
 
+            if done:
+                if len(scores) < rounds:
+                    overall, confidence = band_confidence(scores)
+                    print(f"\nBand {overall} is stable ({confidence:.0%} confidence) after {len(scores)} rounds.")
+                break
+
             # Next question is the follow-up
             current_question = followup
 
-        print(f"\nSaved records to: {self.output_path}")
+        print(f"\nSaved records to: {getattr(self.output_path, 'directory', self.output_path)}")
 
 
 # ============================================================================
@@ -538,16 +1217,33 @@ def main():
         default=None,
         help="Force a specific competency (else uses top-weight)"
     )
+    parser.add_argument(
+        "--log-dir",
+        default=os.getenv("EVAL_LOG_DIR", "data/training/evals"),
+        help="Segmented eval log to append evaluation results to"
+    )
     parser.add_argument(
         "--outfile",
-        default="data/training/evals.jsonl",
-        help="Where to append evaluation results"
+        default=None,
+        help="Append evaluation results to this JSONL file instead of the eval log"
     )
     parser.add_argument(
         "--rounds",
         type=int,
         default=3,
-        help="Total questions to ask (initial + follow-ups)"
+        help="Total questions to ask (initial + follow-ups); the maximum with --adaptive"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=None,
+        help="Stop early once the competency band is stable (ADAPTIVE_ROUNDS)"
+    )
+    parser.add_argument(
+        "--min-rounds",
+        type=int,
+        default=None,
+        help="Fewest rounds in adaptive mode (ADAPTIVE_MIN_ROUNDS, default 2)"
     )
     parser.add_argument(
         "--model",
@@ -564,10 +1260,26 @@ def main():
         default=os.getenv("LLM_API_KEY", None),
         help="LLM API key"
     )
+    parser.add_argument(
+        "--provider",
+        choices=LLM_PROVIDERS,
+        default=os.getenv("LLM_PROVIDER", "openai"),
+        help="LLM backend; 'fake' runs offline with a deterministic local model"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Regenerate questions/follow-ups that near-duplicate earlier ones"
+    )
+    parser.add_argument(
+        "--question-bank",
+        action="store_true",
+        help="Reuse questions from qg_samples.jsonl and the eval log before calling the LLM"
+    )
 
     args = parser.parse_args()
 
-    if not args.api_key:
+    if not args.api_key and args.provider != "fake":
         print("Error: LLM_API_KEY not found in environment or arguments")
         sys.exit(1)
 
@@ -581,23 +1293,47 @@ def main():
             args.competency
         )
 
+        question_index = None
+        if args.question_bank:
+            from question_index import QuestionIndex
+            question_index = QuestionIndex.from_jsonl()
+
+        session_dedup = None
+        if args.dedup:
+            from near_dup import LSHIndex
+            session_dedup = LSHIndex(max_items=256)
+
         # Initialize chain manager
         chain_manager = InterviewChainManager(
             model_name=args.model,
             api_key=args.api_key,
             base_url=args.base_url,
+            question_index=question_index,
+            provider=args.provider,
         )
 
+        if args.outfile:
+            output = pathlib.Path(args.outfile)
+        else:
+            from eval_log import SegmentedEvalLog
+            output = SegmentedEvalLog(args.log_dir)
+            output.open()
+
         # Run interview session
         session = InterviewSession(
             chain_manager=chain_manager,
             jd=sample.get("jd", ""),
             resume=sample.get("resume", ""),
             competency=competency,
-            output_path=pathlib.Path(args.outfile),
+            output_path=output,
+            session_dedup=session_dedup,
         )
 
-        session.run(rounds=args.rounds)
+        try:
+            session.run(rounds=args.rounds, stopping=StoppingRule.from_env(args.rounds, args.adaptive, args.min_rounds))
+        finally:
+            if not args.outfile:
+                output.close()
 
     except FileNotFoundError:
         print(f"Error: Input file '{args.input}' not found")
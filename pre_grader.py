@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local pre-grader: scores clearly trivial answers without calling the grader LLM.
+
+Features (all lexical, no model):
+- content words: answer words minus stopwords
+- non-answers: "idk", "no idea", "never worked with it", ... in a short answer
+- topical overlap: answer word stems shared with the question, the competency
+  name, its rubric indicators, pitfalls and level descriptions, and the
+  competency's build_step1 taxonomy terms (5-character stems, so inflections
+  and small typos still match)
+
+Only empty answers, non-answers (the phrase plus at most MAX_TRIVIAL_WORDS
+other content words) and answers of at most MAX_TRIVIAL_WORDS content words
+get a deterministic low score and a canned theoretical follow-up. Every other
+answer goes to the LLM with the local score attached to the prompt as a prior;
+no topical overlap only lowers that prior, since on-topic answers often use
+words the rubric does not.
+
+Knobs (env):
+  PRE_GRADER=true   (false sends every answer to the LLM)
+
+Usage (share of LLM calls skipped and agreement with the LLM's scores):
+  python pre_grader.py report --log-dir data/training/evals --rubrics data/training/rubrics_filled.jsonl
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import re
+import statistics
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
+
+from build_step1_jd_resume_jsonl import COMPETENCIES
+from eval_log import LEGACY_EVALS_PATH, iter_eval_records
+from metrics import Counter
+
+MAX_TRIVIAL_WORDS = 3
+OFF_TOPIC_PRIOR = 0.3  # Prior ceiling for answers sharing no vocabulary with the topic
+STEM_CHARS = 5
+
+WORD_RE = re.compile(r"[a-z][a-z0-9+#]*")
+NON_ANSWER_RE = re.compile(
+    r"\b(idk|dunno|no idea|no clue|not sure|don'?t know|do not know|can'?t remember|"
+    r"never (?:worked|used|heard|tried)|no experience|haven'?t (?:worked|used)|pass|skip|n/?a)\b",
+    re.I,
+)
+STOPWORDS = frozenset("""
+a an the and or but if then so of to in on at by for with from into about as is are was were be been being
+i me my we our you your he she it its they them their this that these those there here what which who whom
+how why when where do does did done have has had having can could would should will shall may might must
+not no yes very just also too more most some any all each other such only own same than much many one
+am im i'm it's ok okay well like really thing things stuff know think guess
+""".split())
+
+FOLLOWUPS = (
+    "What is the main purpose of {name} in practice?",
+    "Which basic concept of {name} do you know best?",
+    "Why do teams rely on {name} in real projects?",
+)
+
+PRE_GRADE_OUTCOMES = Counter("pre_grade_total", "Answers scored locally (skipped) or sent to the grader LLM", ["outcome"])
+
+
+def content_words(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def stems(words: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(w[:STEM_CHARS] for w in words if len(w) >= 3)
+
+
+@dataclass
+class PreGrade:
+    """Local verdict; trivial verdicts replace the LLM grade, others are a prior"""
+    score: float
+    trivial: bool
+    justification: str = ""
+    followup_question: str = ""
+    overlap: int = 0
+
+
+class PreGrader:
+    """Lexical scorer over one competency rubric (vocabularies cached per rubric)"""
+
+    def __init__(self, max_rubrics: int = 256):
+        self.max_rubrics = max_rubrics
+        self._vocab: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["PreGrader"]:
+        if os.getenv("PRE_GRADER", "true").lower() in ("0", "false", "no", "off"):
+            return None
+        return cls()
+
+    def rubric_vocab(self, competency_rubric: Union[str, Dict[str, Any]]) -> FrozenSet[str]:
+        """Stems of the competency name, level texts and taxonomy terms"""
+        key = competency_rubric if isinstance(competency_rubric, str) else json.dumps(competency_rubric, sort_keys=True)
+        vocab = self._vocab.get(key)
+        if vocab is not None:
+            return vocab
+        rubric = json.loads(competency_rubric) if isinstance(competency_rubric, str) else competency_rubric
+        name = str(rubric.get("name", ""))
+        texts = [name.replace("-", " ")] + COMPETENCIES.get(name, [])
+        for level in rubric.get("rubric_levels", []):
+            texts.append(str(level.get("description", "")))
+            texts.extend(str(item) for item in level.get("indicators", []) + level.get("pitfalls", []))
+        vocab = stems(content_words(" ".join(texts)))
+        if len(self._vocab) >= self.max_rubrics:
+            self._vocab.pop(next(iter(self._vocab)))
+        self._vocab[key] = vocab
+        return vocab
+
+    def grade(self, question: str, answer: str, competency_rubric: Union[str, Dict[str, Any]]) -> PreGrade:
+        words = content_words(answer)
+        topic = self.rubric_vocab(competency_rubric) | stems(content_words(question))
+        overlap = len(stems(words) & topic)
+
+        if not words:
+            verdict = PreGrade(0.0, True, "No answer was given.")
+        elif NON_ANSWER_RE.search(answer) and len(content_words(NON_ANSWER_RE.sub(" ", answer))) <= MAX_TRIVIAL_WORDS:
+            verdict = PreGrade(0.0, True, "The candidate did not attempt an answer.")
+        elif len(words) <= MAX_TRIVIAL_WORDS:
+            verdict = PreGrade(0.05, True, "The answer is too short to show understanding.")
+        else:
+            # Prior for the LLM: length and topical coverage, 0.2..1.0
+            prior = 0.2 + 0.4 * min(1.0, len(words) / 50) + 0.4 * min(1.0, overlap / 8)
+            if overlap == 0:
+                prior = min(prior, OFF_TOPIC_PRIOR)
+            verdict = PreGrade(round(prior, 2), False)
+        verdict.overlap = overlap
+
+        if verdict.trivial:
+            rubric = json.loads(competency_rubric) if isinstance(competency_rubric, str) else competency_rubric
+            name = str(rubric.get("name", "")) or "this area"
+            verdict.followup_question = FOLLOWUPS[zlib.crc32(question.encode("utf-8")) % len(FOLLOWUPS)].format(name=name)
+        PRE_GRADE_OUTCOMES.labels("skipped" if verdict.trivial else "llm").inc()
+        return verdict
+
+
+# ============================================================================
+# Report against recorded LLM grades
+# ============================================================================
+
+def agreement_report(records: List[Dict[str, Any]], rubrics: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Skip share, and how the local verdicts compare to the LLM scores on record"""
+    from new_llm_inter import band_from_score
+
+    grader = PreGrader()
+    skipped, graded = [], []
+    for record in records:
+        if "score" not in record or "answer" not in record:
+            continue
+        name = record.get("competency") or ""
+        rubric = rubrics.get(name.lower(), {"name": name})
+        verdict = grader.grade(record.get("question", ""), record["answer"], rubric)
+        (skipped if verdict.trivial else graded).append((verdict.score, float(record["score"])))
+
+    def summary(pairs: List[tuple]) -> Dict[str, Any]:
+        if not pairs:
+            return {"answers": 0}
+        local, llm = zip(*pairs)
+        out = {
+            "answers": len(pairs),
+            "mean_local": round(statistics.mean(local), 3),
+            "mean_llm": round(statistics.mean(llm), 3),
+            "mae": round(statistics.mean(abs(a - b) for a, b in pairs), 3),
+            "within_0.15": round(sum(abs(a - b) <= 0.15 for a, b in pairs) / len(pairs), 3),
+            "same_band": round(sum(band_from_score(a) == band_from_score(b) for a, b in pairs) / len(pairs), 3),
+        }
+        if len(pairs) > 2 and len(set(local)) > 1 and len(set(llm)) > 1:
+            out["pearson"] = round(statistics.correlation(local, llm), 3)
+        return out
+
+    total = len(skipped) + len(graded)
+    return {
+        "answers": total,
+        "llm_calls_skipped": round(len(skipped) / total, 3) if total else 0.0,
+        "skipped": summary(skipped),
+        "prior_vs_llm": summary(graded),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local pre-grader report")
+    sub = ap.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="Share of LLM calls skipped and agreement with recorded LLM scores")
+    rep.add_argument("--log-dir", default=None, help="Segmented eval log (default: EVAL_LOG_DIR)")
+    rep.add_argument("--evals", default=LEGACY_EVALS_PATH, help="Legacy evals JSONL, read while the log is empty")
+    rep.add_argument("--rubrics", default="data/training/rubrics_filled.jsonl")
+    args = ap.parse_args()
+
+    records = list(iter_eval_records(args.log_dir, args.evals))
+
+    rubrics: Dict[str, Dict[str, Any]] = {}
+    if pathlib.Path(args.rubrics).exists():
+        for line in pathlib.Path(args.rubrics).read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                for comp in json.loads(line).get("rubric", {}).get("competencies", []):
+                    rubrics.setdefault(str(comp.get("name", "")).lower(), comp)
+
+    print(json.dumps(agreement_report(records, rubrics), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Opt-in sampling profiler for single API requests.
+
+Enabled only when PROFILING_ENABLED=true; a request is then profiled if it
+targets /api/interviews/* or /api/speech/* and carries `X-Profile: 1` or
+`?profile=1`.
+
+- A background thread samples the request's thread via sys._current_frames()
+  at PROFILE_HZ (capped at MAX_HZ), so profiled code runs unmodified
+- One profile at a time and at most PROFILE_MAX_SECONDS per profile; other
+  requests pass straight through
+- Stacks are written as collapsed-stack text (open in speedscope.app or feed to
+  flamegraph.pl) under PROFILE_DIR; the path is returned in `X-Profile-Path`
+
+Note: async handlers share the event-loop thread, so samples taken while the
+request awaits can include other requests' work.
+
+Usage (top frames of a saved profile):
+  python profiling.py data/profiles/20251018-023806-api_interviews_answer-1a2b3c.collapsed --top 15
+"""
+
+from __future__ import annotations
+import argparse
+import collections
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_HZ = 250
+PROFILED_PREFIXES = ("/api/interviews/", "/api/speech/")
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    # Semicolons separate frames in the collapsed format
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed rate from a helper thread"""
+
+    def __init__(self, thread_id: int, hz: float = 100, max_seconds: float = 30):
+        self.thread_id = thread_id
+        self.interval = 1.0 / max(1.0, min(hz, MAX_HZ))
+        self.max_seconds = max_seconds
+        self.stacks: collections.Counter = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> collections.Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+
+def write_collapsed(stacks: collections.Counter, path: pathlib.Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp, path)
+
+
+def read_collapsed(path: pathlib.Path) -> collections.Counter:
+    stacks: collections.Counter = collections.Counter()
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+# ============================================================================
+# ASGI Middleware
+# ============================================================================
+
+class ProfilingMiddleware:
+    """Wraps opted-in requests in a SamplingProfiler; a no-op unless enabled"""
+
+    def __init__(
+        self,
+        app: Callable,
+        enabled: Optional[bool] = None,
+        directory: Optional[str] = None,
+        hz: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+    ):
+        self.app = app
+        if enabled is None:
+            enabled = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.directory = pathlib.Path(directory or os.getenv("PROFILE_DIR", "data/profiles"))
+        self.hz = hz if hz is not None else float(os.getenv("PROFILE_HZ", "100"))
+        self.max_seconds = max_seconds if max_seconds is not None else float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+        self._busy = threading.Lock()
+
+    @staticmethod
+    def _requested(scope: Dict[str, Any]) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile" and value in (b"1", b"true"):
+                return True
+        query = scope.get("query_string", b"")
+        return bool(re.search(rb"(?:^|&)profile=(?:1|true)(?:&|$)", query))
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or not scope["path"].startswith(PROFILED_PREFIXES)
+            or not self._requested(scope)
+            or not self._busy.acquire(blocking=False)  # One profile at a time
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60]
+        path = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}.collapsed"
+        profiler = SamplingProfiler(threading.get_ident(), self.hz, self.max_seconds)
+
+        async def send_with_header(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-path", str(path).encode("utf-8")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            stacks = profiler.stop()
+            self._busy.release()
+            try:
+                write_collapsed(stacks, path)
+                print(f"📈 Profiled {scope['path']}: {profiler.samples} samples → {path}")
+            except OSError as e:
+                print(f"⚠️ Could not write profile {path}: {e}")
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def top_frames(stacks: collections.Counter, n: int) -> List[Tuple[str, int, int]]:
+    """(frame, self samples, total samples) ordered by self time"""
+    self_counts: collections.Counter = collections.Counter()
+    total_counts: collections.Counter = collections.Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [(frame, c, total_counts[frame]) for frame, c in self_counts.most_common(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize a collapsed-stack profile")
+    ap.add_argument("path", help=".collapsed file written by ProfilingMiddleware")
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args()
+
+    stacks = read_collapsed(pathlib.Path(args.path))
+    total = sum(stacks.values()) or 1
+    print(f"{total} samples")
+    print(f"{'self%':>6} {'total%':>7}  frame")
+    for frame, self_n, total_n in top_frames(stacks, args.top):
+        print(f"{100 * self_n / total:6.1f} {100 * total_n / total:7.1f}  {frame}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Local vector index over previously asked / validated interview questions.
+
+- Hashed character + word n-gram vectors (no model download, CPU only)
+- One bucket per competency; brute-force cosine search with NumPy for small
+  buckets, an IVF (spherical k-means) partition once a bucket gets large
+- Incremental inserts, so questions generated by the LLM become reusable
+- A per-process ring of recently served questions plus a per-session exclude
+  list keep the same question from being handed out over and over
+- Lookups query with the competency plus its taxonomy terms found in the JD
+  (a raw JD prefix is dominated by generic words and scores off-topic
+  questions higher than on-topic ones); min_score is calibrated on that query
+
+Sources: data/training/qg_samples.jsonl and the eval log (EVAL_LOG_DIR, or the
+legacy evals.jsonl until it has been imported); only questions that pass
+validate_theory_question and carry a competency.
+
+Usage:
+  python question_index.py --competency GenAI --query "diffusion models for image generation"
+  python question_index.py --calibrate --jds data/training/rubrics_filled.jsonl
+"""
+
+from __future__ import annotations
+import argparse
+import collections
+import functools
+import json
+import pathlib
+import re
+import time
+import zlib
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from build_step1_jd_resume_jsonl import COMPETENCIES
+from context_digest import skill_hits
+from eval_log import iter_eval_records
+from new_llm_inter import validate_theory_question
+
+DEFAULT_SOURCES = ("data/training/qg_samples.jsonl",)
+
+# Youden-optimal cutoff for lookup_query() scores: on-topic bank questions (a
+# competency the JD asks for) vs off-topic ones (competencies it does not)
+DEFAULT_MIN_SCORE = 0.18
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+
+
+# ============================================================================
+# Hashed N-gram Vectors
+# ============================================================================
+
+def normalize_question(text: str) -> str:
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+@functools.lru_cache(maxsize=256)
+def jd_terms(jd: str) -> Dict[str, List[str]]:
+    """competency -> taxonomy terms found in a JD (the JD repeats for every lookup in a session)"""
+    return skill_hits(jd)
+
+
+def lookup_query(jd: str, competency: str) -> str:
+    """The competency plus its taxonomy terms the JD mentions (all of them if it mentions none)"""
+    terms = jd_terms(jd).get(competency) or COMPETENCIES.get(competency, [])
+    return " ".join([competency] + list(terms))
+
+
+def hashed_features(text: str, dim: int) -> np.ndarray:
+    """L2-normalized bag of hashed word unigrams/bigrams and char 3-grams"""
+    words = WORD_RE.findall(text.lower())
+    vec = np.zeros(dim, dtype=np.float32)
+    if not words:
+        return vec
+
+    feats: List[str] = list(words)
+    feats.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        padded = f" {w} "
+        feats.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    # crc32 is stable across processes, unlike hash() on str
+    idx = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in feats), dtype=np.uint32, count=len(feats))
+    np.add.at(vec, idx % dim, 1.0)
+    norm = np.linalg.norm(vec)
+    if norm:
+        vec /= norm
+    return vec
+
+
+# ============================================================================
+# Per-competency Bucket (brute force / IVF)
+# ============================================================================
+
+class _Bucket:
+    """Growable matrix of question vectors with an optional IVF partition"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.vectors = np.zeros((16, dim), dtype=np.float32)
+        self.items: List[Dict[str, Any]] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self._partitioned_size = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, vec: np.ndarray, item: Dict[str, Any]) -> None:
+        n = len(self.items)
+        if n == self.vectors.shape[0]:
+            grown = np.zeros((n * 2, self.dim), dtype=np.float32)
+            grown[:n] = self.vectors
+            self.vectors = grown
+        self.vectors[n] = vec
+        self.items.append(item)
+
+        if self.centroids is not None:
+            # Assign to the nearest list without rebuilding the partition
+            c = int(np.argmax(self.centroids @ vec))
+            self.lists[c] = np.append(self.lists[c], n)
+
+    def partition(self, n_lists: int, iterations: int = 8, seed: int = 0) -> None:
+        """Spherical k-means over the bucket; each list holds row indices"""
+        n = len(self.items)
+        data = self.vectors[:n]
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(n, size=min(n_lists, n), replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(centroids.shape[0]):
+                members = data[assign == c]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    norm = np.linalg.norm(mean)
+                    if norm:
+                        centroids[c] = mean / norm
+
+        assign = np.argmax(data @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assign == c) for c in range(centroids.shape[0])]
+        self._partitioned_size = n
+
+    def needs_partition(self, threshold: int) -> bool:
+        n = len(self.items)
+        return n >= threshold and n >= 2 * max(self._partitioned_size, threshold // 2)
+
+    def search(self, query: np.ndarray, k: int, n_probe: int) -> List[Tuple[float, int]]:
+        n = len(self.items)
+        if not n:
+            return []
+        if self.centroids is None:
+            candidates = None
+            scores = self.vectors[:n] @ query
+        else:
+            probe = np.argsort(self.centroids @ query)[::-1][:n_probe]
+            candidates = np.concatenate([self.lists[c] for c in probe])
+            if not len(candidates):
+                return []
+            scores = self.vectors[candidates] @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [(float(scores[t]), int(r)) for t, r in zip(top, rows)]
+
+
+# ============================================================================
+# Question Index
+# ============================================================================
+
+class QuestionIndex:
+    """Competency-partitioned nearest-neighbour index over historical questions"""
+
+    def __init__(
+        self,
+        dim: int = 1024,
+        ivf_threshold: int = 20000,
+        n_probe: int = 8,
+        min_score: float = DEFAULT_MIN_SCORE,
+        recent_size: int = 256,
+    ):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.min_score = min_score
+        self.buckets: Dict[str, _Bucket] = {}
+        self._seen: Set[Tuple[str, str]] = set()
+        self._recent: Deque[str] = collections.deque(maxlen=recent_size)
+        self._recent_set: collections.Counter = collections.Counter()
+        # The JD is the same for every lookup in a session; vectorize it once
+        self._query_vector = functools.lru_cache(maxsize=256)(self._vectorize)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        return hashed_features(text, self.dim)
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self.buckets.values())
+
+    def add(self, question: str, competency: str, **meta: Any) -> bool:
+        """Insert a validated question; returns False for duplicates/invalid ones"""
+        question = question.strip()
+        key = (competency.lower(), normalize_question(question))
+        if not competency or not key[1] or key in self._seen:
+            return False
+        if not validate_theory_question(question)[0]:
+            return False
+
+        self._seen.add(key)
+        bucket = self.buckets.setdefault(competency.lower(), _Bucket(self.dim))
+        bucket.add(hashed_features(question, self.dim), {"question": question, "competency": competency, **meta})
+        if bucket.needs_partition(self.ivf_threshold):
+            bucket.partition(n_lists=max(8, int(len(bucket) ** 0.5)))
+        return True
+
+    def mark_asked(self, question: str) -> None:
+        """Remember a served question so other sessions don't get it right away"""
+        norm = normalize_question(question)
+        if len(self._recent) == self._recent.maxlen:
+            old = self._recent[0]
+            self._recent_set[old] -= 1
+            if self._recent_set[old] <= 0:
+                del self._recent_set[old]
+        self._recent.append(norm)
+        self._recent_set[norm] += 1
+
+    def search(
+        self,
+        query: str,
+        competency: str,
+        k: int = 5,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Top-k questions for a competency, skipping excluded and recently served ones"""
+        bucket = self.buckets.get(competency.lower())
+        if bucket is None:
+            return []
+
+        skip = {normalize_question(q) for q in (exclude or [])}
+        qvec = self._query_vector(query)
+        results = []
+        # Over-fetch so filtering still leaves k results in the common case
+        for score, row in bucket.search(qvec, k + len(skip) + len(self._recent_set), self.n_probe):
+            item = bucket.items[row]
+            norm = normalize_question(item["question"])
+            if score < self.min_score or norm in skip or norm in self._recent_set:
+                continue
+            results.append((score, item))
+            if len(results) >= k:
+                break
+        return results
+
+    def lookup(
+        self,
+        jd: str,
+        competency: str,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Best reusable question for a JD + competency, or None on a miss"""
+        hits = self.search(lookup_query(jd, competency), competency, k=1, exclude=exclude)
+        if not hits:
+            return None
+        item = hits[0][1]
+        self.mark_asked(item["question"])
+        return item
+
+    def add_record(self, obj: Dict[str, Any], source: str) -> bool:
+        """Index the question of a qg_samples/evals style record"""
+        difficulty = obj.get("difficulty")
+        return self.add(
+            str(obj.get("question", "")),
+            str(obj.get("competency", "")),
+            difficulty=difficulty if difficulty in ("L1", "L2", "L3", "L4") else "L2",
+            source=source,
+        )
+
+    @classmethod
+    def from_jsonl(
+        cls,
+        paths: Iterable[str] = DEFAULT_SOURCES,
+        eval_log_dir: Optional[str] = None,
+        evals: bool = True,
+        **kwargs: Any,
+    ) -> "QuestionIndex":
+        """Build an index from qg_samples style JSONL files (missing files are skipped) and the eval log"""
+        index = cls(**kwargs)
+        for path in paths:
+            p = pathlib.Path(path)
+            if not p.exists():
+                continue
+            with p.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    index.add_record(obj, p.name)
+        if evals:
+            for obj in iter_eval_records(eval_log_dir):
+                index.add_record(obj, "evals")
+        return index
+
+
+# ============================================================================
+# Threshold Calibration
+# ============================================================================
+
+def calibrate(index: QuestionIndex, jds: Iterable[str]) -> Dict[str, Any]:
+    """Score distribution of on-topic vs off-topic bank questions for lookup_query()
+
+    For each JD, questions of a competency the JD mentions are scored against
+    that competency's query (on-topic); questions of competencies the JD does
+    not mention are scored against the same query (off-topic). Returns the
+    keep/reject rates per threshold and the Youden-optimal threshold.
+    """
+    on_topic: List[float] = []
+    off_topic: List[float] = []
+    for jd in jds:
+        mentioned = set(jd_terms(jd))
+        for comp in mentioned:
+            bucket = index.buckets.get(comp.lower())
+            if bucket is None:
+                continue
+            query = hashed_features(lookup_query(jd, comp), index.dim)
+            on_topic.extend(float(s) for s in bucket.vectors[:len(bucket)] @ query)
+            for other in index.buckets.values():
+                if other.items and other.items[0]["competency"] not in mentioned:
+                    off_topic.extend(float(s) for s in other.vectors[:len(other)] @ query)
+    if not on_topic or not off_topic:
+        return {"on_topic": len(on_topic), "off_topic": len(off_topic)}
+
+    pos, neg = np.array(on_topic), np.array(off_topic)
+    table = {
+        round(float(t), 2): {"keep_on_topic": round(float((pos >= t).mean()), 3),
+                             "reject_off_topic": round(float((neg < t).mean()), 3)}
+        for t in np.arange(0.02, 0.42, 0.02)
+    }
+    best = max(table, key=lambda t: table[t]["keep_on_topic"] + table[t]["reject_off_topic"])
+    return {"on_topic": len(pos), "off_topic": len(neg), "best_threshold": best, "thresholds": table}
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the local question index")
+    ap.add_argument("--sources", nargs="+", default=list(DEFAULT_SOURCES), help="JSONL files with questions")
+    ap.add_argument("--eval-log", default=None, help="Eval log directory (default: EVAL_LOG_DIR)")
+    ap.add_argument("--no-evals", action="store_true", help="Skip questions from the eval log")
+    ap.add_argument("--competency", default=None, help="Competency to search in")
+    ap.add_argument("--query", default="", help="JD text or keywords")
+    ap.add_argument("-k", type=int, default=5, help="Number of results")
+    ap.add_argument("--calibrate", action="store_true", help="Report min_score keep/reject rates instead of querying")
+    ap.add_argument("--jds", default="data/training/rubrics_filled.jsonl", help="JSONL rows with a `jd` (--calibrate)")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    index = QuestionIndex.from_jsonl(args.sources, eval_log_dir=args.eval_log, evals=not args.no_evals)
+    if args.calibrate:
+        lines = pathlib.Path(args.jds).read_text(encoding="utf-8").splitlines()
+        jds = [json.loads(line).get("jd", "") for line in lines if line.strip()]
+        print(json.dumps(calibrate(index, jds), indent=2))
+        return
+    if not args.competency:
+        ap.error("--competency is required unless --calibrate")
+    built = time.perf_counter()
+    hits = index.search(f"{args.competency} {args.query}", args.competency, k=args.k)
+    done = time.perf_counter()
+
+    print(f"Indexed {len(index)} question(s) in {len(index.buckets)} competencies "
+          f"({(built - started) * 1000:.1f} ms); query {(done - built) * 1000:.2f} ms")
+    for score, item in hits:
+        print(f"  {score:.3f}  {item['question']}  [{item.get('source', '')}]")
+
+
+if __name__ == "__main__":
+    main()
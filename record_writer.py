@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Group-commit JSONL writer for evaluation records.
+
+append_record opens, writes and closes the file once per graded answer on the
+event loop, and concurrent REST/WebSocket writers are not coordinated. This
+writer owns the file from a single background task fed by an asyncio queue:
+
+- Records arriving within flush_interval (or up to max_batch) share one write
+- File I/O runs in a worker thread, never on the event loop
+- fsync policy: "none", "interval" (at most every fsync_interval seconds) or
+  "always" (after every batch)
+- flush() waits until everything queued so far is on disk; stop() drains
+- A failed write is retried with backoff; if it keeps failing the batch is
+  carried into the next write (up to max_queue records, older ones are
+  dropped and counted) and pending flush() calls raise the error
+- The destination is a sink: a plain JSONL file by default, or any object with
+  the same open/write/fsync/close methods (e.g. eval_log.SegmentedEvalLog)
+
+Usage (benchmark against the synchronous append_record):
+  python record_writer.py --bench --sessions 500 --answers 10
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Union
+
+FSYNC_POLICIES = ("none", "interval", "always")
+
+
+class JsonlFileSink:
+    """Appends batches to one JSONL file"""
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = pathlib.Path(path)
+        self._file = None
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, data: str, records: List[Dict[str, Any]]) -> None:
+        self._file.write(data)
+        self._file.flush()
+
+    def fsync(self) -> None:
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _FlushMarker:
+    """Queue item resolved once every record queued before it has been written"""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+
+class AsyncRecordWriter:
+    """Single-writer, batched JSONL appender"""
+
+    def __init__(
+        self,
+        sink: Union[str, pathlib.Path, Any],
+        flush_interval: float = 0.05,
+        max_batch: int = 512,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        max_queue: int = 10000,
+        write_retries: int = 3,
+        retry_delay: float = 0.1,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.sink = JsonlFileSink(sink) if isinstance(sink, (str, pathlib.Path)) else sink
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_queue = max_queue
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_fsync = 0.0
+        self._carry: List[Dict[str, Any]] = []  # Records of failed writes, retried with the next batch
+
+        self.records_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.records_dropped = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def records_pending_retry(self) -> int:
+        return len(self._carry)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self.sink.open)
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run(), name="record-writer")
+
+    async def append(self, record: Dict[str, Any]) -> None:
+        """Queue a record; only waits when the queue is full (backpressure)"""
+        if self._queue is None:
+            raise RuntimeError("AsyncRecordWriter.start() has not been called")
+        await self._queue.put(record)
+
+    async def flush(self) -> None:
+        """Wait until every record queued so far has been written (raises if the write failed)"""
+        if self._queue is None:
+            return
+        marker = _FlushMarker(asyncio.get_running_loop().create_future())
+        await self._queue.put(marker)
+        await marker.future
+
+    async def stop(self) -> None:
+        """Write everything still queued, fsync and close the file"""
+        if self._task is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            await asyncio.to_thread(self._close)
+            self._task = None
+            self._queue = None
+            if self._carry:
+                print(f"⚠️ {len(self._carry)} record(s) could not be written and were lost")
+                self.records_dropped += len(self._carry)
+                self._carry = []
+
+    def _close(self) -> None:
+        if self.fsync != "none":
+            self.sink.fsync()
+        self.sink.close()
+
+    async def _collect_batch(self) -> List[Any]:
+        """Block for one item, then gather more until the interval or batch size is hit"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            if isinstance(batch[-1], _FlushMarker):
+                break  # Someone is waiting; don't hold the batch open
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _write(self, data: str, records: List[Dict[str, Any]]) -> None:
+        self.sink.write(data, records)
+        if self.fsync == "always":
+            self.sink.fsync()
+        elif self.fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                self.sink.fsync()
+                self._last_fsync = now
+
+    async def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        for attempt in range(self.write_retries + 1):
+            try:
+                await asyncio.to_thread(self._write, data, records)
+                return
+            except Exception as e:
+                self.write_errors += 1
+                if attempt == self.write_retries:
+                    raise
+                print(f"⚠️ Write of {len(records)} record(s) failed (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            records = self._carry + [item for item in batch if not isinstance(item, _FlushMarker)]
+            self._carry = []
+            error: Optional[BaseException] = None
+            try:
+                if records:
+                    await self._write_batch(records)
+                    self.records_written += len(records)
+                    self.batches_written += 1
+            except Exception as e:
+                error = e
+                self._carry = records[-self.max_queue:]
+                self.records_dropped += len(records) - len(self._carry)
+                print(f"⚠️ Failed to write {len(records)} record(s), keeping {len(self._carry)} for the next batch: {e}")
+            finally:
+                for item in batch:
+                    if isinstance(item, _FlushMarker) and not item.future.done():
+                        if error is None:
+                            item.future.set_result(None)
+                        else:
+                            item.future.set_exception(error)
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def _sync_append(path: pathlib.Path, record: Dict[str, Any]) -> None:
+    # Same body as new_llm_inter.append_record (kept local so the benchmark
+    # runs without the LangChain dependencies)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _bench(mode: str, path: pathlib.Path, sessions: int, answers: int, fsync: str) -> Dict[str, float]:
+    writer = AsyncRecordWriter(path, fsync=fsync) if mode == "group" else None
+    if writer:
+        await writer.start()
+    latencies: List[float] = []
+    record = {
+        "session_id": "session_bench", "round": 1, "competency": "GenAI",
+        "question": "What is a diffusion model?", "answer": "x" * 600, "score": 0.7,
+        "band": "L3", "justification": "y" * 120, "followup_question": "How does DDPM differ?",
+        "timestamp": "2025-10-18T02:38:55.256549",
+    }
+
+    async def session(i: int) -> None:
+        rng = random.Random(i)
+        for r in range(answers):
+            await asyncio.sleep(rng.uniform(0, 0.02))  # Candidates don't answer in lockstep
+            # Answer latency = simulated 5 ms grading await + the append, so any
+            # event-loop blocking by the append shows up for every session
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            rec = dict(record, session_id=f"session_{i}", round=r + 1)
+            if writer:
+                await writer.append(rec)
+            else:
+                _sync_append(path, rec)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    if writer:
+        await writer.stop()
+    elapsed = time.perf_counter() - started
+
+    total = sessions * answers
+    return {
+        "appends_per_sec": round(total / elapsed),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "batches": writer.batches_written if writer else total,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark group-commit vs per-record appends")
+    ap.add_argument("--bench", action="store_true", help="Run the benchmark")
+    ap.add_argument("--sessions", type=int, default=500)
+    ap.add_argument("--answers", type=int, default=10)
+    ap.add_argument("--fsync", choices=FSYNC_POLICIES, default="interval")
+    args = ap.parse_args()
+
+    if not args.bench:
+        ap.print_help()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sync", "group"):
+            path = pathlib.Path(tmp) / f"{mode}.jsonl"
+            result = asyncio.run(_bench(mode, path, args.sessions, args.answers, args.fsync))
+            lines = sum(1 for _ in path.open(encoding="utf-8"))
+            print(f"{mode:>5}: {json.dumps(result)} lines={lines}")
+
+
+if __name__ == "__main__":
+    main()
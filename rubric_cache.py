@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of interview samples built from raw JD/CV text.
+
+A sample has the same shape as a rubrics_filled.jsonl row:
+  { jd, resume, evidence, rubric }
+so load_sample/select_competency consumers can use it unchanged.
+
+Key = sha256 over the normalized JD and resume. On a miss the evidence matcher
+from build_step1 runs, a skeleton is derived from the evidence and filled through
+RubricFiller, whose level cache is keyed by (competency, level, JD hash) — so
+many candidates applying to the same JD reuse the generated levels.
+
+Entries live as one JSON file per key under data/cache/samples/ plus a small
+in-memory LRU; concurrent requests for the same key share a single build.
+Hashing and evidence matching are CPU-bound regex passes over the whole text,
+so they run through `offload` (the API passes its parser process pool; the
+default is a worker thread), and disk reads/writes run in a thread.
+"""
+
+from __future__ import annotations
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from build_step1_jd_resume_jsonl import normalize, map_to_evidence
+from build_rubrics_filled import RubricFiller, build_skeleton
+
+DEFAULT_SAMPLE_DIR = "data/cache/samples"
+
+
+def sample_key(jd: str, resume: str) -> str:
+    """Content hash of the normalized JD + resume pair"""
+    h = hashlib.sha256()
+    h.update(normalize(jd).encode("utf-8"))
+    h.update(b"\x00")
+    h.update(normalize(resume).encode("utf-8"))
+    return h.hexdigest()
+
+
+class SampleCache:
+    """Disk-backed, content-addressed store of evidence + filled rubric per JD/CV pair"""
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_SAMPLE_DIR,
+        memory_entries: int = 256,
+        offload: Optional[Callable[..., Awaitable[Any]]] = None,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.memory_entries = memory_entries
+        self.offload = offload or asyncio.to_thread  # offload(fn, *args) runs CPU-bound work off the loop
+        self._memory: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, sample: Dict[str, Any]) -> None:
+        self._memory[key] = sample
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write(self, key: str, sample: Dict[str, Any]) -> None:
+        """Write atomically (temp file, then rename)"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(sample, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached sample from memory or disk"""
+        sample = self._memory.get(key)
+        if sample is not None:
+            self._memory.move_to_end(key)
+            return sample
+        sample = self._read(key)
+        if sample is not None:
+            self._remember(key, sample)
+        return sample
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() with the disk read in a thread"""
+        sample = self._memory.get(key)
+        if sample is not None:
+            self._memory.move_to_end(key)
+            return sample
+        sample = await asyncio.to_thread(self._read, key)
+        if sample is not None:
+            self._remember(key, sample)
+        return sample
+
+    def put(self, key: str, sample: Dict[str, Any]) -> None:
+        """Store a sample on disk and in memory"""
+        self._write(key, sample)
+        self._remember(key, sample)
+
+    async def aput(self, key: str, sample: Dict[str, Any]) -> None:
+        """put() with the disk write in a thread"""
+        await asyncio.to_thread(self._write, key, sample)
+        self._remember(key, sample)
+
+    async def get_or_build(
+        self,
+        jd: str,
+        resume: str,
+        filler: RubricFiller,
+        top_k: int = 4,
+        key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return the sample for a JD/CV pair, building and storing it once on a miss
+
+        key: sample_key(jd, resume) when the caller has already computed it.
+        """
+        if key is None:
+            key = await self.offload(sample_key, jd, resume)
+
+        sample = await self.aget(key) or self._memory.get(key)  # (or built while the disk was read)
+        if sample is not None:
+            self.hits += 1
+            return sample
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            sample = await self._build(jd, resume, filler, top_k)
+            # Only complete rubrics are cached, so failed levels are retried next time
+            if filler.row_is_filled(sample):
+                await self.aput(key, sample)
+            future.set_result(sample)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._in_flight[key]
+        return sample
+
+    async def _build(self, jd: str, resume: str, filler: RubricFiller, top_k: int) -> Dict[str, Any]:
+        evidence = await self.offload(map_to_evidence, jd, resume)
+        # Drop competencies with no signal, like build_step1 does with --min-competency 1
+        evidence = {k: v for k, v in evidence.items() if (v["jd"] + v["resume"]) > 0} or evidence
+
+        sample = {
+            "jd": jd.strip(),
+            "resume": resume.strip(),
+            "evidence": evidence,
+            "rubric": build_skeleton(evidence, top_k=top_k),
+        }
+        if not sample["rubric"]["competencies"]:
+            raise ValueError("No known competencies found in the JD or resume")
+
+        return await filler.fill_row(sample)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Materialized per-session summaries for interview history.
+
+A completed session never changes, so its summary (question count, average
+score/band, time range) is computed once at completion and appended to
+data/training/session_summaries.jsonl. History pages are then served from
+in-memory indexes sorted by completion time:
+
+- Keyset (cursor) pagination: a page costs O(log n + page size)
+- Per-competency, per-band and per-(competency, band) indexes, so filtered
+  pages stay O(page size)
+- since/until bounds are binary searches on completed_at
+- A version counter (summaries are append-only) backs ETag revalidation
+
+The first start without a summaries file backfills from the eval log.
+
+Usage (rebuild the summaries file from the eval log):
+  python session_summaries.py --rebuild
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import bisect
+import hashlib
+import json
+import pathlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from new_llm_inter import band_from_score
+
+DEFAULT_PATH = "data/training/session_summaries.jsonl"
+
+Key = Tuple[str, str]  # (completed_at, session_id)
+
+
+def build_summary(
+    session_id: str,
+    competency: str,
+    scores: List[float],
+    started_at: str,
+    completed_at: str,
+) -> Dict[str, Any]:
+    avg_score = sum(scores) / len(scores) if scores else 0
+    return {
+        "session_id": session_id,
+        "competency": competency,
+        "questions_answered": len(scores),
+        "average_score": round(avg_score, 2),
+        "average_band": band_from_score(avg_score),
+        "scores": scores,
+        "timestamp": started_at,
+        "completed_at": completed_at,
+    }
+
+
+def summaries_from_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Group raw eval records by session (used for the one-time backfill)"""
+    sessions: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        session_id = record.get("session_id", "unknown")
+        ts = record.get("timestamp", "")
+        data = sessions.setdefault(session_id, {
+            "competency": record.get("competency", ""),
+            "scores": [],
+            "first": ts,
+            "last": ts,
+        })
+        data["scores"].append(record.get("score", 0))
+        data["last"] = max(data["last"], ts)
+    return [
+        build_summary(sid, d["competency"], d["scores"], d["first"], d["last"])
+        for sid, d in sessions.items()
+    ]
+
+
+def encode_cursor(key: Key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Key:
+    try:
+        completed_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(completed_at), str(session_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class SessionSummaryStore:
+    """Append-only summary file plus sorted in-memory indexes"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        # Ascending (completed_at, session_id) keys; pages walk them backwards
+        self._keys: List[Key] = []
+        self._by_competency: Dict[str, List[Key]] = {}
+        self._by_band: Dict[str, List[Key]] = {}
+        self._by_competency_band: Dict[Tuple[str, str], List[Key]] = {}
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self) -> bool:
+        """Read the summaries file; False when it doesn't exist yet"""
+        if not self.path.exists():
+            return False
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._index(json.loads(line), presorted=False)
+                except json.JSONDecodeError:
+                    continue  # Torn last line after a crash
+        self._sort()
+        return True
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(session_id)
+
+    def add(self, summary: Dict[str, Any]) -> bool:
+        """Persist and index a summary; a session is only ever summarized once"""
+        return self.add_many([summary]) == 1
+
+    def add_many(self, summaries: Iterable[Dict[str, Any]]) -> int:
+        with self._lock:
+            new: List[Dict[str, Any]] = []
+            seen = set()
+            for summary in summaries:
+                if summary["session_id"] not in self._by_id and summary["session_id"] not in seen:
+                    seen.add(summary["session_id"])
+                    new.append(summary)
+            if not new:
+                return 0
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in new))
+            # Bulk loads append then sort once instead of inserting in order
+            presorted = len(new) < 64
+            for summary in new:
+                self._index(summary, presorted)
+            if not presorted:
+                self._sort()
+            return len(new)
+
+    def _index(self, summary: Dict[str, Any], presorted: bool = True) -> None:
+        session_id = summary["session_id"]
+        if session_id in self._by_id:
+            return
+        key = (summary.get("completed_at", ""), session_id)
+        self._by_id[session_id] = summary
+        competency, band = summary.get("competency", "").lower(), summary.get("average_band", "")
+        lists = (
+            self._keys,
+            self._by_competency.setdefault(competency, []),
+            self._by_band.setdefault(band, []),
+            self._by_competency_band.setdefault((competency, band), []),
+        )
+        for keys in lists:
+            if presorted:
+                bisect.insort(keys, key)
+            else:
+                keys.append(key)
+        self.version += 1
+
+    def _sort(self) -> None:
+        self._keys.sort()
+        for index in (self._by_competency, self._by_band, self._by_competency_band):
+            for keys in index.values():
+                keys.sort()
+
+    def etag(self, *params: Any) -> str:
+        """Changes whenever a summary is added or the query differs"""
+        digest = hashlib.sha1(json.dumps([self.version, len(self), *params], default=str).encode("utf-8"))
+        return f'W/"{digest.hexdigest()[:16]}"'
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        competency: Optional[str] = None,
+        band: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first page of summaries and the cursor for the next page"""
+        # Every filter combination has its own sorted index, so nothing is filtered inline
+        if competency and band:
+            keys = self._by_competency_band.get((competency.lower(), band), [])
+        elif competency:
+            keys = self._by_competency.get(competency.lower(), [])
+        elif band:
+            keys = self._by_band.get(band, [])
+        else:
+            keys = self._keys
+
+        # Start just before the cursor (exclusive) or the end of the until bound
+        end = len(keys)
+        if cursor:
+            end = bisect.bisect_left(keys, decode_cursor(cursor))
+        if until:
+            # Inclusive prefix bound: until="2025-05-01" covers that whole day
+            end = min(end, bisect.bisect_left(keys, (until + "\uffff", "")))
+
+        items: List[Dict[str, Any]] = []
+        i = end - 1
+        while i >= 0 and len(items) < limit:
+            key = keys[i]
+            if since and key[0] < since:
+                break
+            items.append(self._by_id[key[1]])
+            i -= 1
+
+        has_more = i >= 0 and not (since and keys[i][0] < since)
+        next_cursor = None
+        if items and has_more:
+            last = items[-1]
+            next_cursor = encode_cursor((last.get("completed_at", ""), last["session_id"]))
+        return items, next_cursor
+
+
+# ============================================================================
+# CLI Entry Point
+# ============================================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild session summaries from the eval log")
+    ap.add_argument("--rebuild", action="store_true", help="Recompute the summaries file from scratch")
+    ap.add_argument("--log-dir", default="data/training/evals", help="Segmented eval log directory")
+    ap.add_argument("--out", default=DEFAULT_PATH, help="Summaries JSONL path")
+    args = ap.parse_args()
+
+    if not args.rebuild:
+        ap.print_help()
+        return
+
+    from eval_log import SegmentedEvalLog
+
+    out = pathlib.Path(args.out)
+    if out.exists():
+        out.unlink()
+    store = SessionSummaryStore(str(out))
+    n = store.add_many(summaries_from_records(SegmentedEvalLog(args.log_dir).iter_records()))
+    print(f"Wrote {n} session summaries → {out}")
+
+
+if __name__ == "__main__":
+    main()